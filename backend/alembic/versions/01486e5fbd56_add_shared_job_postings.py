@@ -0,0 +1,64 @@
+"""Add shared job postings
+
+Revision ID: 01486e5fbd56
+Revises: 874bf2b7fd61
+Create Date: 2026-10-17 10:12:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '01486e5fbd56'
+down_revision: Union[str, Sequence[str], None] = '874bf2b7fd61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('job_postings',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('normalized_url', sa.String(length=500), nullable=True),
+    sa.Column('content_hash', sa.String(length=64), nullable=False),
+    sa.Column('description_text', sa.Text(), nullable=False),
+    sa.Column('analysis', sa.JSON(), nullable=True),
+    sa.Column('times_reused', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_job_postings_id'), 'job_postings', ['id'], unique=False)
+    op.create_index(op.f('ix_job_postings_normalized_url'), 'job_postings', ['normalized_url'], unique=True)
+    op.create_index(op.f('ix_job_postings_content_hash'), 'job_postings', ['content_hash'], unique=True)
+
+    # job_descriptions is not created by an earlier revision, so only databases
+    # built from the models have it; link it to postings where it exists
+    if 'job_descriptions' in sa.inspect(op.get_bind()).get_table_names():
+        with op.batch_alter_table('job_descriptions') as batch_op:
+            batch_op.add_column(sa.Column('posting_id', sa.Integer(), nullable=True))
+            batch_op.create_index(batch_op.f('ix_job_descriptions_posting_id'), ['posting_id'], unique=False)
+            batch_op.create_foreign_key('fk_job_descriptions_posting_id', 'job_postings', ['posting_id'], ['id'])
+            batch_op.alter_column('description_text', existing_type=sa.Text(), nullable=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if 'job_descriptions' in sa.inspect(op.get_bind()).get_table_names():
+        op.execute(
+            "UPDATE job_descriptions SET description_text = "
+            "(SELECT description_text FROM job_postings WHERE job_postings.id = job_descriptions.posting_id) "
+            "WHERE description_text IS NULL"
+        )
+        with op.batch_alter_table('job_descriptions') as batch_op:
+            batch_op.alter_column('description_text', existing_type=sa.Text(), nullable=False)
+            batch_op.drop_constraint('fk_job_descriptions_posting_id', type_='foreignkey')
+            batch_op.drop_index(batch_op.f('ix_job_descriptions_posting_id'))
+            batch_op.drop_column('posting_id')
+    op.drop_index(op.f('ix_job_postings_content_hash'), table_name='job_postings')
+    op.drop_index(op.f('ix_job_postings_normalized_url'), table_name='job_postings')
+    op.drop_index(op.f('ix_job_postings_id'), table_name='job_postings')
+    op.drop_table('job_postings')
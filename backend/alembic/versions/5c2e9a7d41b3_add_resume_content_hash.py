@@ -0,0 +1,32 @@
+"""Add resume content hash
+
+Revision ID: 5c2e9a7d41b3
+Revises: 01486e5fbd56
+Create Date: 2026-10-17 15:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c2e9a7d41b3'
+down_revision: Union[str, Sequence[str], None] = '01486e5fbd56'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('resumes') as batch_op:
+        batch_op.add_column(sa.Column('content_hash', sa.String(length=64), nullable=True))
+        batch_op.create_index('ix_resumes_user_id_content_hash', ['user_id', 'content_hash'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('resumes') as batch_op:
+        batch_op.drop_index('ix_resumes_user_id_content_hash')
+        batch_op.drop_column('content_hash')
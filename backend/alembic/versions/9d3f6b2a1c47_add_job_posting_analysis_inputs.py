@@ -0,0 +1,30 @@
+"""Add job posting analysis inputs
+
+Revision ID: 9d3f6b2a1c47
+Revises: 5c2e9a7d41b3
+Create Date: 2026-10-17 18:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d3f6b2a1c47'
+down_revision: Union[str, Sequence[str], None] = '5c2e9a7d41b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('job_postings') as batch_op:
+        batch_op.add_column(sa.Column('analysis_inputs', sa.String(length=500), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('job_postings') as batch_op:
+        batch_op.drop_column('analysis_inputs')
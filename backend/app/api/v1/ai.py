@@ -1,15 +1,37 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPBearer
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, AsyncIterator
 from pydantic import BaseModel
+import asyncio
+import json
+import math
+import time
+from app.core.config import settings
 from app.services.ai_service import AIService
+from app.services.ai_resilience import CircuitOpenError
 from app.services.auth import get_current_user
+from app.services.rate_limiter import enforce_ai_rate_limit, check_ai_rate_limit, ai_rate_limiter
+from app.services.ai_tasks import ai_task_queue, BackgroundOptions, task_accepted, public_task
+from app.services.tailor_prefetch import tailor_prefetcher
+from app.services.document_extraction import document_extractor
+from app.services.resume_parser import resume_parser
 from app.models.user import User
 
 router = APIRouter(prefix="/ai", tags=["AI Services"])
 security = HTTPBearer()
 ai_service = AIService()
 
+# Background task handlers; each payload is the request body of the matching route
+ai_task_queue.register("tailor_resume", lambda user_id, payload: ai_service.tailor_resume_for_job(**payload))
+ai_task_queue.register("cover_letter", lambda user_id, payload: ai_service.generate_cover_letter(**payload))
+ai_task_queue.register(
+    "enhance_experience", lambda user_id, payload: ai_service.enhance_experience_descriptions(**payload)
+)
+ai_task_queue.register("job_analysis", lambda user_id, payload: ai_service.analyze_job_description(**payload))
+ai_task_queue.register("career_guidance", lambda user_id, payload: ai_service.provide_career_guidance(**payload))
+ai_task_queue.register("ats_optimization", lambda user_id, payload: _ats_optimization(**payload))
+
 # Request Models
 class ResumeTailoringRequest(BaseModel):
     resume_data: Dict[str, Any]
@@ -41,7 +63,7 @@ class CareerGuidanceRequest(BaseModel):
 
 # Response Models
 class ResumeTailoringResponse(BaseModel):
-    tailored_resume: Dict[str, Any]
+    tailored_resume: str
     keywords: list
     ats_improvements: list
     cover_letter_suggestions: str
@@ -75,14 +97,38 @@ class CareerGuidanceResponse(BaseModel):
     timeline: str
     challenge_solutions: list
 
+def _event_stream(events: AsyncIterator[Dict[str, Any]], action: str) -> StreamingResponse:
+    """Relay AI service events to the client as server-sent events"""
+    async def generate():
+        try:
+            async for event in events:
+                yield f"event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+        except CircuitOpenError as e:
+            # Headers are already sent, so the client gets the wait in the event instead of a Retry-After header
+            detail = json.dumps({"detail": f"Failed to {action}: {str(e)}", "retry_after": math.ceil(e.retry_after)})
+            yield f"event: error\ndata: {detail}\n\n"
+        except Exception as e:
+            detail = json.dumps({"detail": f"Failed to {action}: {str(e)}"})
+            yield f"event: error\ndata: {detail}\n\n"
+    
+    return StreamingResponse(
+        generate(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.post("/tailor-resume", response_model=ResumeTailoringResponse)
 async def tailor_resume_for_job(
     request: ResumeTailoringRequest,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(enforce_ai_rate_limit),
+    options: BackgroundOptions = Depends()
 ):
     """
     Tailor a resume for a specific job using AI analysis
     """
+    if options.background:
+        task = await ai_task_queue.submit(current_user.id, "tailor_resume", request.model_dump(), options.idempotency_key)
+        return task_accepted(task)
     try:
         result = await ai_service.tailor_resume_for_job(
             resume_data=request.resume_data,
@@ -91,6 +137,8 @@ async def tailor_resume_for_job(
             company=request.company
         )
         return ResumeTailoringResponse(**result)
+    except CircuitOpenError:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -100,11 +148,15 @@ async def tailor_resume_for_job(
 @router.post("/generate-cover-letter", response_model=CoverLetterResponse)
 async def generate_cover_letter(
     request: CoverLetterRequest,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(enforce_ai_rate_limit),
+    options: BackgroundOptions = Depends()
 ):
     """
     Generate a personalized cover letter for a specific job
     """
+    if options.background:
+        task = await ai_task_queue.submit(current_user.id, "cover_letter", request.model_dump(), options.idempotency_key)
+        return task_accepted(task)
     try:
         result = await ai_service.generate_cover_letter(
             resume_data=request.resume_data,
@@ -114,20 +166,44 @@ async def generate_cover_letter(
             user_name=request.user_name
         )
         return CoverLetterResponse(**result)
+    except CircuitOpenError:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to generate cover letter: {str(e)}"
         )
 
+@router.post("/generate-cover-letter/stream")
+async def stream_cover_letter(
+    request: CoverLetterRequest,
+    current_user: User = Depends(enforce_ai_rate_limit)
+):
+    """
+    Stream a cover letter as server-sent `token` events, followed by a `result` event
+    carrying the same fields as /generate-cover-letter
+    """
+    events = ai_service.stream_cover_letter(
+        resume_data=request.resume_data,
+        job_description=request.job_description,
+        company=request.company,
+        role=request.role,
+        user_name=request.user_name
+    )
+    return _event_stream(events, "generate cover letter")
+
 @router.post("/enhance-experience", response_model=ExperienceEnhancementResponse)
 async def enhance_experience_descriptions(
     request: ExperienceEnhancementRequest,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(enforce_ai_rate_limit),
+    options: BackgroundOptions = Depends()
 ):
     """
     Enhance experience descriptions using AI to make them more impactful
     """
+    if options.background:
+        task = await ai_task_queue.submit(current_user.id, "enhance_experience", request.model_dump(), options.idempotency_key)
+        return task_accepted(task)
     try:
         result = await ai_service.enhance_experience_descriptions(
             experience_text=request.experience_text,
@@ -135,20 +211,42 @@ async def enhance_experience_descriptions(
             industry=request.industry
         )
         return ExperienceEnhancementResponse(**result)
+    except CircuitOpenError:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to enhance experience: {str(e)}"
         )
 
+@router.post("/enhance-experience/stream")
+async def stream_experience_enhancement(
+    request: ExperienceEnhancementRequest,
+    current_user: User = Depends(enforce_ai_rate_limit)
+):
+    """
+    Stream an enhanced experience description as server-sent `token` events, followed by
+    a `result` event carrying the same fields as /enhance-experience
+    """
+    events = ai_service.stream_experience_enhancement(
+        experience_text=request.experience_text,
+        target_role=request.target_role,
+        industry=request.industry
+    )
+    return _event_stream(events, "enhance experience")
+
 @router.post("/analyze-job", response_model=JobAnalysisResponse)
 async def analyze_job_description(
     request: JobAnalysisRequest,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(enforce_ai_rate_limit),
+    options: BackgroundOptions = Depends()
 ):
     """
     Analyze a job description to extract key requirements and insights
     """
+    if options.background:
+        task = await ai_task_queue.submit(current_user.id, "job_analysis", request.model_dump(), options.idempotency_key)
+        return task_accepted(task)
     try:
         result = await ai_service.analyze_job_description(
             job_description=request.job_description,
@@ -156,6 +254,8 @@ async def analyze_job_description(
             role=request.role
         )
         return JobAnalysisResponse(**result)
+    except CircuitOpenError:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -165,11 +265,15 @@ async def analyze_job_description(
 @router.post("/career-guidance", response_model=CareerGuidanceResponse)
 async def provide_career_guidance(
     request: CareerGuidanceRequest,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(enforce_ai_rate_limit),
+    options: BackgroundOptions = Depends()
 ):
     """
     Provide personalized career guidance based on user profile and goals
     """
+    if options.background:
+        task = await ai_task_queue.submit(current_user.id, "career_guidance", request.model_dump(), options.idempotency_key)
+        return task_accepted(task)
     try:
         result = await ai_service.provide_career_guidance(
             user_profile=request.user_profile,
@@ -177,98 +281,177 @@ async def provide_career_guidance(
             current_challenges=request.current_challenges
         )
         return CareerGuidanceResponse(**result)
+    except CircuitOpenError:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to provide career guidance: {str(e)}"
         )
 
+@router.post("/career-guidance/stream")
+async def stream_career_guidance(
+    request: CareerGuidanceRequest,
+    current_user: User = Depends(enforce_ai_rate_limit)
+):
+    """
+    Stream career guidance as server-sent `token` events, followed by a `result` event
+    carrying the same fields as /career-guidance
+    """
+    events = ai_service.stream_career_guidance(
+        user_profile=request.user_profile,
+        career_goals=request.career_goals,
+        current_challenges=request.current_challenges
+    )
+    return _event_stream(events, "provide career guidance")
+
 @router.get("/health")
 async def ai_health_check():
     """
-    Check if the AI service is working properly
+    Report AI service health from the latest background probe; never calls the upstream
     """
-    try:
-        is_healthy = await ai_service.health_check()
-        if is_healthy:
-            return {"status": "healthy", "message": "AI service is working properly"}
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail="AI service is not responding"
-            )
-    except Exception as e:
+    health = ai_service.health_check()
+    if health["status"] == "unhealthy":
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail=f"AI service health check failed: {str(e)}"
+            detail=health
         )
+    return health
+
+@router.get("/stats")
+async def ai_stats(current_user: User = Depends(get_current_user)):
+    """
+    Report runtime statistics for the shared AI request pipeline
+    """
+    stats = ai_service.get_stats()
+    stats['rate_limit'] = ai_rate_limiter.get_stats()
+    stats['tasks'] = await ai_task_queue.get_stats()
+    stats['tailor_prefetch'] = tailor_prefetcher.get_stats()
+    stats['document_extraction'] = document_extractor.get_stats()
+    stats['resume_parser'] = resume_parser.get_stats()
+    return stats
+
+@router.get("/tasks")
+async def list_ai_tasks(
+    limit: int = Query(20, ge=1, le=100),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    List the current user's recent background AI tasks, newest first
+    """
+    return [public_task(task) for task in await ai_task_queue.list_for_user(current_user.id, limit)]
+
+@router.get("/tasks/{task_id}")
+async def get_ai_task(
+    task_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Poll a background AI task; `result` is set once `status` is `succeeded`
+    """
+    task = await ai_task_queue.get(task_id)
+    if task is None or task["user_id"] != current_user.id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
+    return public_task(task)
 
 @router.post("/bulk-resume-analysis")
 async def bulk_resume_analysis(
     resumes: list[ResumeTailoringRequest],
+    max_parallel: Optional[int] = Query(None, ge=1),
     current_user: User = Depends(get_current_user)
 ):
     """
-    Analyze multiple resumes for different job applications
+    Analyze multiple resumes for different job applications concurrently.
+    Each item reports its own success or error so one failure does not discard the batch.
     """
-    try:
-        results = []
-        for resume_request in resumes:
-            result = await ai_service.tailor_resume_for_job(
-                resume_data=resume_request.resume_data,
-                job_description=resume_request.job_description,
-                target_role=resume_request.target_role,
-                company=resume_request.company
-            )
-            results.append({
-                "company": resume_request.company,
-                "role": resume_request.target_role,
-                "analysis": result
-            })
-        
-        return {
-            "total_analyzed": len(results),
-            "results": results
-        }
-    except Exception as e:
+    # A batch bigger than the burst could never be paid for, however long the client waited
+    if len(resumes) > settings.AI_RATE_LIMIT_BURST:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to perform bulk resume analysis: {str(e)}"
+            status_code=413,
+            detail=f"Batch of {len(resumes)} resumes exceeds the limit of {settings.AI_RATE_LIMIT_BURST} per request"
         )
+    # Each resume costs one AI request, charged together so a batch is never half paid for
+    await check_ai_rate_limit(current_user.id, cost=len(resumes))
+    parallelism = min(max_parallel or settings.AI_BULK_MAX_PARALLEL, settings.AI_BULK_MAX_PARALLEL)
+    semaphore = asyncio.Semaphore(parallelism)
+    
+    async def analyze_one(index: int, resume_request: ResumeTailoringRequest) -> Dict[str, Any]:
+        async with semaphore:
+            started_at = time.perf_counter()
+            item = {
+                "index": index,
+                "company": resume_request.company,
+                "role": resume_request.target_role
+            }
+            try:
+                item["analysis"] = await ai_service.tailor_resume_for_job(
+                    resume_data=resume_request.resume_data,
+                    job_description=resume_request.job_description,
+                    target_role=resume_request.target_role,
+                    company=resume_request.company
+                )
+                item["success"] = True
+            except Exception as e:
+                item["success"] = False
+                item["error"] = str(e)
+            item["elapsed_ms"] = round((time.perf_counter() - started_at) * 1000, 1)
+            return item
+    
+    started_at = time.perf_counter()
+    results = await asyncio.gather(*(analyze_one(i, r) for i, r in enumerate(resumes)))
+    succeeded = sum(1 for item in results if item["success"])
+    
+    return {
+        "total_requested": len(resumes),
+        "total_analyzed": succeeded,
+        "total_failed": len(resumes) - succeeded,
+        "max_parallel": parallelism,
+        "elapsed_ms": round((time.perf_counter() - started_at) * 1000, 1),
+        "results": results
+    }
 
 @router.post("/ats-optimization")
 async def optimize_for_ats(
     request: ResumeTailoringRequest,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(enforce_ai_rate_limit),
+    options: BackgroundOptions = Depends()
 ):
     """
     Specifically optimize a resume for ATS (Applicant Tracking System) compatibility
     """
+    if options.background:
+        task = await ai_task_queue.submit(current_user.id, "ats_optimization", request.model_dump(), options.idempotency_key)
+        return task_accepted(task)
     try:
-        # Focus on ATS optimization
-        result = await ai_service.tailor_resume_for_job(
-            resume_data=request.resume_data,
-            job_description=request.job_description,
-            target_role=request.target_role,
-            company=request.company
-        )
-        
-        # Extract ATS-specific improvements
-        ats_optimized = {
-            "keywords": result.get("keywords", []),
-            "ats_improvements": result.get("ats_improvements", []),
-            "score_improvement": result.get("score_improvement", 0),
-            "formatting_suggestions": [
-                "Use standard section headers",
-                "Include relevant keywords naturally",
-                "Use bullet points for achievements",
-                "Avoid graphics and complex formatting"
-            ]
-        }
-        
-        return ats_optimized
+        return await _ats_optimization(**request.model_dump())
+    except CircuitOpenError:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to optimize for ATS: {str(e)}"
-        ) 
\ No newline at end of file
+        )
+
+async def _ats_optimization(resume_data: Dict[str, Any], job_description: str,
+                            target_role: str, company: str) -> Dict[str, Any]:
+    """Tailoring analysis reduced to the ATS-specific fields"""
+    # Focus on ATS optimization
+    result = await ai_service.tailor_resume_for_job(
+        resume_data=resume_data,
+        job_description=job_description,
+        target_role=target_role,
+        company=company
+    )
+    
+    # Extract ATS-specific improvements
+    return {
+        "keywords": result.get("keywords", []),
+        "ats_improvements": result.get("ats_improvements", []),
+        "score_improvement": result.get("score_improvement", 0),
+        "formatting_suggestions": [
+            "Use standard section headers",
+            "Include relevant keywords naturally",
+            "Use bullet points for achievements",
+            "Avoid graphics and complex formatting"
+        ]
+    }
@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, Form
 from typing import Dict, Any, List, Optional
+import asyncio
 import logging
 import requests
 from bs4 import BeautifulSoup
@@ -8,15 +9,19 @@ from urllib.parse import urlparse
 
 from app.services.auth import get_current_user
 from app.core.database import get_db
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from app.models.user import User
 from app.models.job import JobDescription, JobDescriptionCreate
 from app.services.ai_service import AIService
+from app.services.ai_resilience import CircuitOpenError
+from app.services.job_posting_service import JobPostingService
+from app.services.tailor_prefetch import tailor_prefetcher
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/jobs", tags=["jobs"])
 
 ai_service = AIService()
+job_posting_service = JobPostingService()
 
 @router.post("/analyze")
 async def analyze_job(
@@ -29,8 +34,14 @@ async def analyze_job(
 ):
     """Analyze job description from URL or pasted text"""
     try:
+        # A known posting URL skips the scrape; a stored analysis also skips the LLM call
+        posting = job_posting_service.find_by_url(db, job_url) if job_url else None
+        scraped_description = None
+        if posting is not None:
+            final_description = posting.description_text
+            logger.info(f"Job posting {posting.id} already known for {job_url}")
         # Get job description from URL or use provided text
-        if job_url:
+        elif job_url:
             scraped_description = await scrape_job_description(job_url)
             if scraped_description:
                 final_description = scraped_description
@@ -52,19 +63,29 @@ async def analyze_job(
                 )
             final_description = job_description
         
-        # Use AI to analyze the job description
-        analysis_result = await ai_service.analyze_job_description(
-            job_description=final_description,
-            company=company,
-            role=role
-        )
+        if posting is None:
+            posting = job_posting_service.get_or_create(db, final_description, job_url)
+        
+        # The analysis prompt names the company and role, so a stored analysis is only reused for the same ones
+        analysis_result = job_posting_service.analysis_for(posting, company, role)
+        reused_analysis = analysis_result is not None
+        if reused_analysis:
+            job_posting_service.record_reuse(db, posting)
+        else:
+            # Use AI to analyze the job description
+            analysis_result = await ai_service.analyze_job_description(
+                job_description=final_description,
+                company=company,
+                role=role
+            )
+            job_posting_service.save_analysis(db, posting, analysis_result, company, role)
         
-        # Store job description in database
+        # Store the user's job, pointing at the shared posting for its text
         job_data = JobDescriptionCreate(
             user_id=current_user.id,
             company_name=company,
             job_title=role,
-            description_text=final_description,
+            posting_id=posting.id,
             requirements_extracted=str(analysis_result.get('requirements', [])),
             job_url=job_url,
             keywords=str(analysis_result.get('keywords', [])),
@@ -79,16 +100,23 @@ async def analyze_job(
         
         logger.info(f"Job analysis completed successfully for user {current_user.id}")
         
+        # Tailoring is almost always the next click; start it while the user reads the analysis
+        await tailor_prefetcher.schedule(db, current_user.id, db_job)
+        
         return {
             "success": True,
             "message": "Job analyzed successfully",
             "job_id": db_job.id,
+            "posting_id": posting.id,
             "analysis": analysis_result,
+            "reused_analysis": reused_analysis,
             "scraped": bool(scraped_description if job_url else False)
         }
         
     except HTTPException:
         raise
+    except CircuitOpenError:
+        raise
     except Exception as error:
         logger.error(f"Job analysis failed: {error}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Job analysis failed: {str(error)}")
@@ -100,7 +128,9 @@ async def list_jobs(
 ):
     """Get user's analyzed jobs"""
     try:
-        jobs = db.query(JobDescription).filter(JobDescription.user_id == current_user.id).all()
+        jobs = db.query(JobDescription).options(joinedload(JobDescription.posting)).filter(
+            JobDescription.user_id == current_user.id
+        ).all()
         return {
             "success": True,
             "jobs": [
@@ -108,7 +138,7 @@ async def list_jobs(
                     "id": job.id,
                     "company_name": job.company_name,
                     "job_title": job.job_title,
-                    "description_text": job.description_text[:200] + "..." if len(job.description_text) > 200 else job.description_text,
+                    "description_text": job.description[:200] + "..." if len(job.description) > 200 else job.description,
                     "job_url": job.job_url,
                     "keywords": eval(job.keywords) if job.keywords else [],
                     "company_culture": job.company_culture,
@@ -144,7 +174,7 @@ async def get_job(
                 "id": job.id,
                 "company_name": job.company_name,
                 "job_title": job.job_title,
-                "description_text": job.description_text,
+                "description_text": job.description,
                 "requirements_extracted": job.requirements_extracted,
                 "job_url": job.job_url,
                 "keywords": eval(job.keywords) if job.keywords else [],
@@ -175,6 +205,8 @@ async def delete_job(
         if not job:
             raise HTTPException(status_code=404, detail="Job not found")
         
+        # Cancelled first, while the row can still be read for the prefetch's key
+        await tailor_prefetcher.cancel_for_job(current_user.id, job)
         db.delete(job)
         db.commit()
         
@@ -237,7 +269,8 @@ async def scrape_job_description(url: str) -> Optional[str]:
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
         
-        response = requests.get(url, headers=headers, timeout=10)
+        # requests is blocking; keep the event loop free while the page downloads
+        response = await asyncio.to_thread(requests.get, url, headers=headers, timeout=10)
         response.raise_for_status()
         
         soup = BeautifulSoup(response.content, 'html.parser')
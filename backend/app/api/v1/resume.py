@@ -1,45 +1,83 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import JSONResponse
 from typing import Dict, Any, List, Optional
 import logging
+import os
 from datetime import datetime
 
 from app.services.auth import get_current_user
-from app.core.database import get_db
+from app.core.database import get_db, get_session_local
 from sqlalchemy.orm import Session
 from app.models.user import User
 from app.models.resume import Resume, ResumeCreate, ResumeUpdate
 from app.services.resume_service import ResumeService
+from app.services.ai_service import AIService
+from app.services.ai_resilience import CircuitOpenError
+from app.services.ai_tasks import ai_task_queue, BackgroundOptions, task_accepted
+from app.services.upload_spool import MultipartUpload, UploadTooLarge, MalformedUpload
+from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/resume", tags=["resume"])
 
 resume_service = ResumeService()
+ai_service = AIService()
 
-@router.post("/upload")
+# The form is read by the route itself (see MultipartUpload), so its schema is declared here for the docs
+UPLOAD_FORM_SCHEMA = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {
+                        "file": {"type": "string", "format": "binary"},
+                        "template_id": {"type": "integer"}
+                    }
+                }
+            }
+        }
+    }
+}
+
+@router.post("/upload", openapi_extra=UPLOAD_FORM_SCHEMA)
 async def upload_resume(
-    file: UploadFile = File(...),
-    template_id: Optional[int] = Form(None),
+    request: Request,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Upload and process resume file"""
     try:
-        # Validate file type
-        allowed_types = ['.pdf', '.docx', '.doc', '.txt']
-        file_extension = os.path.splitext(file.filename)[1].lower()
-        
-        if file_extension not in allowed_types:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"File type not supported. Allowed types: {', '.join(allowed_types)}"
-            )
+        # Stream the file part to disk as it arrives, stopping as soon as it is too large
+        try:
+            form = await MultipartUpload.from_request(request, "file", settings.MAX_FILE_SIZE)
+        except UploadTooLarge as error:
+            raise HTTPException(status_code=413, detail=str(error))
+        except MalformedUpload as error:
+            raise HTTPException(status_code=400, detail=str(error))
+        upload, file_name = form.spool, form.filename
         
-        # Read file content
-        content = await file.read()
-        
-        # Use resume service to process the file
-        processing_result = await resume_service.process_resume_upload(content, file.filename, current_user.id)
+        with upload:
+            # Validate file type
+            allowed_types = ['.pdf', '.docx', '.doc', '.txt']
+            file_extension = os.path.splitext(file_name)[1].lower()
+            
+            if file_extension not in allowed_types:
+                raise HTTPException(
+                    status_code=400, 
+                    detail=f"File type not supported. Allowed types: {', '.join(allowed_types)}"
+                )
+            if upload.size == 0:
+                raise HTTPException(status_code=400, detail="Uploaded file is empty")
+            try:
+                template_id = int(form.fields["template_id"]) if form.fields.get("template_id") else None
+            except ValueError:
+                raise HTTPException(status_code=422, detail="template_id must be an integer")
+            
+            # Use resume service to process the file
+            processing_result = await resume_service.process_resume_upload(upload, file_name, current_user.id, db)
         
         text_content = processing_result['text_content']
         parsed_data = processing_result['parsed_data']
@@ -51,10 +89,16 @@ async def upload_resume(
             parsed_content=parsed_data,
             template_id=template_id or 1,
             version_name=f"Uploaded {datetime.now().strftime('%Y-%m-%d %H:%M')}",
-            file_name=file.filename,
-            file_size=len(content)
+            file_name=file_name,
+            file_size=upload.size,
+            content_hash=processing_result['content_hash'],
+            # The latest upload is the user's main resume; tailoring prefetches start from it
+            is_primary=True
         )
         
+        db.query(Resume).filter(
+            Resume.user_id == current_user.id, Resume.is_primary.is_(True)
+        ).update({Resume.is_primary: False}, synchronize_session=False)
         db_resume = Resume(**resume_data.dict())
         db.add(db_resume)
         db.commit()
@@ -67,9 +111,12 @@ async def upload_resume(
             "message": "Resume uploaded and processed successfully",
             "resume_id": db_resume.id,
             "parsed_data": parsed_data,
-            "file_name": file.filename
+            "file_name": file_name,
+            "reused_from": processing_result['reused_from']
         }
         
+    except HTTPException:
+        raise
     except Exception as error:
         logger.error(f"Resume upload failed: {error}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Resume upload failed: {str(error)}")
@@ -143,55 +190,93 @@ async def tailor_resume(
     target_role: str,
     company: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    options: BackgroundOptions = Depends()
 ):
     """Tailor resume for specific job"""
     try:
-        # Get resume
-        resume = db.query(Resume).filter(
-            Resume.id == resume_id,
-            Resume.user_id == current_user.id
-        ).first()
-        
-        if not resume:
-            raise HTTPException(status_code=404, detail="Resume not found")
-        
-        # Use AI service to tailor resume
-        tailored_result = await ai_service.tailor_resume_for_job(
-            resume_data=resume.parsed_content,
-            job_description=job_description,
-            target_role=target_role,
-            company=company
-        )
-        
-        # Create new tailored version
-        tailored_resume = ResumeCreate(
-            user_id=current_user.id,
-            original_content=resume.original_content,
-            parsed_content=tailored_result,
-            template_id=resume.template_id,
-            version_name=f"Tailored for {company} - {target_role}",
-            parent_resume_id=resume.id
-        )
-        
-        db_tailored = Resume(**tailored_resume.dict())
-        db.add(db_tailored)
-        db.commit()
-        db.refresh(db_tailored)
-        
-        logger.info(f"Resume tailored successfully for user {current_user.id}")
+        if options.background:
+            # Fail fast on a bad id instead of queueing a task that can only fail
+            _get_user_resume(db, resume_id, current_user.id)
+            task = await ai_task_queue.submit(current_user.id, "resume_tailor", {
+                "resume_id": resume_id,
+                "job_description": job_description,
+                "target_role": target_role,
+                "company": company
+            }, options.idempotency_key)
+            return task_accepted(task)
         
+        result = await _tailor_resume(db, current_user.id, resume_id, job_description, target_role, company)
         return {
             "success": True,
             "message": "Resume tailored successfully",
-            "tailored_resume_id": db_tailored.id,
-            "tailored_result": tailored_result
+            **result
         }
         
+    except HTTPException:
+        raise
+    except CircuitOpenError:
+        raise
     except Exception as error:
         logger.error(f"Resume tailoring failed: {error}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Resume tailoring failed: {str(error)}")
 
+def _get_user_resume(db: Session, resume_id: int, user_id: int) -> Resume:
+    resume = db.query(Resume).filter(
+        Resume.id == resume_id,
+        Resume.user_id == user_id
+    ).first()
+    
+    if not resume:
+        raise HTTPException(status_code=404, detail="Resume not found")
+    return resume
+
+async def _tailor_resume(db: Session, user_id: int, resume_id: int, job_description: str,
+                         target_role: str, company: str) -> Dict[str, Any]:
+    """Tailor a resume and save the result as a new version of it"""
+    # Get resume
+    resume = _get_user_resume(db, resume_id, user_id)
+    
+    # Use AI service to tailor resume
+    tailored_result = await ai_service.tailor_resume_for_job(
+        resume_data=resume.parsed_content,
+        job_description=job_description,
+        target_role=target_role,
+        company=company
+    )
+    
+    # Create new tailored version
+    tailored_resume = ResumeCreate(
+        user_id=user_id,
+        original_content=resume.original_content,
+        parsed_content=tailored_result,
+        template_id=resume.template_id,
+        version_name=f"Tailored for {company} - {target_role}",
+        parent_resume_id=resume.id
+    )
+    
+    db_tailored = Resume(**tailored_resume.dict())
+    db.add(db_tailored)
+    db.commit()
+    db.refresh(db_tailored)
+    
+    logger.info(f"Resume tailored successfully for user {user_id}")
+    
+    return {
+        "tailored_resume_id": db_tailored.id,
+        "tailored_result": tailored_result
+    }
+
+async def _run_resume_tailor_task(user_id: int, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Background task handler for /{resume_id}/tailor?background=true"""
+    db = get_session_local()()
+    try:
+        return await _tailor_resume(db, user_id, **payload)
+    finally:
+        db.close()
+
+ai_task_queue.register("resume_tailor", _run_resume_tailor_task)
+
 @router.get("/templates")
 async def get_templates():
     """Get available resume templates"""
@@ -247,6 +332,15 @@ async def delete_resume(
         if not resume:
             raise HTTPException(status_code=404, detail="Resume not found")
         
+        if resume.is_primary:
+            # The user's previous upload takes over as their main resume
+            previous = db.query(Resume).filter(
+                Resume.user_id == current_user.id,
+                Resume.id != resume.id,
+                Resume.parent_resume_id.is_(None)
+            ).order_by(Resume.id.desc()).first()
+            if previous is not None:
+                previous.is_primary = True
         db.delete(resume)
         db.commit()
         
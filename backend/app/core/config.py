@@ -1,7 +1,10 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Dict
 import os
 
+# backend/, so default data files land in one place whatever directory the app is started from
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 class Settings(BaseSettings):
     # Database - Use SQLite for development, Supabase for production
     DATABASE_URL: str = "sqlite:///./hireflow.db"
@@ -21,9 +24,35 @@ class Settings(BaseSettings):
     
     # OpenAI Configuration
     OPENAI_API_KEY: str = ""
-    OPENAI_MODEL: str = "gpt-4"
+    OPENAI_MODEL: str = "gpt-4"  # strong model for long-form writing, and the fallback for fast tasks
     OPENAI_MAX_TOKENS: int = 2000
     OPENAI_TEMPERATURE: float = 0.7
+    AI_FAST_MODEL: str = "gpt-3.5-turbo"  # health probes, and the fallback for strong tasks
+    
+    # Extraction and classification run on AI_FAST_MODEL falling back to OPENAI_MODEL;
+    # every other task runs on OPENAI_MODEL falling back to AI_FAST_MODEL.
+    AI_FAST_MODEL_TASKS: List[str] = ["resume_parse", "job_analysis", "json_repair"]
+    # Per-task [primary, fallback, ...] overriding the routes above
+    AI_MODEL_ROUTES: Dict[str, List[str]] = {}
+    # Rolling p95 completion latency, in seconds, above which a model's tasks use their fallback
+    AI_STRONG_MODEL_LATENCY_SLO: float = 30.0
+    AI_FAST_MODEL_LATENCY_SLO: float = 10.0
+    AI_MODEL_LATENCY_SLOS: Dict[str, float] = {}  # per model name, overriding the two above
+    AI_MODEL_LATENCY_WINDOW: float = 300  # seconds of latency samples considered
+    AI_MODEL_LATENCY_MIN_SAMPLES: int = 10  # fewer recent samples than this never trigger a fallback
+    # Dollars per million tokens, for the estimated cost metric; models not listed are not costed
+    AI_MODEL_PRICES: Dict[str, Dict[str, float]] = {
+        "gpt-4": {"input": 30.0, "output": 60.0},
+        "gpt-3.5-turbo": {"input": 0.5, "output": 1.5}
+    }
+    
+    # LLM backend: "openai", or "fake" for offline load tests and benchmarks
+    AI_BACKEND: str = "openai"
+    AI_FAKE_LATENCY_MS: float = 800  # median time to first token
+    AI_FAKE_LATENCY_SIGMA: float = 0.5  # log-normal spread of time to first token
+    AI_FAKE_ERROR_RATE: float = 0.0  # fraction of requests that fail
+    AI_FAKE_TOKENS_PER_SECOND: float = 50
+    AI_FAKE_SEED: int = 0
     
     # Pinecone Configuration
     PINECONE_API_KEY: str = ""
@@ -32,11 +61,84 @@ class Settings(BaseSettings):
     # AI Service Configuration
     AI_SERVICE_ENABLED: bool = True
     AI_RATE_LIMIT: int = 100  # requests per hour per user
+    AI_RATE_LIMIT_ENABLED: bool = True
+    AI_RATE_LIMIT_BURST: int = 20  # requests a user may make back to back before the hourly rate applies
+    AI_RATE_LIMIT_BACKEND: str = "memory"  # "memory" (per worker) or "sqlite" (shared across workers)
+    AI_RATE_LIMIT_DB_PATH: str = "ai_rate_limit.db"
     AI_MAX_CONCURRENT_REQUESTS: int = 10
+    AI_BULK_MAX_PARALLEL: int = 5  # per-request fan-out limit for bulk endpoints
+    
+    # AI upstream resilience: retries on 429/5xx, circuit breaker, hedged requests
+    AI_RETRY_MAX_ATTEMPTS: int = 3  # total attempts per request, including the first
+    AI_RETRY_BASE_DELAY: float = 0.5  # seconds; backoff doubles per attempt with full jitter
+    AI_RETRY_MAX_DELAY: float = 8.0
+    AI_CIRCUIT_WINDOW: int = 20  # recent upstream calls the failure rate is measured over
+    AI_CIRCUIT_FAILURE_RATE: float = 0.5
+    AI_CIRCUIT_MIN_CALLS: int = 10  # don't open on a handful of calls
+    AI_CIRCUIT_OPEN_SECONDS: float = 30
+    AI_HEDGE_ENABLED: bool = False  # duplicate calls slower than the recent p95; costs extra tokens
+    AI_HEDGE_MIN_SAMPLES: int = 20
+    AI_HEDGE_MIN_DELAY: float = 1.0  # seconds; never hedge sooner than this
+    
+    # Background AI health probing; /ai/health serves the latest result
+    AI_HEALTH_PROBE_INTERVAL: float = 60  # seconds, 0 disables probing
+    AI_HEALTH_PROBE_TIMEOUT: float = 10
+    AI_HEALTH_FAILURE_THRESHOLD: int = 2  # consecutive failed probes before reporting unhealthy
+    
+    # Background AI tasks (?background=true on AI routes)
+    AI_TASKS_DB_PATH: str = os.path.join(BACKEND_DIR, "data", "ai_tasks.db")
+    AI_TASK_WORKERS: int = 4  # tasks running at once per process
+    AI_TASK_MAX_PENDING: int = 1000  # queued tasks before submissions get 503
+    AI_TASK_MAX_ATTEMPTS: int = 3  # runs per task when the upstream fails transiently or a worker dies
+    AI_TASK_RETRY_DELAY: float = 10  # seconds, multiplied by the attempt number
+    AI_TASK_TIMEOUT: float = 300  # seconds a single run may take
+    AI_TASK_RETENTION_HOURS: int = 24  # finished tasks are pruned after this
+    AI_TASK_LEASE_SECONDS: float = 60  # a running task whose worker stops renewing this long is requeued
+    AI_TASK_SWEEP_INTERVAL: float = 20  # seconds between lease renewals and expired-lease sweeps; keep well under the lease
+    # Tailor the primary resume in the background right after a job is analyzed; off unless enabled
+    AI_PREFETCH_TAILORING: bool = False
+    AI_PREFETCH_USER_DAILY_LIMIT: int = 10  # prefetches per user per 24 hours
+    AI_PREFETCH_HOURLY_LIMIT: int = 100  # prefetches per hour across all users
+    RESUME_PARSER_CONFIDENCE_THRESHOLD: float = 0.75  # local parses scoring below this go to the LLM; above 1 always uses it
+    AI_JSON_MODE: bool = False  # schema-validated JSON output; needs a model that supports response_format
+    
+    # AI Response Cache
+    AI_CACHE_ENABLED: bool = True
+    AI_CACHE_MAX_ENTRIES: int = 1000
+    AI_CACHE_DEFAULT_TTL: int = 3600  # seconds
+    AI_CACHE_TASK_TTLS: Dict[str, int] = {  # seconds, 0 disables caching for the task
+        "job_analysis": 24 * 3600,
+        "tailor_resume": 6 * 3600,
+        "ats_optimization": 6 * 3600,
+        "resume_parse": 7 * 24 * 3600,
+        "cover_letter": 0,
+        "career_guidance": 0
+    }
+    AI_CACHE_DB_PATH: str = ""  # e.g. "ai_cache.db" to keep cached responses across restarts
+    # Near-duplicate job descriptions reuse a stored analysis; compared by SimHash of the cleaned text
+    AI_SIMILARITY_CACHE_ENABLED: bool = True
+    AI_SIMILARITY_THRESHOLD: float = 0.95  # fraction of the 64 fingerprint bits that must match
+    AI_SIMILARITY_CACHE_MAX_ENTRIES: int = 2000
+    
+    # AI prompt size, in input tokens including the system prompt; context blocks are trimmed to fit
+    AI_PROMPT_DEFAULT_TOKEN_BUDGET: int = 6000  # leaves room for 2000 completion tokens in gpt-4's 8k window
+    AI_PROMPT_TOKEN_BUDGETS: Dict[str, int] = {  # 0 disables trimming for the task
+        "job_analysis": 3000,
+        "enhance_experience": 1500,
+        "career_guidance": 3000,
+        "resume_section": 2000,
+        "resume_parse": 5500
+    }
     
     # File Upload
     UPLOAD_DIR: str = "uploads"
     MAX_FILE_SIZE: int = 10 * 1024 * 1024  # 10MB
+    # PDF/DOCX text extraction runs in worker processes so parsing never blocks the event loop
+    DOCUMENT_EXTRACTION_WORKERS: int = 2  # 0 extracts in a thread instead
+    DOCUMENT_EXTRACTION_TIMEOUT: float = 20  # seconds per document, including time queued
+    DOCUMENT_EXTRACTION_MAX_TASKS_PER_WORKER: int = 100  # workers are replaced after this many documents
+    DOCUMENT_MAX_PAGES: int = 20  # longer PDFs are rejected
+    DOCUMENT_PDF_PAGES_PER_TASK: int = 4  # PDFs longer than this are split across workers
     ALLOWED_FILE_TYPES: List[str] = [".pdf", ".docx", ".txt"]
     
     # Environment
@@ -1,16 +1,44 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+import math
 import uvicorn
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
 # Import v1 API routes
 from app.api.v1 import ai, resume, jobs, applications
 from app.core.config import settings
+from app.services.ai_cache import ai_response_cache
+from app.services.ai_health import ai_health_prober
+from app.services.ai_resilience import CircuitOpenError
+from app.services.ai_tasks import ai_task_queue
+from app.services.document_extraction import document_extractor
+from app.services.upload_spool import UploadSizeLimitMiddleware, MULTIPART_OVERHEAD
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    ai_health_prober.start()
+    await ai_task_queue.start()
+    yield
+    await ai_task_queue.stop()
+    await ai_health_prober.stop()
+    await ai_response_cache.flush()
+    document_extractor.shutdown()
 
 app = FastAPI(
     title="HireFlow API",
     description="AI-powered career assistant for students and early-career professionals",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
+)
+
+# Oversized uploads are refused before their body is read; added first so CORS headers still apply
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    max_bytes=settings.MAX_FILE_SIZE + MULTIPART_OVERHEAD,
+    paths=["/api/v1/resume/upload"]
 )
 
 # CORS middleware
@@ -28,6 +56,16 @@ app.include_router(resume.router, prefix="/api/v1")
 app.include_router(jobs.router, prefix="/api/v1")
 app.include_router(applications.router, prefix="/api/v1")
 
+@app.exception_handler(CircuitOpenError)
+async def circuit_open_handler(request: Request, error: CircuitOpenError):
+    """AI upstream is being given time to recover; tell clients when to come back rather than reporting a 500"""
+    retry_after = max(1, math.ceil(error.retry_after))
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(error)},
+        headers={"Retry-After": str(retry_after)}
+    )
+
 @app.get("/")
 async def root():
     return {"message": "Welcome to HireFlow API"}
@@ -36,6 +74,11 @@ async def root():
 async def health_check():
     return {"status": "healthy", "message": "HireFlow API is running"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint"""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
 if __name__ == "__main__":
     uvicorn.run(
         "app.main:app",
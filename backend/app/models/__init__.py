@@ -1,11 +1,11 @@
 from sqlalchemy.orm import relationship
 from .user import User
 from .resume import Resume
-from .job import JobDescription
+from .job import JobPosting, JobDescription
 from .application import Application
 
 # Import all models to ensure they are registered with SQLAlchemy
-__all__ = ["User", "Resume", "JobDescription", "Application"]
+__all__ = ["User", "Resume", "JobPosting", "JobDescription", "Application"]
 
 # Update relationship back_populates after all models are imported
 User.resumes = relationship("Resume", back_populates="user")
@@ -11,7 +11,7 @@ class Application(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    job_id = Column(Integer, ForeignKey("jobs.id"), nullable=False)
+    job_id = Column(Integer, ForeignKey("job_descriptions.id"), nullable=False)
     resume_id = Column(Integer, ForeignKey("resumes.id"), nullable=False)
     
     # Application status
@@ -42,7 +42,7 @@ class Application(Base):
     
     # Relationships
     user = relationship("User", back_populates="applications")
-    job = relationship("Job", back_populates="applications")
+    job = relationship("JobDescription", back_populates="applications")
     resume = relationship("Resume", back_populates="applications")
     
     def __repr__(self):
@@ -6,16 +6,39 @@ from pydantic import BaseModel
 from typing import Optional, Dict, Any
 from datetime import datetime
 
+class JobPosting(Base):
+    """A posting's text and AI analysis, stored once and shared by every user who analyzes it"""
+    __tablename__ = "job_postings"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    normalized_url = Column(String(500), unique=True, index=True)  # None for pasted descriptions
+    content_hash = Column(String(64), unique=True, index=True, nullable=False)  # sha256 of the whitespace-normalized text
+    description_text = Column(Text, nullable=False)
+    analysis = Column(JSON)  # AI analysis, run once per posting
+    analysis_inputs = Column(String(500))  # normalized company and role the analysis prompt was given
+    times_reused = Column(Integer, default=0, nullable=False)  # analyses answered from this row
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    
+    # Relationships
+    job_descriptions = relationship("JobDescription", back_populates="posting")
+    
+    def __repr__(self):
+        return f"<JobPosting(id={self.id}, normalized_url='{self.normalized_url}')>"
+
+
 class JobDescription(Base):
     __tablename__ = "job_descriptions"
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    posting_id = Column(Integer, ForeignKey("job_postings.id"), index=True)
     company_name = Column(String(255), nullable=False)
     job_title = Column(String(255), nullable=False)
     
-    # Job details
-    description_text = Column(Text, nullable=False)
+    # Job details; the text lives on the posting when there is one
+    description_text = Column(Text)
     requirements_extracted = Column(Text)
     job_url = Column(String(500))
     
@@ -29,8 +52,16 @@ class JobDescription(Base):
     
     # Relationships
     user = relationship("User", back_populates="job_descriptions")
+    posting = relationship("JobPosting", back_populates="job_descriptions")
     applications = relationship("Application", back_populates="job")
     
+    @property
+    def description(self) -> str:
+        """Full description text, from the shared posting when this job has one"""
+        if self.posting is not None:
+            return self.posting.description_text
+        return self.description_text or ""
+    
     def __repr__(self):
         return f"<JobDescription(id={self.id}, job_title='{self.job_title}', company_name='{self.company_name}')>"
 
@@ -40,12 +71,13 @@ class JobDescriptionCreate(BaseModel):
     user_id: int
     company_name: str
     job_title: str
-    description_text: str
+    posting_id: Optional[int] = None
+    description_text: Optional[str] = None
     requirements_extracted: Optional[str] = None
     job_url: Optional[str] = None
-    keywords: Optional[Dict[str, Any]] = None
+    keywords: Optional[str] = None  # repr of the extracted list, as the jobs routes store and read it
     company_culture: Optional[str] = None
-    skills_to_highlight: Optional[Dict[str, Any]] = None
+    skills_to_highlight: Optional[str] = None
 
 class JobDescriptionUpdate(BaseModel):
     description_text: Optional[str] = None
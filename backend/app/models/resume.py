@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, JSON, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, JSON, Boolean, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
@@ -17,6 +17,7 @@ class Resume(Base):
     version_name = Column(String(255))
     file_name = Column(String(255))
     file_size = Column(Integer)  # in bytes
+    content_hash = Column(String(64))  # SHA-256 of the uploaded file; unset on tailored versions
     parent_resume_id = Column(Integer, ForeignKey("resumes.id"), nullable=True)
     
     # AI processing fields
@@ -34,6 +35,11 @@ class Resume(Base):
     user = relationship("User", back_populates="resumes")
     applications = relationship("Application", back_populates="resume")
     
+    __table_args__ = (
+        # Repeat uploads are matched against the same user's earlier ones
+        Index("ix_resumes_user_id_content_hash", "user_id", "content_hash"),
+    )
+    
     def __repr__(self):
         return f"<Resume(id={self.id}, version_name='{self.version_name}', user_id={self.user_id})>"
 
@@ -47,7 +53,9 @@ class ResumeCreate(BaseModel):
     version_name: str
     file_name: Optional[str] = None
     file_size: Optional[int] = None
+    content_hash: Optional[str] = None
     parent_resume_id: Optional[int] = None
+    is_primary: bool = False
 
 class ResumeUpdate(BaseModel):
     parsed_content: Optional[Dict[str, Any]] = None
@@ -0,0 +1,98 @@
+from pydantic import BaseModel, Field, AfterValidator
+from typing import List, Optional, Annotated
+
+# Output schemas for AIService tasks in JSON mode. Field names match the
+# dictionaries the text-mode scanners produce so routes see the same shape.
+
+# Clamp instead of rejecting so an out-of-range estimate never costs a repair call
+ScoreImprovement = Annotated[int, AfterValidator(lambda value: max(0, min(10, value)))]
+
+class TailorResumeOutput(BaseModel):
+    tailored_resume: str = Field(description="Tailoring analysis and concrete rewrite suggestions")
+    keywords: List[str] = Field(description="Keywords from the job to include")
+    ats_improvements: List[str] = Field(description="Specific ATS improvement suggestions")
+    cover_letter_suggestions: str = Field(description="Points worth raising in a cover letter")
+    score_improvement: ScoreImprovement = Field(description="Estimated ATS score improvement, 0-10 points")
+
+class CoverLetterOutput(BaseModel):
+    cover_letter: str = Field(description="The complete cover letter")
+    key_talking_points: List[str] = Field(description="Up to five key talking points")
+
+class ExperienceEnhancementOutput(BaseModel):
+    enhanced_description: str = Field(description="The enhanced experience description")
+    improvements: List[str] = Field(description="Specific improvements made")
+    suggested_metrics: List[str] = Field(description="Metrics the user could add")
+    ats_notes: str = Field(description="Notes on ATS keywords and industry language")
+
+class JobAnalysisOutput(BaseModel):
+    requirements: List[str] = Field(description="Required and preferred qualifications")
+    keywords: List[str] = Field(description="Key skills and technologies, lowercase")
+    company_culture: str = Field(description="Company culture insights")
+    skills_to_highlight: List[str] = Field(description="Skills the applicant should emphasize")
+    salary_insights: str = Field(description="Salary range indicators")
+    growth_opportunities: List[str] = Field(description="Growth opportunities in the role")
+
+class CareerGuidanceOutput(BaseModel):
+    career_plan: str = Field(description="The full career development plan")
+    learning_recommendations: List[str]
+    networking_strategies: List[str]
+    project_suggestions: List[str]
+    timeline: str
+    challenge_solutions: List[str]
+
+class AtsOptimizationOutput(BaseModel):
+    ats_optimization: str = Field(description="ATS optimization analysis")
+    format_recommendations: List[str]
+    score_improvement: ScoreImprovement = Field(description="Estimated ATS score improvement, 0-10 points")
+
+class PersonalInfo(BaseModel):
+    name: Optional[str] = None
+    email: Optional[str] = None
+    phone: Optional[str] = None
+    location: Optional[str] = None
+    linkedin: Optional[str] = None
+    github: Optional[str] = None
+
+class EducationEntry(BaseModel):
+    school: str
+    degree: str = ""
+    gpa: str = ""
+    graduation_date: str = ""
+    relevant: str = Field("", description="Relevant coursework")
+
+class ExperienceEntry(BaseModel):
+    position: str
+    company: str = ""
+    duration: str = ""
+    location: str = ""
+    description: str = ""
+
+class SkillEntry(BaseModel):
+    name: str
+    level: str = "Intermediate"
+    category: str = Field("Technical", description="Technical, Soft, Tool or Language")
+
+class ProjectEntry(BaseModel):
+    name: str
+    description: str = ""
+    technologies: List[str] = []
+    outcomes: str = ""
+
+class ActivityEntry(BaseModel):
+    organization: str
+    role: str = ""
+    achievements: str = ""
+
+class AwardEntry(BaseModel):
+    title: str
+    issuer: str = ""
+    date: str = ""
+
+class ResumeParseOutput(BaseModel):
+    personal: PersonalInfo
+    education: List[EducationEntry]
+    experience: List[ExperienceEntry]
+    skills: List[SkillEntry]
+    projects: List[ProjectEntry]
+    activities: List[ActivityEntry]
+    awards: List[AwardEntry]
@@ -0,0 +1,188 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Set, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class ResponseCache:
+    """Content-addressed cache of LLM completions with an LRU memory tier and optional SQLite tier.
+
+    The SQLite tier never runs on the event loop: memory misses read it in a
+    thread, and stores are written back in the background after the memory
+    tier already has them.
+    """
+
+    def __init__(self, max_entries: int, default_ttl: int, task_ttls: Dict[str, int],
+                 db_path: str = "", enabled: bool = True):
+        self.enabled = enabled
+        self.max_entries = max(1, max_entries)
+        self.default_ttl = default_ttl
+        self.task_ttls = dict(task_ttls)
+        self._memory: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._pending_writes: Set[asyncio.Task] = set()
+        self.db_path = db_path
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        if enabled and db_path:
+            self._open_db(db_path)
+
+    def _open_db(self, db_path: str) -> None:
+        """Open the persistent tier, dropping it silently if the file cannot be used"""
+        try:
+            directory = os.path.dirname(db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS ai_response_cache ("
+                "key TEXT PRIMARY KEY, task TEXT, response TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.execute("DELETE FROM ai_response_cache WHERE expires_at <= ?", (time.time(),))
+            self._db.commit()
+        except sqlite3.Error as error:
+            logger.error(f"AI cache disk tier disabled, could not open {db_path}: {error}")
+            self._db = None
+
+    @staticmethod
+    def make_key(model: str, temperature: float, system_prompt: str, prompt: str) -> str:
+        """Hash everything that determines the completion"""
+        payload = json.dumps([model, temperature, system_prompt, prompt], ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def ttl_for(self, task: str) -> int:
+        """TTL in seconds for a task; 0 disables caching for it"""
+        return self.task_ttls.get(task, self.default_ttl)
+
+    async def get(self, key: str) -> Optional[str]:
+        """Return a cached completion, promoting disk hits into memory"""
+        if not self.enabled:
+            return None
+
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return value
+                del self._memory[key]
+                self.expirations += 1
+
+        if self._db is not None:
+            row = await asyncio.to_thread(self._read_disk, key)
+            if row is not None:
+                value, expires_at = row
+                with self._lock:
+                    if expires_at > now:
+                        self._store_memory(key, value, expires_at)
+                        self.disk_hits += 1
+                        return value
+                    self.expirations += 1
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key: str, value: str, task: str) -> None:
+        """Store a completion under the TTL configured for its task; the disk copy is written in the background"""
+        ttl = self.ttl_for(task)
+        if not self.enabled or ttl <= 0 or not value:
+            return
+
+        expires_at = time.time() + ttl
+        with self._lock:
+            self._store_memory(key, value, expires_at)
+            self.stores += 1
+        if self._db is not None:
+            write = asyncio.ensure_future(asyncio.to_thread(self._write_disk, key, task, value, expires_at))
+            self._pending_writes.add(write)
+            write.add_done_callback(self._pending_writes.discard)
+
+    def _read_disk(self, key: str) -> Optional[Tuple[str, float]]:
+        with self._db_lock:
+            try:
+                return self._db.execute(
+                    "SELECT response, expires_at FROM ai_response_cache WHERE key = ?", (key,)
+                ).fetchone()
+            except sqlite3.Error as error:
+                logger.warning(f"AI cache disk read failed: {error}")
+                return None
+
+    def _write_disk(self, key: str, task: str, value: str, expires_at: float) -> None:
+        with self._db_lock:
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO ai_response_cache (key, task, response, expires_at) VALUES (?, ?, ?, ?)",
+                    (key, task, value, expires_at)
+                )
+                self._db.commit()
+            except sqlite3.Error as error:
+                logger.warning(f"AI cache disk write failed: {error}")
+
+    async def flush(self) -> None:
+        """Wait for background disk writes; called at shutdown so stored completions are not lost"""
+        if self._pending_writes:
+            await asyncio.gather(*self._pending_writes, return_exceptions=True)
+
+    def _store_memory(self, key: str, value: str, expires_at: float) -> None:
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every cached completion from both tiers"""
+        with self._lock:
+            self._memory.clear()
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM ai_response_cache")
+                self._db.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and tier sizes"""
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        return {
+            'enabled': self.enabled,
+            'disk_tier': self._db is not None,
+            'entries': len(self._memory),
+            'max_entries': self.max_entries,
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': round(hits / lookups, 3) if lookups else 0.0,
+            'stores': self.stores,
+            'evictions': self.evictions,
+            'expirations': self.expirations
+        }
+
+# Shared by every AIService instance in this process
+ai_response_cache = ResponseCache(
+    max_entries=settings.AI_CACHE_MAX_ENTRIES,
+    default_ttl=settings.AI_CACHE_DEFAULT_TTL,
+    task_ttls=settings.AI_CACHE_TASK_TTLS,
+    db_path=settings.AI_CACHE_DB_PATH,
+    enabled=settings.AI_CACHE_ENABLED
+)
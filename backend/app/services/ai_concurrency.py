@@ -0,0 +1,66 @@
+import asyncio
+import time
+import logging
+from contextlib import asynccontextmanager
+from typing import Dict, Any
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class ConcurrencyGate:
+    """Process-wide cap on in-flight upstream AI requests with queue-wait metrics"""
+
+    def __init__(self, limit: int):
+        self.limit = max(1, limit)
+        self._semaphore = asyncio.Semaphore(self.limit)
+        self.in_flight = 0
+        self.waiting = 0
+        self.max_waiting = 0
+        self.total_acquired = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one upstream slot for the duration of the block"""
+        queued_at = time.perf_counter()
+        if self._semaphore.locked():
+            self.waiting += 1
+            self.max_waiting = max(self.max_waiting, self.waiting)
+            try:
+                await self._semaphore.acquire()
+            finally:
+                self.waiting -= 1
+        else:
+            await self._semaphore.acquire()
+
+        wait_seconds = time.perf_counter() - queued_at
+        self.total_acquired += 1
+        self.total_wait_seconds += wait_seconds
+        self.max_wait_seconds = max(self.max_wait_seconds, wait_seconds)
+        if wait_seconds > 1.0:
+            logger.warning(f"AI request waited {wait_seconds:.2f}s for a concurrency slot")
+
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Snapshot of gate utilisation and queue-wait times"""
+        avg_wait = self.total_wait_seconds / self.total_acquired if self.total_acquired else 0.0
+        return {
+            'limit': self.limit,
+            'in_flight': self.in_flight,
+            'waiting': self.waiting,
+            'max_waiting': self.max_waiting,
+            'total_acquired': self.total_acquired,
+            'avg_wait_ms': round(avg_wait * 1000, 2),
+            'max_wait_ms': round(self.max_wait_seconds * 1000, 2)
+        }
+
+# Shared by every AIService instance in this process
+ai_request_gate = ConcurrencyGate(settings.AI_MAX_CONCURRENT_REQUESTS)
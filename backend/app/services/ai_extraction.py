@@ -0,0 +1,122 @@
+import re
+from bisect import bisect_left
+from itertools import accumulate
+from typing import Dict, Any, List, NamedTuple, Optional, Tuple, Union
+
+class LineMatches(NamedTuple):
+    """Every stripped line containing one of the keywords"""
+    keywords: Tuple[str, ...]
+    limit: Optional[int] = None
+
+class FirstSection(NamedTuple):
+    """The first line containing one of the keywords plus the lines after it"""
+    keywords: Tuple[str, ...]
+    span: int
+    default: str
+
+class BulletPoints(NamedTuple):
+    """Stripped lines starting with a list marker"""
+    prefixes: Tuple[str, ...]
+    limit: Optional[int] = None
+
+class Vocabulary(NamedTuple):
+    """Known words appearing as whitespace-separated tokens, in vocabulary order"""
+    words: Tuple[str, ...]
+
+class ScoreEstimate(NamedTuple):
+    """First integer captured by the pattern, capped, with a fallback"""
+    pattern: str
+    cap: int
+    default: int
+
+def _contains_token(text: str, word: str) -> bool:
+    """True if `word` appears as a whole whitespace-delimited token"""
+    end_of_text = len(text)
+    position = text.find(word)
+    while position != -1:
+        end = position + len(word)
+        if (position == 0 or text[position - 1].isspace()) and (end == end_of_text or text[end].isspace()):
+            return True
+        position = text.find(word, position + 1)
+    return False
+
+FieldSpec = Union[LineMatches, FirstSection, BulletPoints, Vocabulary, ScoreEstimate]
+
+class ResponseScanner:
+    """Fills every field of an AI response from a single split and lowercase of the text.
+
+    Each distinct keyword is located with C-level substring search over the
+    whole lowered response and mapped to its line, so Python-level work grows
+    with the number of matching lines rather than lines times fields.
+    """
+
+    def __init__(self, fields: Dict[str, FieldSpec]):
+        self.fields = fields
+        self._line_fields = [(name, spec) for name, spec in fields.items() if isinstance(spec, LineMatches)]
+        self._section_fields = [(name, spec) for name, spec in fields.items() if isinstance(spec, FirstSection)]
+        self._bullet_fields = [
+            (name, re.compile(r'^[^\S\n]*(?:' + '|'.join(re.escape(p) for p in spec.prefixes) + r').*$', re.M), spec)
+            for name, spec in fields.items() if isinstance(spec, BulletPoints)
+        ]
+        self._vocabulary_fields = [(name, spec) for name, spec in fields.items() if isinstance(spec, Vocabulary)]
+        self._score_fields = [
+            (name, re.compile(spec.pattern), spec) for name, spec in fields.items() if isinstance(spec, ScoreEstimate)
+        ]
+        self._keywords = sorted({
+            keyword for _, spec in self._line_fields + self._section_fields for keyword in spec.keywords
+        })
+
+    def _keyword_lines(self, lowered: str, line_ends: List[int]) -> Dict[str, List[int]]:
+        """Indexes of the lines containing each keyword"""
+        found: Dict[str, List[int]] = {}
+        last_line = len(line_ends) - 1
+        for keyword in self._keywords:
+            position = lowered.find(keyword)
+            if position == -1:
+                continue
+            indexes = found[keyword] = []
+            while position != -1:
+                index = bisect_left(line_ends, position)
+                indexes.append(index)
+                if index == last_line:
+                    break
+                # Skip the rest of this line; one hit per line is enough
+                position = lowered.find(keyword, line_ends[index] + 1)
+        return found
+
+    def scan(self, text: str) -> Dict[str, Any]:
+        """Extract every configured field from the response"""
+        lines = text.split('\n')
+        lowered = text.lower()
+        # lower() only ever lengthens text, so equal lengths mean the line offsets line up
+        lowered_lines = lines if len(lowered) == len(text) else lowered.split('\n')
+        line_ends = [end - 1 for end in accumulate(len(line) + 1 for line in lowered_lines)]
+        keyword_lines = self._keyword_lines(lowered, line_ends) if self._keywords else {}
+
+        result: Dict[str, Any] = {}
+        for name, spec in self._line_fields:
+            indexes = set()
+            for keyword in spec.keywords:
+                indexes.update(keyword_lines.get(keyword, ()))
+            values = [lines[index].strip() for index in sorted(indexes)]
+            result[name] = values[:spec.limit] if spec.limit else values
+        for name, spec in self._section_fields:
+            starts = [keyword_lines[keyword][0] for keyword in spec.keywords if keyword in keyword_lines]
+            if starts:
+                start = min(starts)
+                result[name] = '\n'.join(lines[start:start + spec.span])
+            else:
+                result[name] = spec.default
+        for name, pattern, spec in self._bullet_fields:
+            values = []
+            for match in pattern.finditer(text):
+                values.append(match.group(0).strip())
+                if spec.limit and len(values) >= spec.limit:
+                    break
+            result[name] = values
+        for name, spec in self._vocabulary_fields:
+            result[name] = [word for word in spec.words if _contains_token(lowered, word)]
+        for name, pattern, spec in self._score_fields:
+            match = pattern.search(lowered)
+            result[name] = min(spec.cap, int(match.group(1))) if match else spec.default
+        return {name: result[name] for name in self.fields}
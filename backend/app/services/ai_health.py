@@ -0,0 +1,117 @@
+import asyncio
+import time
+import logging
+from collections import deque
+from datetime import datetime, timezone
+from typing import Dict, Any, Awaitable, Callable, Optional
+
+from app.core.config import settings
+from app.services.ai_resilience import ai_resilience
+from app.services.llm_backends import llm_backend
+
+logger = logging.getLogger(__name__)
+
+class HealthProber:
+    """Probes the AI upstream on an interval and keeps the latest verdict ready to serve"""
+
+    def __init__(self, probe: Callable[[], Awaitable[bool]], interval: float, timeout: float,
+                 failure_threshold: int, window: int = 20):
+        self.probe = probe
+        self.interval = interval
+        self.timeout = timeout
+        self.failure_threshold = max(1, failure_threshold)
+        self._outcomes = deque(maxlen=window)
+        self._latencies = deque(maxlen=window)
+        self.consecutive_failures = 0
+        self.last_error: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+        self._snapshot: Dict[str, Any] = {
+            "status": "unknown",
+            "message": "AI upstream has not been probed yet",
+            "checked_at": None
+        }
+
+    async def probe_once(self) -> Dict[str, Any]:
+        """Run one probe and refresh the cached snapshot"""
+        started_at = time.perf_counter()
+        try:
+            working = await asyncio.wait_for(self.probe(), timeout=self.timeout)
+            error = None if working else "AI service response unexpected"
+        except asyncio.TimeoutError:
+            error = f"no response within {self.timeout:.0f}s"
+        except Exception as probe_error:
+            error = str(probe_error)
+        latency = time.perf_counter() - started_at
+
+        self._outcomes.append(error is None)
+        if error is None:
+            self._latencies.append(latency)
+            self.consecutive_failures = 0
+            # Without this a half-open circuit could only close on real traffic, which an unready instance never gets
+            ai_resilience.breaker.record_probe_success()
+        else:
+            self.consecutive_failures += 1
+            self.last_error = error
+            logger.warning(f"AI health probe failed ({self.consecutive_failures} in a row): {error}")
+
+        self._snapshot = self._build_snapshot(latency)
+        return self._snapshot
+
+    def _build_snapshot(self, latency: float) -> Dict[str, Any]:
+        failures = self._outcomes.count(False)
+        # One failed probe is noise; flip only after several in a row
+        healthy = self.consecutive_failures < self.failure_threshold
+        average_latency = sum(self._latencies) / len(self._latencies) if self._latencies else None
+        return {
+            "status": "healthy" if healthy else "unhealthy",
+            "message": "AI service is working properly" if healthy else f"AI service error: {self.last_error}",
+            "checked_at": datetime.now(timezone.utc).isoformat(),
+            "latency_ms": round(latency * 1000, 1),
+            "avg_latency_ms": round(average_latency * 1000, 1) if average_latency is not None else None,
+            "error_rate": round(failures / len(self._outcomes), 3),
+            "consecutive_failures": self.consecutive_failures,
+            "probes": len(self._outcomes)
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Latest probe result plus live circuit breaker state; never touches the upstream"""
+        circuit_state = ai_resilience.breaker.state
+        snapshot = dict(self._snapshot, circuit=circuit_state)
+        if circuit_state == "open":
+            # Real traffic is failing even if the last probe got through
+            snapshot["status"] = "unhealthy"
+            snapshot["message"] = "AI upstream circuit is open after repeated request failures"
+        elif circuit_state == "half_open":
+            # A trial call or the next successful probe closes it; the instance should stay in rotation meanwhile
+            snapshot["status"] = "degraded"
+            snapshot["message"] = "AI upstream circuit is half-open, waiting for a trial call or probe to succeed"
+        return snapshot
+
+    async def _run(self) -> None:
+        while True:
+            await self.probe_once()
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self.interval <= 0 or self._task is not None:
+            return
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"AI health prober started, probing every {self.interval:.0f}s")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+# Shared by every worker coroutine in this process; started from the app lifespan
+ai_health_prober = HealthProber(
+    probe=llm_backend.ping,
+    interval=settings.AI_HEALTH_PROBE_INTERVAL,
+    timeout=settings.AI_HEALTH_PROBE_TIMEOUT,
+    failure_threshold=settings.AI_HEALTH_FAILURE_THRESHOLD
+)
@@ -0,0 +1,67 @@
+import logging
+from typing import Dict
+
+from prometheus_client import Counter, Histogram
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Seconds; spans cache hits through long gpt-4 generations
+LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+AI_REQUEST_SECONDS = Histogram(
+    'hireflow_ai_request_duration_seconds',
+    'AIService call latency, including retries; cache is hit, miss, error, aborted (stream closed early) or the similarity/local_parser shortcut',
+    ['task', 'model', 'cache'],
+    buckets=LATENCY_BUCKETS
+)
+AI_UPSTREAM_SECONDS = Histogram(
+    'hireflow_ai_upstream_duration_seconds',
+    'Latency of one successful completion attempt against the LLM provider',
+    ['task', 'model'],
+    buckets=LATENCY_BUCKETS
+)
+AI_INPUT_TOKENS = Counter(
+    'hireflow_ai_input_tokens',
+    'Prompt tokens sent upstream; cached="true" were served from the provider prefix cache',
+    ['task', 'model', 'cached']
+)
+AI_OUTPUT_TOKENS = Counter(
+    'hireflow_ai_output_tokens',
+    'Completion tokens returned by the provider',
+    ['task', 'model']
+)
+AI_ERRORS = Counter(
+    'hireflow_ai_errors',
+    'AIService calls that failed, by exception type',
+    ['task', 'model', 'error']
+)
+AI_COST_DOLLARS = Counter(
+    'hireflow_ai_estimated_cost_dollars',
+    'Estimated provider spend from token usage and AI_MODEL_PRICES',
+    ['task', 'model']
+)
+AI_CALLS_SAVED = Counter(
+    'hireflow_ai_llm_calls_saved',
+    'AIService calls answered without the LLM by a cache or local parser in front of the task',
+    ['task', 'cache']
+)
+
+_unpriced_models = set()
+
+def estimate_cost(model: str, prompt_tokens: int, cached_tokens: int, completion_tokens: int) -> float:
+    """Dollar cost of one response at the configured per-million-token prices"""
+    prices: Dict[str, float] = settings.AI_MODEL_PRICES.get(model)
+    if prices is None:
+        if model not in _unpriced_models:
+            _unpriced_models.add(model)
+            logger.warning(f"No price configured for {model}; its cost is not estimated")
+        return 0.0
+    input_price = prices['input']
+    cached_price = prices.get('cached_input', input_price)
+    return (
+        (prompt_tokens - cached_tokens) * input_price
+        + cached_tokens * cached_price
+        + completion_tokens * prices['output']
+    ) / 1_000_000
@@ -0,0 +1,112 @@
+import time
+import logging
+from collections import deque
+from typing import Dict, Any, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class ModelRouter:
+    """Picks each task's model from a routing table, falling back while the primary is over its latency SLO.
+
+    Latency samples expire after `window_seconds`, so a model that was skipped
+    for being slow gets traffic back once its bad samples age out.
+    """
+
+    def __init__(self, routes: Dict[str, List[str]], default_models: List[str], slos: Dict[str, float],
+                 window_seconds: float, min_samples: int):
+        self.routes = routes
+        self.default_models = default_models
+        self.slos = slos
+        self.window_seconds = window_seconds
+        self.min_samples = max(1, min_samples)
+        self._samples: Dict[str, deque] = {}
+        self.fallbacks: Dict[str, int] = {}
+        self._breaching: Dict[str, bool] = {}
+
+    def candidates(self, task: str) -> List[str]:
+        """Models for the task in preference order"""
+        return self.routes.get(task) or self.default_models
+
+    def select(self, task: str) -> str:
+        models = self.candidates(task)
+        for model in models:
+            if not self.breaching(model):
+                return model
+        # Everything is slow; the primary is still the best choice
+        return models[0]
+
+    def record_sent(self, task: str, model: str) -> None:
+        """Count a completion actually sent upstream; cache hits and coalesced calls never get here"""
+        if model != self.candidates(task)[0]:
+            self.fallbacks[task] = self.fallbacks.get(task, 0) + 1
+
+    def record(self, model: str, seconds: float) -> None:
+        """Record how long one completion took on `model`"""
+        samples = self._samples.setdefault(model, deque(maxlen=500))
+        samples.append((time.monotonic(), seconds))
+
+    def p95(self, model: str) -> Optional[float]:
+        """Rolling p95 completion latency, or None without enough recent samples"""
+        samples = self._samples.get(model)
+        if not samples:
+            return None
+        cutoff = time.monotonic() - self.window_seconds
+        while samples and samples[0][0] < cutoff:
+            samples.popleft()
+        if len(samples) < self.min_samples:
+            return None
+        ordered = sorted(seconds for _, seconds in samples)
+        return ordered[max(0, int(len(ordered) * 0.95) - 1)]
+
+    def breaching(self, model: str) -> bool:
+        slo = self.slos.get(model)
+        latency = self.p95(model) if slo else None
+        breaching = latency is not None and latency > slo
+        if breaching != self._breaching.get(model, False):
+            self._breaching[model] = breaching
+            if breaching:
+                logger.warning(f"{model} p95 latency {latency:.1f}s is over its {slo:.1f}s SLO; using fallbacks")
+            else:
+                logger.info(f"{model} latency is back within its SLO")
+        return breaching
+
+    def get_stats(self) -> Dict[str, Any]:
+        models = {}
+        for model in sorted(set(self._samples) | set(self.slos)):
+            latency = self.p95(model)
+            models[model] = {
+                'p95_ms': round(latency * 1000, 1) if latency is not None else None,
+                'samples': len(self._samples.get(model, ())),
+                'slo_ms': round(self.slos[model] * 1000) if model in self.slos else None,
+                'breaching': self.breaching(model)
+            }
+        return {'models': models, 'fallbacks': dict(self.fallbacks)}
+
+def _preference(*models: str) -> List[str]:
+    # OPENAI_MODEL and AI_FAST_MODEL may be set to the same model
+    return list(dict.fromkeys(models))
+
+def _routes_from_settings() -> Dict[str, List[str]]:
+    routes = {
+        task: _preference(settings.AI_FAST_MODEL, settings.OPENAI_MODEL) for task in settings.AI_FAST_MODEL_TASKS
+    }
+    routes.update(settings.AI_MODEL_ROUTES)
+    return routes
+
+def _slos_from_settings() -> Dict[str, float]:
+    # The strong SLO wins when both settings name the same model
+    slos = {settings.AI_FAST_MODEL: settings.AI_FAST_MODEL_LATENCY_SLO}
+    slos[settings.OPENAI_MODEL] = settings.AI_STRONG_MODEL_LATENCY_SLO
+    slos.update(settings.AI_MODEL_LATENCY_SLOS)
+    return slos
+
+# Shared by every AIService instance in this process
+ai_model_router = ModelRouter(
+    routes=_routes_from_settings(),
+    default_models=_preference(settings.OPENAI_MODEL, settings.AI_FAST_MODEL),
+    slos=_slos_from_settings(),
+    window_seconds=settings.AI_MODEL_LATENCY_WINDOW,
+    min_samples=settings.AI_MODEL_LATENCY_MIN_SAMPLES
+)
@@ -0,0 +1,284 @@
+import asyncio
+import random
+import time
+import logging
+from collections import deque
+from typing import Dict, Any, AsyncIterator, Awaitable, Callable, Optional, TypeVar
+
+import openai
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+# Rate limiting, overload and server-side failures; anything else is the request's fault and is not retried
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+class CircuitOpenError(Exception):
+    """Raised without calling upstream while the circuit breaker is open"""
+
+    def __init__(self, message: str, retry_after: float = 0.0):
+        super().__init__(message)
+        self.retry_after = retry_after  # seconds until a trial call may go through
+
+def is_transient(error: Exception) -> bool:
+    """True for upstream failures that may succeed if retried"""
+    if isinstance(error, (openai.APIConnectionError, asyncio.TimeoutError)):
+        return True
+    return getattr(error, 'status_code', None) in RETRYABLE_STATUS_CODES
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Seconds the upstream asked us to wait, if it said"""
+    headers = getattr(getattr(error, 'response', None), 'headers', None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get('retry-after'))
+    except (TypeError, ValueError):
+        return None
+
+class CircuitBreaker:
+    """Opens when too many of the recent upstream calls failed, then lets a single trial call through"""
+
+    def __init__(self, window: int, failure_rate: float, min_calls: int, open_seconds: float):
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self._outcomes = deque(maxlen=max(1, window))
+        self._state = "closed"
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self.times_opened = 0
+        self.short_circuited = 0
+
+    @property
+    def state(self) -> str:
+        """"closed", "open", or "half_open" once the open period has run out"""
+        # Moved here rather than in before_call so readers such as the health check see it with no traffic
+        if self._state == "open" and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._state = "half_open"
+        return self._state
+
+    def before_call(self) -> bool:
+        """Raise CircuitOpenError unless a call may go upstream now; True if the call is the half-open trial"""
+        if self.state == "closed":
+            return False
+        if self.state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        self.short_circuited += 1
+        retry_in = max(0.0, self.open_seconds - (time.monotonic() - self._opened_at))
+        raise CircuitOpenError(
+            f"AI upstream circuit is open after repeated failures; retry in {retry_in:.0f}s", retry_after=retry_in
+        )
+
+    def record_success(self) -> None:
+        if self.state == "half_open":
+            logger.info("AI upstream circuit closed after a successful trial call")
+            self._close()
+        self._trial_in_flight = False
+        self._outcomes.append(True)
+
+    def record_probe_success(self) -> None:
+        """A health probe reached the upstream; once the open period is over it stands in for the trial call"""
+        if self.state == "half_open":
+            logger.info("AI upstream circuit closed after a successful health probe")
+            self._close()
+
+    def record_failure(self) -> None:
+        self._trial_in_flight = False
+        if self.state == "half_open":
+            self._open()
+            return
+        self._outcomes.append(False)
+        failures = self._outcomes.count(False)
+        if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.failure_rate:
+            self._open()
+
+    def release_trial(self) -> None:
+        """Forget a trial call that ended without an upstream verdict (cancelled, abandoned or rejected as invalid)"""
+        self._trial_in_flight = False
+
+    def _close(self) -> None:
+        self._state = "closed"
+        self._outcomes.clear()
+
+    def _open(self) -> None:
+        self._state = "open"
+        self._opened_at = time.monotonic()
+        self.times_opened += 1
+        logger.warning(f"AI upstream circuit opened; failing fast for {self.open_seconds:.0f}s")
+
+    def get_stats(self) -> Dict[str, Any]:
+        recent_failures = self._outcomes.count(False)
+        return {
+            'state': self.state,
+            'trial_in_flight': self._trial_in_flight,
+            'recent_calls': len(self._outcomes),
+            'recent_failure_rate': round(recent_failures / len(self._outcomes), 3) if self._outcomes else 0.0,
+            'times_opened': self.times_opened,
+            'short_circuited': self.short_circuited
+        }
+
+class ResilientCaller:
+    """Retries transient upstream failures with jittered backoff behind a circuit breaker, optionally hedging slow calls"""
+
+    def __init__(self, breaker: CircuitBreaker, max_attempts: int, base_delay: float, max_delay: float,
+                 hedge_enabled: bool = False, hedge_min_samples: int = 20, hedge_min_delay: float = 1.0):
+        self.breaker = breaker
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.hedge_enabled = hedge_enabled
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_min_delay = hedge_min_delay
+        self._latencies = deque(maxlen=200)
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self.hedges_launched = 0
+        self.hedges_won = 0
+
+    def backoff(self, attempt: int, error: Exception) -> float:
+        """Full-jitter exponential backoff, stretched to any Retry-After the upstream sent"""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_delay))
+        return delay
+
+    def hedge_delay(self) -> Optional[float]:
+        """Recent p95 latency, once there are enough samples to trust it"""
+        if not self.hedge_enabled or len(self._latencies) < self.hedge_min_samples:
+            return None
+        ordered = sorted(self._latencies)
+        return max(self.hedge_min_delay, ordered[int(len(ordered) * 0.95) - 1])
+
+    async def call(self, request: Callable[[], Awaitable[T]]) -> T:
+        """Run `request` until it succeeds, fails permanently or runs out of attempts"""
+        self.calls += 1
+        for attempt in range(self.max_attempts):
+            trial = self.breaker.before_call()
+            settled = False
+            started_at = time.perf_counter()
+            try:
+                result = await self._hedged(request)
+            except Exception as error:
+                if not is_transient(error):
+                    raise
+                settled = True
+                self.breaker.record_failure()
+                if attempt + 1 >= self.max_attempts:
+                    self.failures += 1
+                    raise
+                delay = self.backoff(attempt, error)
+                self.retries += 1
+                logger.warning(f"Transient AI upstream error ({error}); retry {attempt + 1} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                continue
+            else:
+                settled = True
+                self.breaker.record_success()
+                self._latencies.append(time.perf_counter() - started_at)
+                return result
+            finally:
+                # Cancelled, or failed for a reason that says nothing about the upstream
+                if trial and not settled:
+                    self.breaker.release_trial()
+
+    async def _hedged(self, request: Callable[[], Awaitable[T]]) -> T:
+        """Send a duplicate when the first call outlives the recent p95 and keep whichever succeeds first"""
+        delay = self.hedge_delay()
+        if delay is None:
+            return await request()
+
+        primary = asyncio.ensure_future(request())
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                return primary.result()
+
+            self.hedges_launched += 1
+            hedge = asyncio.ensure_future(request())
+            tasks.add(hedge)
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.hedges_won += 1
+                        return task.result()
+            # Both failed; surface the original call's error
+            return primary.result()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def stream(self, open_stream: Callable[[], AsyncIterator[str]]) -> AsyncIterator[str]:
+        """Relay a streamed completion, retrying only failures that happen before the first chunk"""
+        self.calls += 1
+        for attempt in range(self.max_attempts):
+            trial = self.breaker.before_call()
+            settled = False
+            started = False
+            try:
+                async for chunk in open_stream():
+                    started = True
+                    yield chunk
+            except Exception as error:
+                if not is_transient(error):
+                    raise
+                settled = True
+                self.breaker.record_failure()
+                if started or attempt + 1 >= self.max_attempts:
+                    self.failures += 1
+                    raise
+                delay = self.backoff(attempt, error)
+                self.retries += 1
+                logger.warning(f"Transient AI upstream error before streaming ({error}); retry in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                continue
+            else:
+                settled = True
+                self.breaker.record_success()
+                return
+            finally:
+                # Cancelled, closed early by a disconnected client (GeneratorExit), or rejected as invalid
+                if trial and not settled:
+                    self.breaker.release_trial()
+
+    def get_stats(self) -> Dict[str, Any]:
+        hedge_delay = self.hedge_delay()
+        return {
+            'calls': self.calls,
+            'retries': self.retries,
+            'failures': self.failures,
+            'circuit': self.breaker.get_stats(),
+            'hedging': {
+                'enabled': self.hedge_enabled,
+                'delay_ms': round(hedge_delay * 1000, 1) if hedge_delay is not None else None,
+                'launched': self.hedges_launched,
+                'won': self.hedges_won
+            }
+        }
+
+# Shared by every AIService instance in this process
+ai_resilience = ResilientCaller(
+    breaker=CircuitBreaker(
+        window=settings.AI_CIRCUIT_WINDOW,
+        failure_rate=settings.AI_CIRCUIT_FAILURE_RATE,
+        min_calls=settings.AI_CIRCUIT_MIN_CALLS,
+        open_seconds=settings.AI_CIRCUIT_OPEN_SECONDS
+    ),
+    max_attempts=settings.AI_RETRY_MAX_ATTEMPTS,
+    base_delay=settings.AI_RETRY_BASE_DELAY,
+    max_delay=settings.AI_RETRY_MAX_DELAY,
+    hedge_enabled=settings.AI_HEDGE_ENABLED,
+    hedge_min_samples=settings.AI_HEDGE_MIN_SAMPLES,
+    hedge_min_delay=settings.AI_HEDGE_MIN_DELAY
+)
@@ -1,73 +1,310 @@
-import os
-import openai
+import json
+import time
 import logging
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple, Callable, AsyncIterator, Type
+from pydantic import BaseModel, ValidationError
 from app.core.config import settings
+from app.services.ai_concurrency import ai_request_gate
+from app.services.ai_cache import ai_response_cache
+from app.services.ai_similarity_cache import job_analysis_cache
+from app.services.ai_singleflight import ai_singleflight
+from app.services.ai_resilience import ai_resilience, CircuitOpenError
+from app.services.ai_health import ai_health_prober
+from app.services.ai_model_router import ai_model_router
+from app.services.ai_usage import ai_token_usage
+from app.services.ai_metrics import AI_REQUEST_SECONDS, AI_UPSTREAM_SECONDS, AI_ERRORS
+from app.services.prompt_builder import prompt_builder
+from app.services.prompt_templates import render_prompts
+from app.services.llm_backends import LLMBackend, llm_backend
+from app.services.ai_extraction import (
+    ResponseScanner, LineMatches, FirstSection, BulletPoints, Vocabulary, ScoreEstimate
+)
+from app.schemas.ai_output import (
+    TailorResumeOutput, CoverLetterOutput, ExperienceEnhancementOutput, JobAnalysisOutput,
+    CareerGuidanceOutput, AtsOptimizationOutput
+)
 
 logger = logging.getLogger(__name__)
 
+TECH_KEYWORDS = ('python', 'javascript', 'react', 'node.js', 'aws', 'docker', 'sql', 'git')
+SCORE_IMPROVEMENT = ScoreEstimate(r'(\d+)\s*(?:point|score)', cap=10, default=5)
+
+# One scanner per task; each walks a response once to fill every structured field
+TAILOR_SCANNER = ResponseScanner({
+    'keywords': Vocabulary(TECH_KEYWORDS),
+    'ats_improvements': LineMatches(('improve', 'add', 'include', 'optimize')),
+    'cover_letter_suggestions': FirstSection(('cover letter',), 5, "Cover letter suggestions not found in response"),
+    'score_improvement': SCORE_IMPROVEMENT
+})
+COVER_LETTER_SCANNER = ResponseScanner({
+    'key_talking_points': BulletPoints(('-', '•', '*', '1.', '2.', '3.'), limit=5)
+})
+EXPERIENCE_SCANNER = ResponseScanner({
+    'improvements': LineMatches(('improve', 'enhance', 'add', 'include')),
+    'suggested_metrics': LineMatches(('%', 'percent', 'increase', 'decrease', 'users', 'revenue')),
+    'ats_notes': FirstSection(('ats',), 3, "ATS optimization notes not found")
+})
+JOB_ANALYSIS_SCANNER = ResponseScanner({
+    'requirements': LineMatches(('required', 'requirement', 'qualification', 'must have')),
+    'keywords': Vocabulary(TECH_KEYWORDS),
+    'company_culture': FirstSection(('culture', 'environment', 'atmosphere', 'values'), 3,
+                                    "Company culture insights not found"),
+    'skills_to_highlight': LineMatches(('skill', 'technology', 'tool', 'framework')),
+    'salary_insights': FirstSection(('salary', 'compensation', 'pay', 'benefits'), 3, "Salary insights not found"),
+    'growth_opportunities': LineMatches(('growth', 'advancement', 'career path', 'opportunity'))
+})
+CAREER_GUIDANCE_SCANNER = ResponseScanner({
+    'learning_recommendations': LineMatches(('learn', 'study', 'course', 'certification')),
+    'networking_strategies': LineMatches(('network', 'connect', 'meet', 'conference')),
+    'project_suggestions': LineMatches(('project', 'build', 'create', 'develop')),
+    'timeline': FirstSection(('timeline', 'schedule', 'plan', 'goal'), 3, "Timeline information not found"),
+    'challenge_solutions': LineMatches(('solution', 'solve', 'overcome', 'address'))
+})
+ATS_SCANNER = ResponseScanner({
+    'format_recommendations': LineMatches(('format', 'structure', 'layout', 'design')),
+    'score_improvement': SCORE_IMPROVEMENT
+})
+
+# task -> (text-mode scanner, JSON-mode schema, field holding the full completion in text mode)
+TASK_OUTPUTS: Dict[str, Tuple[ResponseScanner, Type[BaseModel], Optional[str]]] = {
+    'tailor_resume': (TAILOR_SCANNER, TailorResumeOutput, 'tailored_resume'),
+    'cover_letter': (COVER_LETTER_SCANNER, CoverLetterOutput, 'cover_letter'),
+    'enhance_experience': (EXPERIENCE_SCANNER, ExperienceEnhancementOutput, 'enhanced_description'),
+    'job_analysis': (JOB_ANALYSIS_SCANNER, JobAnalysisOutput, None),
+    'career_guidance': (CAREER_GUIDANCE_SCANNER, CareerGuidanceOutput, 'career_plan'),
+    'ats_optimization': (ATS_SCANNER, AtsOptimizationOutput, 'ats_optimization')
+}
+
+JSON_OUTPUT_INSTRUCTIONS = """Respond with a single JSON object, without markdown fences, that conforms to this JSON Schema:"""
+
+JSON_REPAIR_SYSTEM_PROMPT = """You repair JSON documents. Return only the corrected JSON object so that it conforms to the given JSON Schema. Keep every value from the original that is already valid; do not add commentary."""
+
+structured_output_stats = {'valid': 0, 'repaired': 0, 'failed': 0}
+
 class AIService:
-    def __init__(self):
-        # Initialize client lazily to avoid import-time errors
-        self._client = None
-        self.model = "gpt-4"
-        self.temperature = 0.7
-        self.max_tokens = 2000
-    
-    @property
-    def client(self):
-        if self._client is None:
-            api_key = os.getenv('OPENAI_API_KEY')
-            if not api_key:
-                raise Exception("OPENAI_API_KEY environment variable not set")
-            self._client = openai.OpenAI(api_key=api_key)
-        return self._client
-
-    def _get_ai_response(self, system_prompt: str, user_prompt: str, context: Dict[str, Any] = None) -> str:
+    def __init__(self, backend: Optional[LLMBackend] = None):
+        self.backend = backend or llm_backend
+        self.temperature = settings.OPENAI_TEMPERATURE
+        self.max_tokens = settings.OPENAI_MAX_TOKENS
+
+    async def _get_ai_response(self, system_prompt: str, user_prompt: str, context: Dict[str, Any] = None,
+                               task: str = "general", json_schema: Optional[Dict[str, Any]] = None,
+                               temperature: Optional[float] = None) -> str:
         """Get AI response with proper error handling and logging"""
+        temperature = self.temperature if temperature is None else temperature
+        model = ai_model_router.select(task)
+        started_at = time.perf_counter()
+        outcome = 'error'
         try:
             # Build the full prompt with context
-            full_prompt = self._build_contextual_prompt(system_prompt, user_prompt, context)
-            
-            logger.info(f"AI Request - System: {system_prompt[:100]}...")
-            logger.info(f"AI Request - User: {user_prompt[:100]}...")
-            logger.info(f"AI Request - Context: {context}")
+            full_prompt = self._build_contextual_prompt(system_prompt, user_prompt, context, task)
             
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": full_prompt}
-                ],
-                temperature=self.temperature,
-                max_tokens=self.max_tokens
-            )
+            cache_key = ai_response_cache.make_key(model, temperature, system_prompt, full_prompt)
+            cached_response = await ai_response_cache.get(cache_key)
+            if cached_response is not None:
+                logger.info(f"AI cache hit for task {task}")
+                outcome = 'hit'
+                return cached_response
             
-            ai_response = response.choices[0].message.content
-            logger.info(f"AI Response: {ai_response[:200]}...")
+            # Prompts carry resume contents, so they stay out of the INFO log
+            logger.debug(f"AI Request - System: {system_prompt[:100]}...")
+            logger.debug(f"AI Request - User: {user_prompt[:100]}...")
+            logger.debug(f"AI Request - Context: {context}")
             
+            # Identical requests already in flight share one upstream completion
+            flight_key = ai_singleflight.make_key(model, temperature, system_prompt, full_prompt)
+            ai_response = await ai_singleflight.do(
+                flight_key,
+                lambda: self._request_completion(
+                    model, system_prompt, full_prompt, task, cache_key, temperature, json_schema
+                )
+            )
+            outcome = 'miss'
             return ai_response
             
+        except CircuitOpenError as error:
+            # Left unwrapped so routes can answer 503 with Retry-After instead of 500
+            AI_ERRORS.labels(task, model, type(error).__name__).inc()
+            logger.warning(f"AI request for {task} failed fast: {error}")
+            raise
         except Exception as error:
+            AI_ERRORS.labels(task, model, type(error).__name__).inc()
             logger.error(f"Error getting AI response: {error}", exc_info=True)
             raise Exception(f"AI service error: {str(error)}")
-
-    def _build_contextual_prompt(self, system_prompt: str, user_prompt: str, context: Dict[str, Any] = None) -> str:
+        finally:
+            # Failures are timed too, so a slow timeout shows up in the latency histogram
+            AI_REQUEST_SECONDS.labels(task, model, outcome).observe(time.perf_counter() - started_at)
+
+    async def _request_completion(self, model: str, system_prompt: str, full_prompt: str, task: str,
+                                  cache_key: str, temperature: float,
+                                  json_schema: Optional[Dict[str, Any]] = None) -> str:
+        """Send one completion request upstream and cache the result"""
+        sent = False
+        
+        async def attempt() -> str:
+            nonlocal sent
+            # Each attempt takes its own slot so backoff sleeps don't hold one
+            async with ai_request_gate.slot():
+                # Retries of one completion are counted once
+                if not sent:
+                    sent = True
+                    ai_model_router.record_sent(task, model)
+                # Timed inside the slot so queueing behind our own gate doesn't count against the model
+                started_at = time.perf_counter()
+                response = await self.backend.complete(
+                    model=model,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": full_prompt}
+                    ],
+                    temperature=temperature,
+                    max_tokens=self.max_tokens,
+                    json_schema=json_schema,
+                    task=task
+                )
+                elapsed = time.perf_counter() - started_at
+                ai_model_router.record(model, elapsed)
+                AI_UPSTREAM_SECONDS.labels(task, model).observe(elapsed)
+                return response
+        
+        ai_response = await ai_resilience.call(attempt)
+        logger.debug(f"AI Response: {ai_response[:200]}...")
+        ai_response_cache.set(cache_key, ai_response, task)
+        
+        return ai_response
+
+    async def _get_structured_response(self, system_prompt: str, user_prompt: str, context: Dict[str, Any],
+                                       task: str, schema: Type[BaseModel]) -> BaseModel:
+        """Get a JSON completion validated against `schema`, sending a cheap repair prompt if it does not match"""
+        json_schema = schema.model_json_schema()
+        schema_json = json.dumps(json_schema)
+        json_system_prompt = f"{system_prompt}\n\n{JSON_OUTPUT_INSTRUCTIONS}\n{schema_json}"
+        ai_response = await self._get_ai_response(json_system_prompt, user_prompt, context, task=task, json_schema=json_schema)
+        try:
+            output = schema.model_validate_json(ai_response)
+            structured_output_stats['valid'] += 1
+            return output
+        except ValidationError as error:
+            logger.warning(f"AI output for {task} failed schema validation ({error.error_count()} errors), repairing")
+            validation_errors = error
+        
+        # The repair prompt carries only the schema, the errors and the broken output, not the original context
+        repair_prompt = f"""JSON SCHEMA:
+{schema_json}
+
+VALIDATION ERRORS:
+{validation_errors}
+
+JSON TO REPAIR:
+{ai_response}"""
+        repaired = await self._get_ai_response(
+            JSON_REPAIR_SYSTEM_PROMPT, repair_prompt, task="json_repair", json_schema=json_schema, temperature=0
+        )
+        try:
+            output = schema.model_validate_json(repaired)
+            structured_output_stats['repaired'] += 1
+            return output
+        except ValidationError as error:
+            structured_output_stats['failed'] += 1
+            raise Exception(f"AI output for {task} did not match its schema after repair: {error.error_count()} errors")
+
+    async def _complete_task(self, task: str, system_prompt: str, user_prompt: str,
+                             context: Dict[str, Any]) -> Dict[str, Any]:
+        """Run a task and return its structured fields, via JSON mode or text scanning"""
+        if settings.AI_JSON_MODE:
+            _, schema, _ = TASK_OUTPUTS[task]
+            output = await self._get_structured_response(system_prompt, user_prompt, context, task, schema)
+            return output.model_dump()
+        
+        ai_response = await self._get_ai_response(system_prompt, user_prompt, context, task=task)
+        return self._fields_from_text(task, ai_response)
+
+    def _fields_from_text(self, task: str, ai_response: str) -> Dict[str, Any]:
+        """Structure a plain-text completion with the task's scanner"""
+        scanner, _, text_field = TASK_OUTPUTS[task]
+        if text_field is None:
+            return scanner.scan(ai_response)
+        return {text_field: ai_response, **scanner.scan(ai_response)}
+
+    async def _stream_ai_response(self, system_prompt: str, user_prompt: str, context: Dict[str, Any] = None,
+                                  task: str = "general") -> AsyncIterator[str]:
+        """Yield AI response text as the model produces it, caching the full completion"""
+        started_at = time.perf_counter()
+        full_prompt = self._build_contextual_prompt(system_prompt, user_prompt, context, task)
+        model = ai_model_router.select(task)
+        
+        cache_key = ai_response_cache.make_key(model, self.temperature, system_prompt, full_prompt)
+        cached_response = await ai_response_cache.get(cache_key)
+        if cached_response is not None:
+            logger.info(f"AI cache hit for streamed task {task}")
+            AI_REQUEST_SECONDS.labels(task, model, 'hit').observe(time.perf_counter() - started_at)
+            yield cached_response
+            return
+        
+        logger.debug(f"AI Stream Request - System: {system_prompt[:100]}...")
+        logger.debug(f"AI Stream Request - User: {user_prompt[:100]}...")
+        
+        sent = False
+        
+        async def open_stream() -> AsyncIterator[str]:
+            nonlocal sent
+            async with ai_request_gate.slot():
+                if not sent:
+                    sent = True
+                    ai_model_router.record_sent(task, model)
+                async for delta in self.backend.stream(
+                    model=model,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": full_prompt}
+                    ],
+                    temperature=self.temperature,
+                    max_tokens=self.max_tokens,
+                    task=task
+                ):
+                    yield delta
+        
+        chunks = []
+        outcome = 'error'
+        try:
+            async for delta in ai_resilience.stream(open_stream):
+                chunks.append(delta)
+                yield delta
+            outcome = 'miss'
+        except GeneratorExit:
+            outcome = 'aborted'
+            raise
+        except CircuitOpenError as error:
+            AI_ERRORS.labels(task, model, type(error).__name__).inc()
+            logger.warning(f"AI stream for {task} failed fast: {error}")
+            raise
+        except Exception as error:
+            AI_ERRORS.labels(task, model, type(error).__name__).inc()
+            logger.error(f"Error streaming AI response: {error}", exc_info=True)
+            raise Exception(f"AI service error: {str(error)}")
+        finally:
+            # Timed even when the client disconnects mid-stream
+            AI_REQUEST_SECONDS.labels(task, model, outcome).observe(time.perf_counter() - started_at)
+        
+        ai_response = ''.join(chunks)
+        logger.debug(f"AI Stream Response: {ai_response[:200]}...")
+        ai_response_cache.set(cache_key, ai_response, task)
+
+    async def _stream_task(self, task: str, system_prompt: str, user_prompt: str, context: Dict[str, Any],
+                           finalize: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None
+                           ) -> AsyncIterator[Dict[str, Any]]:
+        """Relay completion text as token events, then the structured result as a final event"""
+        chunks = []
+        async for text in self._stream_ai_response(system_prompt, user_prompt, context, task=task):
+            chunks.append(text)
+            yield {'event': 'token', 'data': {'text': text}}
+        fields = self._fields_from_text(task, ''.join(chunks))
+        yield {'event': 'result', 'data': finalize(fields) if finalize else fields}
+
+    def _build_contextual_prompt(self, system_prompt: str, user_prompt: str, context: Dict[str, Any] = None,
+                                 task: str = "general") -> str:
         """Build contextual prompt with user data and retrieved context"""
-        if not context:
-            return user_prompt
-            
-        context_str = ""
-        if context.get('user_resume'):
-            context_str += f"\n\nUSER'S CURRENT RESUME:\n{context['user_resume']}"
-        if context.get('job_description'):
-            context_str += f"\n\nTARGET JOB DESCRIPTION:\n{context['job_description']}"
-        if context.get('relevant_experience'):
-            context_str += f"\n\nRELEVANT EXPERIENCE:\n{context['relevant_experience']}"
-        if context.get('skills'):
-            context_str += f"\n\nUSER'S SKILLS:\n{context['skills']}"
-            
-        return f"{user_prompt}\n{context_str}"
+        return prompt_builder.build(system_prompt, user_prompt, context, task)
 
     async def tailor_resume_for_job(self, resume_data: Dict[str, Any], job_description: str, 
                                    target_role: str, company: str) -> Dict[str, Any]:
@@ -81,37 +318,10 @@ class AIService:
             'company': company
         }
         
-        system_prompt = """You are an expert resume writer and career coach. Your task is to tailor a user's resume for a specific job application.
-
-IMPORTANT RULES:
-1. Use ONLY the information provided by the user
-2. Do NOT fabricate or invent skills, experiences, or achievements
-3. Tailor language and keywords to match the job requirements
-4. Focus on quantifiable achievements where possible
-5. Maintain the user's authentic voice and experience level
-6. Provide specific, actionable suggestions for improvement"""
-
-        user_prompt = f"""Please analyze this resume for the {target_role} position at {company} and provide:
-
-1. Specific improvements to experience descriptions
-2. Skills to highlight based on job requirements
-3. Keywords to include for ATS optimization
-4. Overall structure recommendations
-5. ATS score improvement estimate (0-10 points)
-
-Be specific and actionable. Use the user's actual experience and skills."""
+        system_prompt, user_prompt = render_prompts("tailor_resume", target_role=target_role, company=company)
 
         try:
-            ai_response = self._get_ai_response(system_prompt, user_prompt, context)
-            
-            # Parse the AI response into structured format
-            return {
-                'tailored_resume': ai_response,
-                'keywords': self._extract_keywords(ai_response),
-                'ats_improvements': self._extract_ats_improvements(ai_response),
-                'cover_letter_suggestions': self._extract_cover_letter_suggestions(ai_response),
-                'score_improvement': self._extract_score_improvement(ai_response)
-            }
+            return await self._complete_task("tailor_resume", system_prompt, user_prompt, context)
             
         except Exception as error:
             logger.error(f"Resume tailoring failed: {error}")
@@ -121,6 +331,29 @@ Be specific and actionable. Use the user's actual experience and skills."""
                                    company: str, role: str, user_name: str) -> Dict[str, Any]:
         """Generate personalized cover letter using actual user data"""
         
+        system_prompt, user_prompt, context = self._cover_letter_prompts(
+            resume_data, job_description, company, role, user_name
+        )
+
+        try:
+            fields = await self._complete_task("cover_letter", system_prompt, user_prompt, context)
+            return self._cover_letter_result(fields)
+            
+        except Exception as error:
+            logger.error(f"Cover letter generation failed: {error}")
+            raise
+
+    def stream_cover_letter(self, resume_data: Dict[str, Any], job_description: str,
+                            company: str, role: str, user_name: str) -> AsyncIterator[Dict[str, Any]]:
+        """Stream cover letter tokens, finishing with the structured result"""
+        system_prompt, user_prompt, context = self._cover_letter_prompts(
+            resume_data, job_description, company, role, user_name
+        )
+        return self._stream_task("cover_letter", system_prompt, user_prompt, context, self._cover_letter_result)
+
+    def _cover_letter_prompts(self, resume_data: Dict[str, Any], job_description: str,
+                              company: str, role: str, user_name: str) -> Tuple[str, str, Dict[str, Any]]:
+        """Build the prompts for cover letter generation"""
         context = {
             'user_resume': self._extract_resume_text(resume_data),
             'job_description': job_description,
@@ -129,80 +362,51 @@ Be specific and actionable. Use the user's actual experience and skills."""
             'user_name': user_name
         }
         
-        system_prompt = """You are an expert cover letter writer. Create a compelling, personalized cover letter that:
+        system_prompt, user_prompt = render_prompts("cover_letter", user_name=user_name, role=role, company=company)
 
-1. Uses ONLY the information provided by the user
-2. Connects the user's actual experience to the job requirements
-3. Shows genuine interest in the company and role
-4. Maintains professional but engaging tone
-5. Includes specific examples from the user's background
-6. Is tailored to the company's culture and values"""
+        return system_prompt, user_prompt, context
 
-        user_prompt = f"""Write a cover letter for {user_name} applying to the {role} position at {company}.
-
-The cover letter should:
-- Highlight relevant experience from their resume
-- Address specific requirements from the job description
-- Show understanding of the company
-- End with a strong call to action
+    def _cover_letter_result(self, fields: Dict[str, Any]) -> Dict[str, Any]:
+        """Add the derived cover letter fields"""
+        cover_letter = fields['cover_letter']
+        return {
+            'cover_letter': cover_letter,
+            'key_talking_points': fields['key_talking_points'][:5],
+            'modifications': self._suggest_modifications(cover_letter),
+            'word_count': len(cover_letter.split())
+        }
 
-Make it personal and specific to this user and job."""
+    async def enhance_experience_descriptions(self, experience_text: str, target_role: str, 
+                                           industry: str) -> Dict[str, Any]:  # FIXED: Changed from 'string' to 'str'
+        """Enhance experience descriptions using AI"""
+        
+        system_prompt, user_prompt, context = self._experience_prompts(experience_text, target_role, industry)
 
         try:
-            ai_response = self._get_ai_response(system_prompt, user_prompt, context)
-            
-            return {
-                'cover_letter': ai_response,
-                'key_talking_points': self._extract_talking_points(ai_response),
-                'modifications': self._suggest_modifications(ai_response),
-                'word_count': len(ai_response.split())
-            }
+            return await self._complete_task("enhance_experience", system_prompt, user_prompt, context)
             
         except Exception as error:
-            logger.error(f"Cover letter generation failed: {error}")
+            logger.error(f"Experience enhancement failed: {error}")
             raise
 
-    async def enhance_experience_descriptions(self, experience_text: str, target_role: str, 
-                                           industry: str) -> Dict[str, Any]:  # FIXED: Changed from 'string' to 'str'
-        """Enhance experience descriptions using AI"""
-        
+    def stream_experience_enhancement(self, experience_text: str, target_role: str,
+                                      industry: str) -> AsyncIterator[Dict[str, Any]]:
+        """Stream enhanced experience tokens, finishing with the structured result"""
+        system_prompt, user_prompt, context = self._experience_prompts(experience_text, target_role, industry)
+        return self._stream_task("enhance_experience", system_prompt, user_prompt, context)
+
+    def _experience_prompts(self, experience_text: str, target_role: str,
+                            industry: str) -> Tuple[str, str, Dict[str, Any]]:
+        """Build the prompts for experience enhancement"""
         context = {
             'experience_text': experience_text,
             'target_role': target_role,
             'industry': industry
         }
         
-        system_prompt = """You are an expert at writing compelling experience descriptions for resumes. Your task is to enhance the provided experience text to:
-
-1. Use action verbs and quantifiable achievements
-2. Match the language and requirements of the target role
-3. Include relevant keywords for ATS systems
-4. Make descriptions more impactful and professional
-5. Focus on results and outcomes, not just responsibilities"""
-
-        user_prompt = f"""Please enhance this experience description for a {target_role} position in the {industry} industry:
-
-Current Description: {experience_text}
-
-Provide:
-1. Enhanced description with action verbs and metrics
-2. Specific improvements made
-3. Keywords added for ATS optimization
-4. Notes on industry-specific language used"""
+        system_prompt, user_prompt = render_prompts("enhance_experience", target_role=target_role, industry=industry)
 
-        try:
-            ai_response = self._get_ai_response(system_prompt, user_prompt, context)
-            
-            return {
-                'enhanced_description': ai_response,
-                'improvements': self._extract_improvements(ai_response),
-                'suggested_metrics': self._extract_metrics(ai_response),
-                'ats_notes': self._extract_ats_notes(ai_response)
-            }
-            
-        except Exception as error:
-            logger.error(f"Experience enhancement failed: {error}")
-            raise
+        return system_prompt, user_prompt, context
 
     async def analyze_job_description(self, job_description: str, company: str, 
                                     role: str) -> Dict[str, Any]:
@@ -214,37 +418,21 @@ Provide:
             'role': role
         }
         
-        system_prompt = """You are an expert job analyst and career coach. Analyze the provided job description to extract:
+        system_prompt, user_prompt = render_prompts("job_analysis", role=role, company=company)
 
-1. Key requirements and qualifications
-2. Important skills and technologies
-3. Company culture indicators
-4. Salary and growth insights
-5. Application strategy recommendations"""
-
-        user_prompt = f"""Please analyze this job description for the {role} position at {company}:
-
-Job Description: {job_description}
-
-Provide a comprehensive analysis including:
-- Required vs. preferred qualifications
-- Key skills and technologies
-- Company culture insights
-- Salary range indicators
-- Growth opportunities
-- Application tips"""
+        # The same posting arrives with different tracking links, whitespace and boilerplate
+        started_at = time.perf_counter()
+        scope = job_analysis_cache.scope(company, role)
+        fingerprint = job_analysis_cache.fingerprint(job_description)
+        cached_analysis = job_analysis_cache.get(scope, fingerprint)
+        if cached_analysis is not None:
+            AI_REQUEST_SECONDS.labels("job_analysis", "none", "similarity").observe(time.perf_counter() - started_at)
+            return cached_analysis
 
         try:
-            ai_response = self._get_ai_response(system_prompt, user_prompt, context)
-            
-            return {
-                'requirements': self._extract_requirements(ai_response),
-                'keywords': self._extract_keywords(ai_response),
-                'company_culture': self._extract_culture(ai_response),
-                'skills_to_highlight': self._extract_skills(ai_response),
-                'salary_insights': self._extract_salary_insights(ai_response),
-                'growth_opportunities': self._extract_growth(ai_response)
-            }
+            analysis = await self._complete_task("job_analysis", system_prompt, user_prompt, context)
+            job_analysis_cache.set(scope, fingerprint, analysis)
+            return analysis
             
         except Exception as error:
             logger.error(f"Job analysis failed: {error}")
@@ -254,49 +442,37 @@ Provide a comprehensive analysis including:
                                     career_goals: str, current_challenges: str) -> Dict[str, Any]:
         """Provide personalized career guidance"""
         
+        system_prompt, user_prompt, context = self._career_guidance_prompts(
+            user_profile, career_goals, current_challenges
+        )
+
+        try:
+            return await self._complete_task("career_guidance", system_prompt, user_prompt, context)
+            
+        except Exception as error:
+            logger.error(f"Career guidance failed: {error}")
+            raise
+
+    def stream_career_guidance(self, user_profile: Dict[str, Any], career_goals: str,
+                               current_challenges: str) -> AsyncIterator[Dict[str, Any]]:
+        """Stream career guidance tokens, finishing with the structured result"""
+        system_prompt, user_prompt, context = self._career_guidance_prompts(
+            user_profile, career_goals, current_challenges
+        )
+        return self._stream_task("career_guidance", system_prompt, user_prompt, context)
+
+    def _career_guidance_prompts(self, user_profile: Dict[str, Any], career_goals: str,
+                                 current_challenges: str) -> Tuple[str, str, Dict[str, Any]]:
+        """Build the prompts for career guidance"""
         context = {
             'user_profile': user_profile,
             'career_goals': career_goals,
             'current_challenges': current_challenges
         }
         
-        system_prompt = """You are an expert career coach with deep knowledge of the tech industry. Provide personalized career guidance that:
-
-1. Addresses the user's specific situation and goals
-2. Offers actionable advice and next steps
-3. Considers their current experience level and background
-4. Provides realistic timelines and expectations
-5. Suggests relevant resources and learning paths"""
+        system_prompt, user_prompt = render_prompts("career_guidance")
 
-        user_prompt = f"""Please provide career guidance for this user:
-
-Profile: {user_profile}
-Career Goals: {career_goals}
-Current Challenges: {current_challenges}
-
-Provide:
-1. Career development plan
-2. Learning recommendations
-3. Networking strategies
-4. Project suggestions
-5. Timeline for goals
-6. Solutions to current challenges"""
-
-        try:
-            ai_response = self._get_ai_response(system_prompt, user_prompt, context)
-            
-            return {
-                'career_plan': ai_response,
-                'learning_recommendations': self._extract_learning_recs(ai_response),
-                'networking_strategies': self._extract_networking(ai_response),
-                'project_suggestions': self._extract_projects(ai_response),
-                'timeline': self._extract_timeline(ai_response),
-                'challenge_solutions': self._extract_solutions(ai_response)
-            }
-            
-        except Exception as error:
-            logger.error(f"Career guidance failed: {error}")
-            raise
+        return system_prompt, user_prompt, context
 
     async def optimize_for_ats(self, resume_data: Dict[str, Any], job_description: str, 
                               target_role: str, company: str) -> Dict[str, Any]:
@@ -309,57 +485,37 @@ Provide:
             'company': company
         }
         
-        system_prompt = """You are an ATS (Applicant Tracking System) optimization expert. Your task is to:
-
-1. Analyze keyword matching between resume and job
-2. Identify missing important keywords
-3. Suggest improvements for better ATS scoring
-4. Optimize formatting and structure
-5. Ensure maximum compatibility with ATS systems"""
-
-        user_prompt = f"""Please optimize this resume for ATS systems for the {target_role} position at {company}.
-
-Focus on:
-- Keyword optimization and matching
-- Format improvements for ATS parsing
-- Structure recommendations
-- Missing keywords to add
-- ATS score improvement estimate"""
+        system_prompt, user_prompt = render_prompts("ats_optimization", target_role=target_role, company=company)
 
         try:
-            ai_response = self._get_ai_response(system_prompt, user_prompt, context)
-            
-            return {
-                'ats_optimization': ai_response,
-                'keyword_analysis': self._analyze_keywords(resume_data, job_description),
-                'format_recommendations': self._extract_format_recs(ai_response),
-                'score_improvement': self._extract_score_improvement(ai_response)
-            }
+            fields = await self._complete_task("ats_optimization", system_prompt, user_prompt, context)
+            fields['keyword_analysis'] = self._analyze_keywords(resume_data, job_description)
+            return fields
             
         except Exception as error:
             logger.error(f"ATS optimization failed: {error}")
             raise
 
-    async def health_check(self) -> Dict[str, Any]:
-        """Simple health check for AI service"""
-        try:
-            # Test OpenAI connection with a simple prompt
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[{"role": "user", "content": "Say 'OK' if you're working."}],
-                max_tokens=10
-            )
-            
-            if response.choices[0].message.content.strip().upper() == "OK":
-                return {"status": "healthy", "message": "AI service is working properly"}
-            else:
-                return {"status": "unhealthy", "message": "AI service response unexpected"}
-                
-        except Exception as error:
-            logger.error(f"AI health check failed: {error}")
-            return {"status": "unhealthy", "message": f"AI service error: {str(error)}"}
+    def health_check(self) -> Dict[str, Any]:
+        """Latest AI upstream health from the background prober"""
+        return ai_health_prober.snapshot()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Runtime statistics for the shared AI request pipeline"""
+        return {
+            'backend': self.backend.name,
+            'models': ai_model_router.get_stats(),
+            'token_usage': ai_token_usage.get_stats(),
+            'concurrency': ai_request_gate.get_stats(),
+            'resilience': ai_resilience.get_stats(),
+            'cache': ai_response_cache.get_stats(),
+            'similarity_cache': job_analysis_cache.get_stats(),
+            'coalescing': ai_singleflight.get_stats(),
+            'prompt': prompt_builder.get_stats(),
+            'structured_output': {'json_mode': settings.AI_JSON_MODE, **structured_output_stats}
+        }
 
-    # Helper methods for extracting information from AI responses
+    # Helper methods for building prompts and analyzing keywords
     def _extract_resume_text(self, resume_data: Dict[str, Any]) -> str:
         """Extract text content from resume data"""
         text_parts = []
@@ -385,49 +541,6 @@ Focus on:
         
         return '\n'.join(text_parts)
 
-    def _extract_keywords(self, text: str) -> List[str]:
-        """Extract keywords from text"""
-        # Simple keyword extraction - in production, use more sophisticated NLP
-        common_keywords = ['python', 'javascript', 'react', 'node.js', 'aws', 'docker', 'sql', 'git']
-        found_keywords = [word.lower() for word in text.split() if word.lower() in common_keywords]
-        return list(set(found_keywords))
-
-    def _extract_ats_improvements(self, text: str) -> List[str]:
-        """Extract ATS improvement suggestions"""
-        improvements = []
-        lines = text.split('\n')
-        for line in lines:
-            if any(keyword in line.lower() for keyword in ['improve', 'add', 'include', 'optimize']):
-                improvements.append(line.strip())
-        return improvements
-
-    def _extract_cover_letter_suggestions(self, text: str) -> str:
-        """Extract cover letter suggestions"""
-        # Find the section with cover letter suggestions
-        lines = text.split('\n')
-        for i, line in enumerate(lines):
-            if 'cover letter' in line.lower():
-                return '\n'.join(lines[i:i+5])  # Return next 5 lines
-        return "Cover letter suggestions not found in response"
-
-    def _extract_score_improvement(self, text: str) -> int:
-        """Extract score improvement estimate"""
-        import re
-        # Look for numbers followed by 'point' or 'score'
-        match = re.search(r'(\d+)\s*(?:point|score)', text.lower())
-        if match:
-            return min(10, int(match.group(1)))  # Cap at 10 points
-        return 5  # Default improvement
-
-    def _extract_talking_points(self, text: str) -> List[str]:
-        """Extract key talking points"""
-        points = []
-        lines = text.split('\n')
-        for line in lines:
-            if line.strip().startswith(('-', '•', '*', '1.', '2.', '3.')):
-                points.append(line.strip())
-        return points[:5]  # Return first 5 points
-
     def _suggest_modifications(self, text: str) -> Dict[str, str]:
         """Suggest modifications to cover letter"""
         return {
@@ -437,129 +550,13 @@ Focus on:
             'call_to_action': 'Include strong closing'
         }
 
-    def _extract_improvements(self, text: str) -> List[str]:
-        """Extract improvement suggestions"""
-        improvements = []
-        lines = text.split('\n')
-        for line in lines:
-            if any(keyword in line.lower() for keyword in ['improve', 'enhance', 'add', 'include']):
-                improvements.append(line.strip())
-        return improvements
-
-    def _extract_metrics(self, text: str) -> List[str]:
-        """Extract suggested metrics"""
-        metrics = []
-        lines = text.split('\n')
-        for line in lines:
-            if any(keyword in line.lower() for keyword in ['%', 'percent', 'increase', 'decrease', 'users', 'revenue']):
-                metrics.append(line.strip())
-        return metrics
-
-    def _extract_ats_notes(self, text: str) -> str:
-        """Extract ATS optimization notes"""
-        lines = text.split('\n')
-        for i, line in enumerate(lines):
-            if 'ats' in line.lower():
-                return '\n'.join(lines[i:i+3])  # Return next 3 lines
-        return "ATS optimization notes not found"
-
-    def _extract_requirements(self, text: str) -> List[str]:
-        """Extract job requirements"""
-        requirements = []
-        lines = text.split('\n')
-        for line in lines:
-            if any(keyword in line.lower() for keyword in ['required', 'requirement', 'qualification', 'must have']):
-                requirements.append(line.strip())
-        return requirements
-
-    def _extract_culture(self, text: str) -> str:
-        """Extract company culture insights"""
-        lines = text.split('\n')
-        for i, line in enumerate(lines):
-            if any(keyword in line.lower() for keyword in ['culture', 'environment', 'atmosphere', 'values']):
-                return '\n'.join(lines[i:i+3])
-        return "Company culture insights not found"
-
-    def _extract_skills(self, text: str) -> List[str]:
-        """Extract skills to highlight"""
-        skills = []
-        lines = text.split('\n')
-        for line in lines:
-            if any(keyword in line.lower() for keyword in ['skill', 'technology', 'tool', 'framework']):
-                skills.append(line.strip())
-        return skills
-
-    def _extract_salary_insights(self, text: str) -> str:
-        """Extract salary insights"""
-        lines = text.split('\n')
-        for i, line in enumerate(lines):
-            if any(keyword in line.lower() for keyword in ['salary', 'compensation', 'pay', 'benefits']):
-                return '\n'.join(lines[i:i+3])
-        return "Salary insights not found"
-
-    def _extract_growth(self, text: str) -> List[str]:
-        """Extract growth opportunities"""
-        opportunities = []
-        lines = text.split('\n')
-        for line in lines:
-            if any(keyword in line.lower() for keyword in ['growth', 'advancement', 'career path', 'opportunity']):
-                opportunities.append(line.strip())
-        return opportunities
-
-    def _extract_learning_recs(self, text: str) -> List[str]:
-        """Extract learning recommendations"""
-        recs = []
-        lines = text.split('\n')
-        for line in lines:
-            if any(keyword in line.lower() for keyword in ['learn', 'study', 'course', 'certification']):
-                recs.append(line.strip())
-        return recs
-
-    def _extract_networking(self, text: str) -> List[str]:
-        """Extract networking strategies"""
-        strategies = []
-        lines = text.split('\n')
-        for line in lines:
-            if any(keyword in line.lower() for keyword in ['network', 'connect', 'meet', 'conference']):
-                strategies.append(line.strip())
-        return strategies
-
-    def _extract_projects(self, text: str) -> List[str]:
-        """Extract project suggestions"""
-        projects = []
-        lines = text.split('\n')
-        for line in lines:
-            if any(keyword in line.lower() for keyword in ['project', 'build', 'create', 'develop']):
-                projects.append(line.strip())
-        return projects
-
-    def _extract_timeline(self, text: str) -> str:
-        """Extract timeline information"""
-        lines = text.split('\n')
-        for i, line in enumerate(lines):
-            if any(keyword in line.lower() for keyword in ['timeline', 'schedule', 'plan', 'goal']):
-                return '\n'.join(lines[i:i+3])
-        return "Timeline information not found"
-
-    def _extract_solutions(self, text: str) -> List[str]:
-        """Extract challenge solutions"""
-        solutions = []
-        lines = text.split('\n')
-        for line in lines:
-            if any(keyword in line.lower() for keyword in ['solution', 'solve', 'overcome', 'address']):
-                solutions.append(line.strip())
-        return solutions
-
     def _analyze_keywords(self, resume_data: Dict[str, Any], job_description: str) -> Dict[str, Any]:
         """Analyze keyword matching between resume and job"""
         resume_text = self._extract_resume_text(resume_data).lower()
         job_lower = job_description.lower()
         
-        # Extract common tech keywords
-        tech_keywords = ['python', 'javascript', 'react', 'node.js', 'aws', 'docker', 'sql', 'git']
-        
-        resume_keywords = [kw for kw in tech_keywords if kw in resume_text]
-        job_keywords = [kw for kw in tech_keywords if kw in job_lower]
+        resume_keywords = [kw for kw in TECH_KEYWORDS if kw in resume_text]
+        job_keywords = [kw for kw in TECH_KEYWORDS if kw in job_lower]
         
         matching_keywords = [kw for kw in resume_keywords if kw in job_keywords]
         missing_keywords = [kw for kw in job_keywords if kw not in resume_keywords]
@@ -573,12 +570,3 @@ Focus on:
             'resume_keywords': resume_keywords,
             'job_keywords': job_keywords
         }
-
-    def _extract_format_recs(self, text: str) -> List[str]:
-        """Extract formatting recommendations"""
-        recs = []
-        lines = text.split('\n')
-        for line in lines:
-            if any(keyword in line.lower() for keyword in ['format', 'structure', 'layout', 'design']):
-                recs.append(line.strip())
-        return recs
\ No newline at end of file
@@ -0,0 +1,175 @@
+import copy
+import hashlib
+import re
+import time
+import logging
+from collections import Counter, OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.ai_metrics import AI_CALLS_SAVED
+
+logger = logging.getLogger(__name__)
+
+FINGERPRINT_BITS = 64
+SHINGLE_SIZE = 3
+
+_URL = re.compile(r'(https?://[^\s?#]+)[^\s]*')
+_NON_WORD = re.compile(r'[^a-z0-9+#]+')
+
+# Lines scraped from job boards that say nothing about the job itself
+BOILERPLATE_PATTERNS = re.compile(
+    r'equal opportunity|apply now|share this job|save this job|cookie|privacy policy|'
+    r'terms of use|all rights reserved|sign in|report this job|similar jobs',
+    re.IGNORECASE
+)
+
+def clean_description(text: str) -> str:
+    """Lowercased words of the description without URL tracking parameters or job-board boilerplate"""
+    lines = [line for line in text.splitlines() if not BOILERPLATE_PATTERNS.search(line)]
+    without_tracking = _URL.sub(r'\1', '\n'.join(lines))
+    return _NON_WORD.sub(' ', without_tracking.lower()).strip()
+
+def simhash(text: str) -> int:
+    """64-bit SimHash of the word shingles in `text`, weighted by how often each occurs"""
+    words = text.split()
+    if len(words) < SHINGLE_SIZE:
+        shingles = Counter([' '.join(words)])
+    else:
+        shingles = Counter(' '.join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1))
+    weights = [0] * FINGERPRINT_BITS
+    for shingle, count in shingles.items():
+        value = int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'big')
+        for bit in range(FINGERPRINT_BITS):
+            weights[bit] += count if value >> bit & 1 else -count
+    return sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+
+def similarity(a: int, b: int) -> float:
+    """Fraction of fingerprint bits two SimHashes share"""
+    return 1 - bin(a ^ b).count('1') / FINGERPRINT_BITS
+
+class SimilarityCache:
+    """Reuses a task result for near-duplicate inputs by comparing SimHash fingerprints.
+
+    Fingerprints are split into bands and indexed per band. Two fingerprints
+    within the allowed Hamming distance must agree on at least one band
+    (pigeonhole), so only entries sharing a band are compared.
+    """
+
+    def __init__(self, task: str, threshold: float, max_entries: int, ttl: int, enabled: bool = True):
+        self.task = task
+        self.threshold = threshold
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self.enabled = enabled and ttl > 0
+        self.max_distance = int((1 - threshold) * FINGERPRINT_BITS)
+        self._bands = self._band_masks(min(self.max_distance + 1, FINGERPRINT_BITS))
+        self._entries: "OrderedDict[Tuple[str, int], Tuple[float, Any]]" = OrderedDict()
+        self._index: Dict[Tuple[int, int], set] = {}
+
+        self.exact_hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _band_masks(bands: int) -> List[int]:
+        width, extra = divmod(FINGERPRINT_BITS, bands)
+        masks, start = [], 0
+        for band in range(bands):
+            size = width + (1 if band < extra else 0)
+            masks.append(((1 << size) - 1) << start)
+            start += size
+        return masks
+
+    @staticmethod
+    def scope(*parts: str) -> str:
+        """Key for the inputs that must match exactly alongside the fingerprint"""
+        return '\x1f'.join(' '.join(part.lower().split()) for part in parts)
+
+    def fingerprint(self, text: str) -> int:
+        return simhash(clean_description(text))
+
+    def get(self, scope: str, fingerprint: int) -> Optional[Any]:
+        """Stored result for the closest fingerprint within the threshold, if any"""
+        if not self.enabled:
+            return None
+        now = time.time()
+        best_key, best_similarity = None, 0.0
+        for candidate in self._candidates(scope, fingerprint):
+            expires_at, _ = self._entries[candidate]
+            if expires_at <= now:
+                self._remove(candidate)
+                continue
+            score = similarity(fingerprint, candidate[1])
+            if score >= self.threshold and score > best_similarity:
+                best_key, best_similarity = candidate, score
+        if best_key is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(best_key)
+        if best_similarity == 1.0:
+            self.exact_hits += 1
+        else:
+            self.near_hits += 1
+            logger.info(f"Reusing {self.task} result for a near-duplicate input ({best_similarity:.3f} similar)")
+        AI_CALLS_SAVED.labels(self.task, 'similarity').inc()
+        return copy.deepcopy(self._entries[best_key][1])
+
+    def set(self, scope: str, fingerprint: int, value: Any) -> None:
+        if not self.enabled:
+            return
+        key = (scope, fingerprint)
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.time() + self.ttl, copy.deepcopy(value))
+        for band, mask in enumerate(self._bands):
+            self._index.setdefault((band, fingerprint & mask), set()).add(key)
+        self.stores += 1
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _candidates(self, scope: str, fingerprint: int) -> set:
+        candidates = set()
+        for band, mask in enumerate(self._bands):
+            for key in self._index.get((band, fingerprint & mask), ()):
+                if key[0] == scope:
+                    candidates.add(key)
+        return candidates
+
+    def _remove(self, key: Tuple[str, int]) -> None:
+        del self._entries[key]
+        for band, mask in enumerate(self._bands):
+            bucket = self._index.get((band, key[1] & mask))
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._index[(band, key[1] & mask)]
+
+    def get_stats(self) -> Dict[str, Any]:
+        hits = self.exact_hits + self.near_hits
+        lookups = hits + self.misses
+        return {
+            'enabled': self.enabled,
+            'threshold': self.threshold,
+            'entries': len(self._entries),
+            'exact_hits': self.exact_hits,
+            'near_hits': self.near_hits,
+            'misses': self.misses,
+            'hit_rate': round(hits / lookups, 3) if lookups else 0.0,
+            'llm_calls_saved': hits,
+            'stores': self.stores,
+            'evictions': self.evictions
+        }
+
+# Shared by every AIService instance in this process
+job_analysis_cache = SimilarityCache(
+    task="job_analysis",
+    threshold=settings.AI_SIMILARITY_THRESHOLD,
+    max_entries=settings.AI_SIMILARITY_CACHE_MAX_ENTRIES,
+    ttl=settings.AI_CACHE_TASK_TTLS.get("job_analysis", settings.AI_CACHE_DEFAULT_TTL),
+    enabled=settings.AI_CACHE_ENABLED and settings.AI_SIMILARITY_CACHE_ENABLED
+)
@@ -0,0 +1,62 @@
+import asyncio
+import hashlib
+import json
+import re
+import logging
+from typing import Dict, Any, Awaitable, Callable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+_WHITESPACE = re.compile(r'\s+')
+
+class SingleFlight:
+    """Coalesces concurrent identical calls onto one shared upstream task"""
+
+    def __init__(self):
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def make_key(model: str, temperature: float, system_prompt: str, prompt: str) -> str:
+        """Hash the request with whitespace normalized so trivially different retries still match"""
+        normalized = [
+            model,
+            temperature,
+            _WHITESPACE.sub(' ', system_prompt).strip(),
+            _WHITESPACE.sub(' ', prompt).strip()
+        ]
+        return hashlib.sha256(json.dumps(normalized, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+    async def do(self, key: str, call: Callable[[], Awaitable[T]]) -> T:
+        """Run `call` once per key; callers arriving while it is in flight await the same result"""
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            logger.info(f"Coalesced duplicate AI request onto in-flight call {key[:12]}")
+        else:
+            self.leaders += 1
+            # Own task so one caller disconnecting does not cancel the call for the others
+            task = asyncio.ensure_future(call())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda finished: self._finish(key, finished))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Mark the exception retrieved in case every waiter went away
+        if not task.cancelled():
+            task.exception()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'in_flight': len(self._in_flight),
+            'upstream_calls': self.leaders,
+            'coalesced_calls': self.coalesced
+        }
+
+# Shared by every AIService instance in this process
+ai_singleflight = SingleFlight()
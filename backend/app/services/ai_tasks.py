@@ -0,0 +1,517 @@
+import asyncio
+import itertools
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, Awaitable, Callable, Tuple
+
+from fastapi import Header, HTTPException, Query, status
+from fastapi.responses import JSONResponse
+
+from app.core.config import settings
+from app.services.ai_resilience import CircuitOpenError, is_transient
+
+logger = logging.getLogger(__name__)
+
+TaskHandler = Callable[[int, Dict[str, Any]], Awaitable[Any]]
+
+class TaskStore:
+    """AI tasks in a SQLite file so queued work and results survive restarts"""
+
+    def __init__(self, db_path: str):
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.db_path = db_path
+        self._local = threading.local()
+        db = self._connection()
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS ai_tasks ("
+            "id TEXT PRIMARY KEY, user_id INTEGER NOT NULL, kind TEXT NOT NULL, payload TEXT NOT NULL, "
+            "status TEXT NOT NULL, result TEXT, error TEXT, attempts INTEGER NOT NULL DEFAULT 0, "
+            "idempotency_key TEXT, created_at REAL NOT NULL, started_at REAL, finished_at REAL, "
+            "owner TEXT, lease_expires_at REAL)"
+        )
+        columns = {row["name"] for row in db.execute("PRAGMA table_info(ai_tasks)")}
+        for column, column_type in (("owner", "TEXT"), ("lease_expires_at", "REAL")):
+            # Files created before running tasks were leased
+            if column not in columns:
+                db.execute(f"ALTER TABLE ai_tasks ADD COLUMN {column} {column_type}")
+        db.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS ix_ai_tasks_idempotency "
+            "ON ai_tasks (user_id, kind, idempotency_key) WHERE idempotency_key IS NOT NULL"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS ix_ai_tasks_status ON ai_tasks (status, created_at)")
+        db.execute("CREATE INDEX IF NOT EXISTS ix_ai_tasks_user ON ai_tasks (user_id, created_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.db_path, timeout=5, isolation_level=None)
+            db.row_factory = sqlite3.Row
+            db.execute("PRAGMA journal_mode=WAL")
+            self._local.db = db
+        return db
+
+    def create(self, user_id: int, kind: str, payload: Dict[str, Any],
+               idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+        """Insert a queued task, or return the existing one submitted with the same idempotency key"""
+        db = self._connection()
+        if idempotency_key:
+            existing = self._find_by_key(db, user_id, kind, idempotency_key)
+            if existing is not None:
+                return existing
+        task_id = uuid.uuid4().hex
+        try:
+            db.execute(
+                "INSERT INTO ai_tasks (id, user_id, kind, payload, status, idempotency_key, created_at) "
+                "VALUES (?, ?, ?, ?, 'queued', ?, ?)",
+                (task_id, user_id, kind, json.dumps(payload), idempotency_key, time.time())
+            )
+        except sqlite3.IntegrityError:
+            # Another worker inserted the same key between our lookup and insert
+            return self._find_by_key(db, user_id, kind, idempotency_key)
+        return self.get(task_id)
+
+    def _find_by_key(self, db: sqlite3.Connection, user_id: int, kind: str,
+                     idempotency_key: str) -> Optional[Dict[str, Any]]:
+        row = db.execute(
+            "SELECT * FROM ai_tasks WHERE user_id = ? AND kind = ? AND idempotency_key = ?",
+            (user_id, kind, idempotency_key)
+        ).fetchone()
+        return _task_from_row(row) if row else None
+
+    def find(self, user_id: int, kind: str, idempotency_key: str) -> Optional[Dict[str, Any]]:
+        return self._find_by_key(self._connection(), user_id, kind, idempotency_key)
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute("SELECT * FROM ai_tasks WHERE id = ?", (task_id,)).fetchone()
+        return _task_from_row(row) if row else None
+
+    def list_for_user(self, user_id: int, limit: int) -> List[Dict[str, Any]]:
+        rows = self._connection().execute(
+            "SELECT * FROM ai_tasks WHERE user_id = ? ORDER BY created_at DESC LIMIT ?", (user_id, limit)
+        ).fetchall()
+        return [_task_from_row(row) for row in rows]
+
+    def claim(self, task_id: str, owner: str, lease: float) -> Optional[Dict[str, Any]]:
+        """Move a queued task to running under a lease held by `owner`; None if another worker got it first"""
+        now = time.time()
+        cursor = self._connection().execute(
+            "UPDATE ai_tasks SET status = 'running', attempts = attempts + 1, started_at = ?, "
+            "owner = ?, lease_expires_at = ? WHERE id = ? AND status = 'queued'",
+            (now, owner, now + lease, task_id)
+        )
+        return self.get(task_id) if cursor.rowcount else None
+
+    def renew(self, owner: str, task_ids: List[str], lease: float) -> int:
+        """Extend the leases `owner` still holds on these running tasks"""
+        if not task_ids:
+            return 0
+        placeholders = ", ".join("?" for _ in task_ids)
+        cursor = self._connection().execute(
+            f"UPDATE ai_tasks SET lease_expires_at = ? "
+            f"WHERE owner = ? AND status = 'running' AND id IN ({placeholders})",
+            (time.time() + lease, owner, *task_ids)
+        )
+        return cursor.rowcount
+
+    def finish(self, task_id: str, owner: str, result: Any = None, error: Optional[str] = None) -> bool:
+        """Record the outcome of a run; False if the lease was lost and the task now belongs to someone else"""
+        cursor = self._connection().execute(
+            "UPDATE ai_tasks SET status = ?, result = ?, error = ?, finished_at = ?, lease_expires_at = NULL "
+            "WHERE id = ? AND owner = ? AND status = 'running'",
+            ("failed" if error is not None else "succeeded",
+             json.dumps(result) if error is None else None, error, time.time(), task_id, owner)
+        )
+        return cursor.rowcount > 0
+
+    def cancel(self, task_id: str) -> bool:
+        """Mark a queued or running task cancelled; False if it already finished"""
+        cursor = self._connection().execute(
+            "UPDATE ai_tasks SET status = 'cancelled', finished_at = ? WHERE id = ? AND status IN ('queued', 'running')",
+            (time.time(), task_id)
+        )
+        return cursor.rowcount > 0
+
+    def requeue(self, task_id: str, owner: str, error: str) -> bool:
+        cursor = self._connection().execute(
+            "UPDATE ai_tasks SET status = 'queued', error = ?, owner = NULL, lease_expires_at = NULL "
+            "WHERE id = ? AND owner = ? AND status = 'running'",
+            (error, task_id, owner)
+        )
+        return cursor.rowcount > 0
+
+    def recover_expired(self, max_attempts: int, legacy_stale_after: float) -> List[Tuple[str, str]]:
+        """Requeue running tasks whose lease ran out, failing those out of attempts; returns the requeued ids and kinds.
+
+        Rows from before leases existed have no expiry and count as expired
+        `legacy_stale_after` seconds after they started.
+        """
+        db = self._connection()
+        now = time.time()
+        expired = (
+            "status = 'running' AND COALESCE(lease_expires_at, started_at + ?) < ?"
+        )
+        db.execute(
+            "UPDATE ai_tasks SET status = 'failed', error = 'Interrupted too many times', finished_at = ?, "
+            f"lease_expires_at = NULL WHERE {expired} AND attempts >= ?",
+            (now, legacy_stale_after, now, max_attempts)
+        )
+        rows = db.execute(
+            f"SELECT id, kind FROM ai_tasks WHERE {expired} ORDER BY created_at", (legacy_stale_after, now)
+        ).fetchall()
+        recovered = []
+        for row in rows:
+            # Every process sweeps; only the one whose update lands queues the task
+            cursor = db.execute(
+                "UPDATE ai_tasks SET status = 'queued', owner = NULL, lease_expires_at = NULL "
+                f"WHERE id = ? AND {expired}",
+                (row["id"], legacy_stale_after, now)
+            )
+            if cursor.rowcount:
+                recovered.append((row["id"], row["kind"]))
+        return recovered
+
+    def release(self, owner: str) -> int:
+        """Expire every lease `owner` holds so the next sweep anywhere requeues its running tasks"""
+        cursor = self._connection().execute(
+            "UPDATE ai_tasks SET lease_expires_at = ? WHERE owner = ? AND status = 'running'", (time.time(), owner)
+        )
+        return cursor.rowcount
+
+    def queued(self) -> List[Tuple[str, str]]:
+        """Id and kind of every queued task, oldest first"""
+        rows = self._connection().execute(
+            "SELECT id, kind FROM ai_tasks WHERE status = 'queued' ORDER BY created_at"
+        ).fetchall()
+        return [(row["id"], row["kind"]) for row in rows]
+
+    def prune(self, older_than: float) -> int:
+        cursor = self._connection().execute(
+            "DELETE FROM ai_tasks WHERE status IN ('succeeded', 'failed', 'cancelled') AND finished_at < ?",
+            (time.time() - older_than,)
+        )
+        return cursor.rowcount
+
+    def count_created_since(self, kind: str, since: float, user_id: Optional[int] = None) -> int:
+        """Tasks of `kind` created after `since`, for one user or everyone"""
+        query = "SELECT COUNT(*) FROM ai_tasks WHERE kind = ? AND created_at >= ?"
+        params: List[Any] = [kind, since]
+        if user_id is not None:
+            query += " AND user_id = ?"
+            params.append(user_id)
+        return self._connection().execute(query, params).fetchone()[0]
+
+    def count_by_status(self) -> Dict[str, int]:
+        rows = self._connection().execute("SELECT status, COUNT(*) AS n FROM ai_tasks GROUP BY status").fetchall()
+        return {row["status"]: row["n"] for row in rows}
+
+def _timestamp(value: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(value, timezone.utc).isoformat() if value is not None else None
+
+def _task_from_row(row: sqlite3.Row) -> Dict[str, Any]:
+    return {
+        "id": row["id"],
+        "user_id": row["user_id"],
+        "kind": row["kind"],
+        "payload": json.loads(row["payload"]),
+        "status": row["status"],
+        "result": json.loads(row["result"]) if row["result"] is not None else None,
+        "error": row["error"],
+        "attempts": row["attempts"],
+        "created_at": _timestamp(row["created_at"]),
+        "started_at": _timestamp(row["started_at"]),
+        "finished_at": _timestamp(row["finished_at"])
+    }
+
+def _is_retryable(error: BaseException) -> bool:
+    """Look through wrapped exceptions for an upstream failure worth trying again"""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if isinstance(error, CircuitOpenError) or (isinstance(error, Exception) and is_transient(error)):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+class TaskQueue:
+    """Bounded pool of workers running persisted AI tasks in the background, lowest priority number first.
+
+    The store is opened by start(). SQLite can wait up to its busy timeout for
+    another process's write lock, so every store call runs in a thread rather
+    than on the event loop.
+    """
+
+    def __init__(self, db_path: str, workers: int, max_pending: int, max_attempts: int,
+                 retry_delay: float, timeout: float, retention: float, lease: float = 60,
+                 sweep_interval: float = 20):
+        self.db_path = db_path
+        self.store: Optional[TaskStore] = None
+        self.workers = max(1, workers)
+        self.max_pending = max_pending
+        self.max_attempts = max(1, max_attempts)
+        self.retry_delay = retry_delay
+        self.timeout = timeout
+        self.retention = retention
+        self.lease = lease
+        self.sweep_interval = sweep_interval
+        # Leases name the process that holds them; a restarted process is a new owner
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.handlers: Dict[str, TaskHandler] = {}
+        self.priorities: Dict[str, int] = {}
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._sequence = itertools.count()
+        self._queued_ids = set()
+        self._in_progress: Dict[str, asyncio.Future] = {}
+        self._cancel_requested = set()
+        self._workers: List[asyncio.Task] = []
+        self._sweeper: Optional[asyncio.Task] = None
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.retried = 0
+        self.cancelled = 0
+        self.recovered = 0
+        self.leases_lost = 0
+
+    def register(self, kind: str, handler: TaskHandler, priority: int = 0) -> None:
+        """Handlers must be safe to run again for the same payload; interrupted tasks are retried.
+
+        Queued tasks with a lower `priority` number are started first; kinds with
+        equal priority run in submission order.
+        """
+        self.handlers[kind] = handler
+        self.priorities[kind] = priority
+
+    async def _db(self, method: str, *args, **kwargs) -> Any:
+        """Run a TaskStore method off the event loop"""
+        if self.store is None:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Background AI tasks are not running"
+            )
+        return await asyncio.to_thread(getattr(self.store, method), *args, **kwargs)
+
+    async def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        return await self._db("get", task_id)
+
+    async def list_for_user(self, user_id: int, limit: int) -> List[Dict[str, Any]]:
+        return await self._db("list_for_user", user_id, limit)
+
+    async def count_created_since(self, kind: str, since: float, user_id: Optional[int] = None) -> int:
+        return await self._db("count_created_since", kind, since, user_id)
+
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def _enqueue(self, task_id: str, kind: str) -> None:
+        if self._queue is None:
+            return
+        self._queued_ids.add(task_id)
+        self._queue.put_nowait((self.priorities.get(kind, 0), next(self._sequence), task_id))
+
+    async def submit(self, user_id: int, kind: str, payload: Dict[str, Any],
+                     idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+        """Persist a task and queue it; resubmitting an idempotency key returns the original task"""
+        if kind not in self.handlers:
+            raise ValueError(f"No handler registered for AI task kind '{kind}'")
+        if self._queue is None:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Background AI tasks are not running"
+            )
+        if self._queue.qsize() >= self.max_pending:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many background AI tasks pending. Try again later.",
+                headers={"Retry-After": "30"}
+            )
+        task = await self._db("create", user_id, kind, payload, idempotency_key)
+        # A resubmitted key returns the original task, which is already queued, running or done
+        if task["status"] == "queued" and task["id"] not in self._queued_ids:
+            self._enqueue(task["id"], kind)
+        return task
+
+    async def cancel(self, user_id: int, kind: str, idempotency_key: str) -> bool:
+        """Cancel the task submitted with this key, interrupting it if it is running"""
+        task = await self._db("find", user_id, kind, idempotency_key)
+        if task is None or not await self._db("cancel", task["id"]):
+            return False
+        running = self._in_progress.get(task["id"])
+        if running is not None:
+            self._cancel_requested.add(task["id"])
+            running.cancel()
+        self.cancelled += 1
+        logger.info(f"AI task {task['id']} ({kind}) cancelled")
+        return True
+
+    async def _worker(self) -> None:
+        while True:
+            _, _, task_id = await self._queue.get()
+            self._queued_ids.discard(task_id)
+            try:
+                await self._execute(task_id)
+            except Exception as error:
+                logger.error(f"AI task worker crashed on {task_id}: {error}", exc_info=True)
+            finally:
+                self._queue.task_done()
+
+    async def _execute(self, task_id: str) -> None:
+        task = await self._db("claim", task_id, self.owner, self.lease)
+        if task is None:
+            return
+        handler = self.handlers.get(task["kind"])
+        if handler is None:
+            await self._db("finish", task_id, self.owner, error=f"No handler registered for AI task kind '{task['kind']}'")
+            self.failed += 1
+            return
+
+        self.running += 1
+        run = asyncio.ensure_future(asyncio.wait_for(handler(task["user_id"], task["payload"]), timeout=self.timeout))
+        self._in_progress[task_id] = run
+        try:
+            result = await run
+        except asyncio.CancelledError:
+            if task_id not in self._cancel_requested:
+                raise
+            # Cancelled through cancel(); the store already says so
+            self._cancel_requested.discard(task_id)
+        except Exception as error:
+            message = str(error) or type(error).__name__
+            if isinstance(error, asyncio.TimeoutError):
+                message = f"Task timed out after {self.timeout:.0f}s"
+            if (isinstance(error, asyncio.TimeoutError) or _is_retryable(error)) and task["attempts"] < self.max_attempts:
+                delay = self.retry_delay * task["attempts"]
+                if await self._db("requeue", task_id, self.owner, message):
+                    logger.warning(f"AI task {task_id} failed ({message}); retrying in {delay:.0f}s")
+                    self.retried += 1
+                    self._queued_ids.add(task_id)
+                    asyncio.get_running_loop().call_later(delay, self._enqueue, task_id, task["kind"])
+                else:
+                    self._lease_lost(task_id)
+            else:
+                logger.error(f"AI task {task_id} ({task['kind']}) failed: {message}")
+                if await self._db("finish", task_id, self.owner, error=message):
+                    self.failed += 1
+                else:
+                    self._lease_lost(task_id)
+        else:
+            if await self._db("finish", task_id, self.owner, result=result):
+                self.completed += 1
+            else:
+                self._lease_lost(task_id)
+        finally:
+            self.running -= 1
+            self._in_progress.pop(task_id, None)
+
+    def _lease_lost(self, task_id: str) -> None:
+        # The lease expired mid-run (e.g. the loop was blocked) and a sweep handed the task to another run
+        self.leases_lost += 1
+        logger.warning(f"AI task {task_id} lost its lease before finishing; its result was discarded")
+
+    async def sweep(self) -> int:
+        """Renew this process's leases and requeue tasks whose owner stopped renewing theirs"""
+        await self._db("renew", self.owner, list(self._in_progress), self.lease)
+        recovered = await self._db("recover_expired", self.max_attempts, legacy_stale_after=self.timeout)
+        for task_id, kind in recovered:
+            self._enqueue(task_id, kind)
+        if recovered:
+            self.recovered += len(recovered)
+            logger.warning(f"Requeued {len(recovered)} AI tasks whose worker stopped renewing its lease")
+        return len(recovered)
+
+    async def _sweep_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                await self.sweep()
+            except Exception as error:
+                logger.error(f"AI task lease sweep failed: {error}", exc_info=True)
+
+    async def start(self) -> None:
+        if self._workers:
+            return
+        if self.store is None:
+            # Opened here rather than at import so importing the app never creates the file
+            self.store = await asyncio.to_thread(TaskStore, self.db_path)
+        self._queue = asyncio.PriorityQueue()
+        self._queued_ids.clear()
+        pruned = await self._db("prune", self.retention)
+        recovered = await self.sweep()
+        for task_id, kind in await self._db("queued"):
+            if task_id not in self._queued_ids:
+                self._enqueue(task_id, kind)
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._sweeper = asyncio.create_task(self._sweep_periodically())
+        logger.info(f"AI task queue started with {self.workers} workers, {self.pending()} queued tasks "
+                    f"({recovered} recovered from expired leases), {pruned} old tasks pruned")
+
+    async def stop(self) -> None:
+        tasks = self._workers + ([self._sweeper] if self._sweeper is not None else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        # Runs interrupted by shutdown are picked up at the next start instead of waiting out their lease
+        if self.store is not None:
+            await self._db("release", self.owner)
+        self._workers = []
+        self._sweeper = None
+        self._queue = None
+
+    async def get_stats(self) -> Dict[str, Any]:
+        return {
+            'workers': self.workers,
+            'queued': self.pending(),
+            'running': self.running,
+            'completed': self.completed,
+            'failed': self.failed,
+            'retried': self.retried,
+            'cancelled': self.cancelled,
+            'recovered': self.recovered,
+            'leases_lost': self.leases_lost,
+            'stored': await self._db("count_by_status") if self.store is not None else {}
+        }
+
+class BackgroundOptions:
+    """Query and header parameters for routes that can run as background AI tasks"""
+
+    def __init__(
+        self,
+        background: bool = Query(False, description="Return 202 with a task id instead of waiting for the result"),
+        idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+    ):
+        self.background = background
+        self.idempotency_key = idempotency_key
+
+def task_accepted(task: Dict[str, Any]) -> JSONResponse:
+    """202 response pointing the client at the task status endpoint"""
+    status_url = f"/api/v1/ai/tasks/{task['id']}"
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={"task_id": task["id"], "status": task["status"], "status_url": status_url},
+        headers={"Location": status_url}
+    )
+
+def public_task(task: Dict[str, Any]) -> Dict[str, Any]:
+    """Task fields returned to clients; the request payload stays server-side"""
+    return {key: value for key, value in task.items() if key not in ("payload", "user_id")}
+
+# Shared by every route module in this process; started from the app lifespan
+ai_task_queue = TaskQueue(
+    db_path=settings.AI_TASKS_DB_PATH,
+    workers=settings.AI_TASK_WORKERS,
+    max_pending=settings.AI_TASK_MAX_PENDING,
+    max_attempts=settings.AI_TASK_MAX_ATTEMPTS,
+    retry_delay=settings.AI_TASK_RETRY_DELAY,
+    timeout=settings.AI_TASK_TIMEOUT,
+    retention=settings.AI_TASK_RETENTION_HOURS * 3600,
+    lease=settings.AI_TASK_LEASE_SECONDS,
+    sweep_interval=settings.AI_TASK_SWEEP_INTERVAL
+)
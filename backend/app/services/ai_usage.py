@@ -0,0 +1,65 @@
+import logging
+from typing import Dict, Any, Optional
+
+from app.services.ai_metrics import AI_INPUT_TOKENS, AI_OUTPUT_TOKENS, AI_COST_DOLLARS, estimate_cost
+
+logger = logging.getLogger(__name__)
+
+class TokenUsageTracker:
+    """Token totals per model, splitting input tokens the provider served from its prompt prefix cache.
+
+    Streamed completions report no usage, so their backends record a tokenizer estimate instead.
+    """
+
+    def __init__(self):
+        self._models: Dict[str, Dict[str, float]] = {}
+
+    def record(self, model: str, task: str, prompt_tokens: int, cached_tokens: int, completion_tokens: int,
+               seconds: Optional[float] = None) -> None:
+        """Record one response's usage; `seconds` is the upstream time for non-streamed completions"""
+        cost = estimate_cost(model, prompt_tokens, cached_tokens, completion_tokens)
+        AI_INPUT_TOKENS.labels(task, model, 'true').inc(cached_tokens)
+        AI_INPUT_TOKENS.labels(task, model, 'false').inc(prompt_tokens - cached_tokens)
+        AI_OUTPUT_TOKENS.labels(task, model).inc(completion_tokens)
+        AI_COST_DOLLARS.labels(task, model).inc(cost)
+
+        usage = self._models.setdefault(model, {
+            'requests': 0, 'prompt_tokens': 0, 'cached_tokens': 0, 'completion_tokens': 0, 'cost': 0.0,
+            'cache_hits': 0, 'hit_seconds': 0.0, 'hit_timed': 0, 'miss_seconds': 0.0, 'miss_timed': 0
+        })
+        usage['requests'] += 1
+        usage['prompt_tokens'] += prompt_tokens
+        usage['cached_tokens'] += cached_tokens
+        usage['completion_tokens'] += completion_tokens
+        usage['cost'] += cost
+        if cached_tokens:
+            usage['cache_hits'] += 1
+        if seconds is not None:
+            # Latency is split by whether any of the prompt was cached, to show what prefix reuse saves
+            outcome = 'hit' if cached_tokens else 'miss'
+            usage[f'{outcome}_seconds'] += seconds
+            usage[f'{outcome}_timed'] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = {}
+        for model, usage in self._models.items():
+            prompt_tokens = usage['prompt_tokens']
+            stats[model] = {
+                'requests': usage['requests'],
+                'prompt_tokens': prompt_tokens,
+                'cached_tokens': usage['cached_tokens'],
+                'uncached_tokens': prompt_tokens - usage['cached_tokens'],
+                'cached_ratio': round(usage['cached_tokens'] / prompt_tokens, 3) if prompt_tokens else 0.0,
+                'completion_tokens': usage['completion_tokens'],
+                'estimated_cost': round(usage['cost'], 4),
+                'cache_hits': usage['cache_hits'],
+                'avg_latency_ms_cache_hit': _average_ms(usage['hit_seconds'], usage['hit_timed']),
+                'avg_latency_ms_cache_miss': _average_ms(usage['miss_seconds'], usage['miss_timed'])
+            }
+        return stats
+
+def _average_ms(seconds: float, count: int) -> Optional[float]:
+    return round(seconds / count * 1000, 1) if count else None
+
+# Shared by every LLM backend in this process
+ai_token_usage = TokenUsageTracker()
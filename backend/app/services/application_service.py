@@ -79,7 +79,7 @@ class ApplicationService:
                     'applied_date': app.applied_date.isoformat() if app.applied_date else None,
                     'last_updated': app.last_updated.isoformat() if app.last_updated else None,
                     'resume_version': resume.version_name if resume else 'Unknown',
-                    'job_description': job.description_text[:100] + "..." if job and job.description_text else 'No description',
+                    'job_description': job.description[:100] + "..." if job and job.description else 'No description',
                     'resume_id': app.resume_id,
                     'job_id': app.job_id
                 })
@@ -267,7 +267,7 @@ class ApplicationService:
                     } if resume else None,
                     'job': {
                         'id': job.id if job else None,
-                        'description': job.description_text if job else None,
+                        'description': job.description if job else None,
                         'requirements': job.requirements_extracted if job else None,
                         'keywords': eval(job.keywords) if job and job.keywords else []
                     } if job else None
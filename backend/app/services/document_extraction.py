@@ -0,0 +1,303 @@
+import asyncio
+import mmap
+import time
+import logging
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, List, Optional, Set, Tuple
+
+from prometheus_client import Gauge, Histogram
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+EXTRACTION_SECONDS = Histogram(
+    'hireflow_document_extraction_duration_seconds',
+    'Time to extract text from an uploaded document, including time queued for a worker',
+    ['file_type', 'outcome'],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+)
+EXTRACTIONS_IN_FLIGHT = Gauge(
+    'hireflow_document_extractions_in_flight',
+    'Documents being extracted or waiting for an extraction worker'
+)
+EXTRACTION_WORKERS = Gauge(
+    'hireflow_document_extraction_workers',
+    'Extraction worker processes; in-flight extractions above this are queued'
+)
+
+@contextmanager
+def _mapped(path: str) -> Iterator[mmap.mmap]:
+    """Read-only memory map of a spooled upload; pages are loaded as the parser touches them"""
+    with open(path, 'rb') as handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        yield mapped
+
+def _join(processes: List[multiprocessing.Process]) -> None:
+    for process in processes:
+        process.join(timeout=5)
+
+def extract_pdf_pages(path: str, start: int, stop: int, max_pages: int) -> Tuple[int, List[str]]:
+    """Page count and the text of pages [start, stop) of a PDF file; runs in an extraction worker"""
+    import PyPDF2
+
+    with _mapped(path) as mapped:
+        pdf_reader = PyPDF2.PdfReader(mapped)
+        page_count = len(pdf_reader.pages)
+        if page_count > max_pages:
+            raise Exception(f"PDF has {page_count} pages; at most {max_pages} are supported")
+
+        texts = []
+        for page_num in range(start, min(stop, page_count)):
+            try:
+                texts.append(pdf_reader.pages[page_num].extract_text() or "")
+            except Exception as page_error:
+                logger.warning(f"Failed to extract text from page {page_num + 1}: {page_error}")
+                texts.append("")
+    return page_count, texts
+
+def extract_docx_text(path: str) -> str:
+    """Extract text from a DOCX file; runs in an extraction worker"""
+    import docx
+
+    # zipfile needs a seekable file object, which mmap is not; it reads the archive through the handle
+    doc = docx.Document(path)
+    parts = []
+
+    # Extract text from paragraphs
+    for paragraph in doc.paragraphs:
+        text = paragraph.text
+        if text.strip():
+            parts.append(text)
+
+    # Extract text from tables
+    for table in doc.tables:
+        for row in table.rows:
+            for cell in row.cells:
+                text = cell.text
+                if text.strip():
+                    parts.append(text)
+
+    text = "\n".join(parts).strip()
+    if not text:
+        raise Exception("No text could be extracted from DOCX")
+
+    return text
+
+class DocumentExtractor:
+    """Runs PDF and DOCX parsing in a process pool so a large upload never blocks the event loop.
+
+    The pool is created on first use. Longer PDFs are split into page ranges
+    that run on several workers at once. A document that overruns the timeout
+    fails its upload and retires the pool, so later uploads get fresh workers
+    instead of queueing behind it. The retired pool's processes are terminated
+    once its other documents finish or hit their own timeout, so a stuck
+    parser never outlives its upload by more than one timeout.
+    """
+
+    def __init__(self, workers: int, timeout: float, max_pages: int, max_bytes: int,
+                 max_tasks_per_worker: int = 100, pages_per_task: int = 4):
+        self.workers = max(0, workers)
+        self.timeout = timeout
+        self.max_pages = max_pages
+        self.max_bytes = max_bytes
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self.pages_per_task = max(1, pages_per_task)
+        self._pool: Optional[Executor] = None
+        self._in_flight: Dict[Executor, Set[asyncio.Future]] = {}
+        self._reapers: Set[asyncio.Task] = set()
+        self._retired_processes: List[multiprocessing.Process] = []
+        self.terminated = 0
+
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+        EXTRACTION_WORKERS.set(self.workers)
+
+    def _get_pool(self) -> Optional[Executor]:
+        """Process pool to run extraction in; None runs it in a thread instead"""
+        if self.workers == 0:
+            return None
+        if self._pool is None:
+            # Spawned workers never inherit the parent's event loop, threads or sockets
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                max_tasks_per_child=self.max_tasks_per_worker
+            )
+            logger.info(f"Started document extraction pool with {self.workers} workers")
+        return self._pool
+
+    def _retire_pool(self, pool: Optional[Executor]) -> None:
+        # Several page ranges of one document can fail together; only the pool they ran on is retired
+        if pool is None or pool is not self._pool:
+            return
+        self._pool = None
+        # shutdown() alone leaves a worker stuck in a pathological document running until it finishes
+        processes = list((getattr(pool, '_processes', None) or {}).values())
+        self._retired_processes.extend(processes)
+        pool.shutdown(wait=False)
+        reaper = asyncio.ensure_future(self._reap(pool, processes))
+        self._reapers.add(reaper)
+        reaper.add_done_callback(self._reapers.discard)
+
+    async def _reap(self, pool: Executor, processes: List[multiprocessing.Process]) -> None:
+        """Terminate a retired pool's workers once the other documents on it are done or out of time"""
+        others = [future for future in self._in_flight.pop(pool, set()) if not future.done()]
+        if others:
+            await asyncio.wait(others, timeout=self.timeout)
+        self._terminate(processes)
+        await asyncio.to_thread(_join, processes)
+        self._retired_processes = [process for process in self._retired_processes if process not in processes]
+        if processes:
+            logger.warning(f"Retired document extraction pool; terminated its {len(processes)} worker processes")
+
+    async def _run(self, deadline: float, function, *args):
+        """Run `function` on a worker, giving up at the document's deadline (loop time)"""
+        loop = asyncio.get_running_loop()
+        pool = self._get_pool()
+        future = loop.run_in_executor(pool, function, *args)
+        in_flight = self._in_flight.setdefault(pool, set()) if pool is not None else set()
+        in_flight.add(future)
+        try:
+            return await asyncio.wait_for(future, max(0, deadline - loop.time()))
+        except (asyncio.TimeoutError, BrokenProcessPool):
+            # Later documents get fresh workers instead of queueing behind a stuck or dead one
+            self._retire_pool(pool)
+            raise
+        finally:
+            in_flight.discard(future)
+
+    def _page_ranges(self, start: int, page_count: int) -> List[Tuple[int, int]]:
+        """Pages [start, page_count) split into at most one contiguous range per worker"""
+        remaining = page_count - start
+        if remaining <= 0:
+            return []
+        count = min(self.workers, -(-remaining // self.pages_per_task))
+        size = -(-remaining // count)
+        return [(first, min(first + size, page_count)) for first in range(start, page_count, size)]
+
+    async def _extract_pdf_text(self, path: str) -> str:
+        """Text of every PDF page, assembled once all page ranges are back.
+
+        The first range also reports the page count. The rest of the document
+        is then split into at most one range per worker, so a long PDF is
+        parsed at most once per worker rather than once per few pages.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        # A single worker gains nothing from splitting, and would re-read the PDF for every range
+        span = self.pages_per_task if self.workers > 1 else self.max_pages
+        page_count, texts = await self._run(deadline, extract_pdf_pages, path, 0, span, self.max_pages)
+        ranges = [
+            asyncio.ensure_future(self._run(deadline, extract_pdf_pages, path, first, stop, self.max_pages))
+            for first, stop in self._page_ranges(span, page_count)
+        ]
+        try:
+            for pending in ranges:
+                texts.extend((await pending)[1])
+        finally:
+            for pending in ranges:
+                pending.cancel()
+            await asyncio.gather(*ranges, return_exceptions=True)
+
+        # Joined once at the end; appending page by page copied the text so far for every page
+        text = "".join(
+            f"\n--- Page {page_num} ---\n{page_text}\n" for page_num, page_text in enumerate(texts, 1) if page_text
+        ).strip()
+        if not text:
+            raise Exception("No text could be extracted from PDF")
+        return text
+
+    async def extract(self, path: str, size: int, file_extension: str) -> str:
+        """Text of the .pdf, .docx or .doc document at `path`; workers read the file themselves"""
+        if size > self.max_bytes:
+            self.rejected += 1
+            raise Exception(f"File size {size} bytes exceeds maximum allowed size of {self.max_bytes} bytes")
+        if size == 0:
+            raise Exception("Uploaded file is empty")
+        if file_extension not in ['.pdf', '.docx', '.doc']:
+            raise Exception(f"Unsupported file type: {file_extension}")
+
+        file_type = file_extension.lstrip('.')
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        EXTRACTIONS_IN_FLIGHT.inc()
+        outcome = 'error'
+        start = time.perf_counter()
+        try:
+            if file_extension == '.pdf':
+                text = await self._extract_pdf_text(path)
+            else:
+                deadline = asyncio.get_running_loop().time() + self.timeout
+                text = await self._run(deadline, extract_docx_text, path)
+            outcome = 'success'
+            self.completed += 1
+            return text
+        except asyncio.TimeoutError:
+            outcome = 'timeout'
+            self.timeouts += 1
+            logger.warning(f"Text extraction for a {size} byte {file_type} document timed out")
+            raise Exception(f"Text extraction timed out after {self.timeout:g}s")
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); the next upload starts a new pool
+            self.failed += 1
+            raise Exception("Text extraction worker exited unexpectedly")
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            seconds = time.perf_counter() - start
+            self.total_seconds += seconds
+            self.in_flight -= 1
+            EXTRACTIONS_IN_FLIGHT.dec()
+            EXTRACTION_SECONDS.labels(file_type, outcome).observe(seconds)
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+        for reaper in self._reapers:
+            reaper.cancel()
+        self._in_flight.clear()
+        # Workers of retired pools still waiting to be reaped would otherwise outlive the app
+        self._terminate(self._retired_processes)
+        _join(self._retired_processes)
+        self._retired_processes = []
+
+    def _terminate(self, processes: List[multiprocessing.Process]) -> None:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+                self.terminated += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        finished = self.completed + self.failed + self.timeouts
+        return {
+            'workers': self.workers,
+            'in_flight': self.in_flight,
+            'queued': max(0, self.in_flight - self.workers) if self.workers else 0,
+            'peak_in_flight': self.peak_in_flight,
+            'completed': self.completed,
+            'failed': self.failed,
+            'timeouts': self.timeouts,
+            'rejected': self.rejected,
+            'terminated_workers': self.terminated,
+            'avg_ms': round(self.total_seconds / finished * 1000, 1) if finished else 0.0
+        }
+
+# Shared by every upload in this process; shut down from the app lifespan
+document_extractor = DocumentExtractor(
+    workers=settings.DOCUMENT_EXTRACTION_WORKERS,
+    timeout=settings.DOCUMENT_EXTRACTION_TIMEOUT,
+    max_pages=settings.DOCUMENT_MAX_PAGES,
+    max_bytes=settings.MAX_FILE_SIZE,
+    max_tasks_per_worker=settings.DOCUMENT_EXTRACTION_MAX_TASKS_PER_WORKER,
+    pages_per_task=settings.DOCUMENT_PDF_PAGES_PER_TASK
+)
@@ -0,0 +1,98 @@
+import hashlib
+import logging
+from typing import Dict, Any, Optional
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.job import JobPosting
+from app.services.ai_similarity_cache import SimilarityCache
+
+logger = logging.getLogger(__name__)
+
+# Query parameters job boards and ad networks add for attribution; they never change the posting
+TRACKING_PARAMS = {
+    'gclid', 'fbclid', 'msclkid', 'ref', 'refid', 'referer', 'referrer', 'source', 'src',
+    'trk', 'trkinfo', 'trackingid', 'tracking_id', 'from', 'campaign', 'lipi', 'ebp'
+}
+
+def normalize_url(url: str) -> str:
+    """Canonical form of a posting URL: lowercase host, no www, fragment, tracking params or trailing slash"""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith('utm_') and key.lower() not in TRACKING_PARAMS
+    )
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit((parts.scheme.lower() or 'https', host, path, urlencode(query), ''))
+
+def content_hash(text: str) -> str:
+    """Hash of the description with whitespace normalized"""
+    return hashlib.sha256(' '.join(text.split()).encode('utf-8')).hexdigest()
+
+class JobPostingService:
+    """Finds or records the shared posting behind a user's job analysis"""
+
+    def find_by_url(self, db: Session, url: str) -> Optional[JobPosting]:
+        return db.query(JobPosting).filter(JobPosting.normalized_url == normalize_url(url)).first()
+
+    def get_or_create(self, db: Session, description_text: str, url: Optional[str] = None) -> JobPosting:
+        """The posting with this text, created if new; a known text seen at a new URL keeps its first URL"""
+        digest = content_hash(description_text)
+        posting = db.query(JobPosting).filter(JobPosting.content_hash == digest).first()
+        if posting is not None:
+            if url and posting.normalized_url is None:
+                posting.normalized_url = normalize_url(url)
+                self._commit_or_rollback(db)
+            return posting
+
+        posting = JobPosting(
+            normalized_url=normalize_url(url) if url else None,
+            content_hash=digest,
+            description_text=description_text
+        )
+        db.add(posting)
+        try:
+            db.commit()
+        except IntegrityError:
+            # Another request recorded the same posting first
+            db.rollback()
+            existing = db.query(JobPosting).filter(JobPosting.content_hash == digest).first()
+            if existing is None and url:
+                existing = self.find_by_url(db, url)
+            if existing is None:
+                raise
+            return existing
+        db.refresh(posting)
+        logger.info(f"Recorded job posting {posting.id}")
+        return posting
+
+    def analysis_for(self, posting: JobPosting, company: str, role: str) -> Optional[Dict[str, Any]]:
+        """The stored analysis, if it was run for the same company and role"""
+        if posting.analysis is None or posting.analysis_inputs != SimilarityCache.scope(company, role):
+            return None
+        return posting.analysis
+
+    def save_analysis(self, db: Session, posting: JobPosting, analysis: Dict[str, Any],
+                      company: str, role: str) -> None:
+        # The first analysis stays shared; rows from before inputs were recorded are replaced
+        if posting.analysis is not None and posting.analysis_inputs is not None:
+            return
+        posting.analysis = analysis
+        posting.analysis_inputs = SimilarityCache.scope(company, role)
+        db.commit()
+
+    def record_reuse(self, db: Session, posting: JobPosting) -> None:
+        # Incremented in SQL so concurrent reuses are all counted
+        posting.times_reused = JobPosting.times_reused + 1
+        db.commit()
+
+    def _commit_or_rollback(self, db: Session) -> None:
+        try:
+            db.commit()
+        except IntegrityError:
+            # The URL already belongs to another posting; keep this one without it
+            db.rollback()
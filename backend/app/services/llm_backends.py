@@ -0,0 +1,286 @@
+import abc
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import time
+import logging
+from typing import Dict, Any, List, Optional, AsyncIterator
+
+import openai
+
+from app.core.config import settings
+from app.services.ai_usage import ai_token_usage
+from app.services.prompt_builder import prompt_builder
+
+logger = logging.getLogger(__name__)
+
+Messages = List[Dict[str, str]]
+
+class LLMBackendError(Exception):
+    """Upstream completion failure raised by a backend"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+class LLMBackend(abc.ABC):
+    """Chat completion provider used by AIService"""
+
+    name = "base"
+
+    @abc.abstractmethod
+    async def complete(self, model: str, messages: Messages, temperature: float, max_tokens: int,
+                       json_schema: Optional[Dict[str, Any]] = None, task: str = "general") -> str:
+        """Return the full completion text; `json_schema` requests a JSON object matching it.
+
+        `task` only labels the usage this call records.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def stream(self, model: str, messages: Messages, temperature: float,
+                     max_tokens: int, task: str = "general") -> AsyncIterator[str]:
+        """Yield completion text as it is produced"""
+        raise NotImplementedError
+        yield
+
+    @abc.abstractmethod
+    async def ping(self) -> bool:
+        """Cheap round trip to check the provider is answering"""
+        raise NotImplementedError
+
+class OpenAIBackend(LLMBackend):
+    """OpenAI chat completions API"""
+
+    name = "openai"
+
+    def __init__(self, api_key: str):
+        self.api_key = api_key
+        # Initialize client lazily to avoid import-time errors
+        self._client = None
+
+    @property
+    def client(self) -> openai.AsyncOpenAI:
+        if self._client is None:
+            if not self.api_key:
+                raise Exception("OPENAI_API_KEY environment variable not set")
+            # Retries are handled by ai_resilience so they are not multiplied by the SDK's own
+            self._client = openai.AsyncOpenAI(api_key=self.api_key, max_retries=0)
+        return self._client
+
+    async def complete(self, model: str, messages: Messages, temperature: float, max_tokens: int,
+                       json_schema: Optional[Dict[str, Any]] = None, task: str = "general") -> str:
+        # The schema itself travels in the prompt; json_object only guarantees syntactically valid JSON
+        options = {"response_format": {"type": "json_object"}} if json_schema is not None else {}
+        started_at = time.perf_counter()
+        response = await self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            **options
+        )
+        _record_usage(model, task, response.usage, time.perf_counter() - started_at)
+        return response.choices[0].message.content
+
+    async def stream(self, model: str, messages: Messages, temperature: float,
+                     max_tokens: int, task: str = "general") -> AsyncIterator[str]:
+        stream = await self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True
+        )
+        chunks = []
+        try:
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    chunks.append(delta)
+                    yield delta
+        finally:
+            # Streamed responses carry no usage on the pinned SDK; a stream cut short is billed for what it produced
+            _record_estimated_usage(model, task, messages, ''.join(chunks))
+
+    async def ping(self) -> bool:
+        response = await self.client.chat.completions.create(
+            model=settings.AI_FAST_MODEL,
+            messages=[{"role": "user", "content": "Say 'OK' if you're working."}],
+            max_tokens=10
+        )
+        return response.choices[0].message.content.strip().upper() == "OK"
+
+def _record_usage(model: str, task: str, usage: Any, seconds: Optional[float] = None) -> None:
+    if usage is None:
+        return
+    details = getattr(usage, 'prompt_tokens_details', None)
+    cached_tokens = getattr(details, 'cached_tokens', None) or 0
+    ai_token_usage.record(model, task, usage.prompt_tokens, cached_tokens, usage.completion_tokens, seconds)
+
+def _record_estimated_usage(model: str, task: str, messages: Messages, text: str) -> None:
+    """Usage of a streamed completion, counted with the prompt builder's tokenizer"""
+    counter = prompt_builder.counter
+    prompt_tokens = sum(counter.count(message['content']) for message in messages)
+    ai_token_usage.record(model, task, prompt_tokens, 0, counter.count(text))
+
+# Lines the fake backend stitches into responses; they mention the terms the response scanners look for
+FAKE_RESPONSE_LINES = [
+    "## Key Requirements and Qualifications",
+    "- Required: 3+ years of Python and SQL experience",
+    "- Must have experience with AWS and Docker in production",
+    "The company culture emphasizes ownership and a collaborative environment.",
+    "Salary range is competitive with strong benefits and equity.",
+    "* Growth opportunity: clear career path toward senior engineer",
+    "1. Improve the summary to include measurable outcomes (increase of 25% in users)",
+    "2. Add keywords such as react, git and node.js to the skills section",
+    "Consider a course or certification to learn Kubernetes.",
+    "Attend a conference to meet and connect with engineers in the network.",
+    "Build a side project to develop and create a portfolio piece.",
+    "Timeline: a 6 month plan with a clear goal for each quarter.",
+    "A practical solution to overcome this is to address the gap directly.",
+    "Use a simple format and structure; avoid complex layout or design.",
+    "This could improve your ATS score by 7 points.",
+    "Write a tailored cover letter that mentions the team mission.",
+    "Enhanced the description with stronger action verbs and added metrics.",
+    "Overall this candidate brings a well rounded background to the role.",
+    "Keep the tone confident but concise, and avoid jargon where possible."
+]
+
+_WORD_CHUNKS = re.compile(r'\S+\s*|\s+')
+
+class FakeLLMBackend(LLMBackend):
+    """Offline provider for load tests and benchmarks.
+
+    Response text is a pure function of the request, so caching and request
+    coalescing behave as they would upstream. Latency, failures and token
+    throughput are drawn from a seeded generator: time to first token is
+    log-normal around `latency_ms`, then tokens arrive at `tokens_per_second`.
+    """
+
+    name = "fake"
+
+    def __init__(self, latency_ms: float = 800, latency_sigma: float = 0.5, error_rate: float = 0.0,
+                 tokens_per_second: float = 50, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.tokens_per_second = tokens_per_second
+        self._rng = random.Random(seed)
+        self._seen_prefixes = set()
+        self.requests = 0
+        self.failures = 0
+
+    def _first_token_delay(self) -> float:
+        if self.latency_ms <= 0:
+            return 0.0
+        return self._rng.lognormvariate(math.log(self.latency_ms / 1000), self.latency_sigma)
+
+    def _token_delay(self) -> float:
+        return 1 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+    def _start_request(self) -> None:
+        self.requests += 1
+        if self._rng.random() < self.error_rate:
+            self.failures += 1
+            raise LLMBackendError("Simulated upstream failure from fake LLM backend", status_code=503)
+
+    def _record_usage(self, model: str, task: str, messages: Messages, text: str,
+                      seconds: Optional[float] = None) -> None:
+        """Report usage as a provider with prefix caching would: a repeated system message counts as cached"""
+        prefix = messages[0]['content'] if messages and messages[0]['role'] == 'system' else ''
+        prefix_key = hashlib.sha256(prefix.encode('utf-8')).digest()
+        cached_tokens = len(prefix) // 4 if prefix_key in self._seen_prefixes else 0
+        self._seen_prefixes.add(prefix_key)
+        prompt_tokens = sum(len(message['content']) for message in messages) // 4
+        ai_token_usage.record(model, task, prompt_tokens, cached_tokens, len(_WORD_CHUNKS.findall(text)), seconds)
+
+    def _response_text(self, model: str, messages: Messages, max_tokens: int,
+                       json_schema: Optional[Dict[str, Any]] = None) -> str:
+        digest = hashlib.sha256(json.dumps([model, messages]).encode('utf-8')).digest()
+        rng = random.Random(digest)
+        if json_schema is not None:
+            return json.dumps(_schema_instance(json_schema, json_schema, rng))
+        words = 0
+        lines = []
+        target = rng.randint(min(120, max_tokens), max(120, min(400, max_tokens * 3 // 4)))
+        while words < target:
+            line = rng.choice(FAKE_RESPONSE_LINES)
+            lines.append(line)
+            words += len(line.split())
+        return '\n'.join(lines)
+
+    async def complete(self, model: str, messages: Messages, temperature: float, max_tokens: int,
+                       json_schema: Optional[Dict[str, Any]] = None, task: str = "general") -> str:
+        self._start_request()
+        text = self._response_text(model, messages, max_tokens, json_schema)
+        tokens = len(_WORD_CHUNKS.findall(text))
+        delay = self._first_token_delay() + tokens * self._token_delay()
+        await asyncio.sleep(delay)
+        self._record_usage(model, task, messages, text, delay)
+        return text
+
+    async def stream(self, model: str, messages: Messages, temperature: float,
+                     max_tokens: int, task: str = "general") -> AsyncIterator[str]:
+        self._start_request()
+        text = self._response_text(model, messages, max_tokens)
+        await asyncio.sleep(self._first_token_delay())
+        token_delay = self._token_delay()
+        chunks = []
+        try:
+            for chunk in _WORD_CHUNKS.findall(text):
+                await asyncio.sleep(token_delay)
+                chunks.append(chunk)
+                yield chunk
+        finally:
+            self._record_usage(model, task, messages, ''.join(chunks))
+
+    async def ping(self) -> bool:
+        self._start_request()
+        await asyncio.sleep(self._first_token_delay())
+        return True
+
+def _schema_instance(schema: Dict[str, Any], root: Dict[str, Any], rng: random.Random, name: str = "value") -> Any:
+    """Smallest plausible value satisfying a pydantic-generated JSON schema"""
+    if '$ref' in schema:
+        schema = root['$defs'][schema['$ref'].rsplit('/', 1)[-1]]
+    if 'anyOf' in schema:
+        options = [option for option in schema['anyOf'] if option.get('type') != 'null']
+        return _schema_instance(options[0], root, rng, name) if options else None
+    kind = schema.get('type')
+    if kind == 'object':
+        return {
+            field: _schema_instance(field_schema, root, rng, field)
+            for field, field_schema in schema.get('properties', {}).items()
+        }
+    if kind == 'array':
+        return [_schema_instance(schema.get('items', {}), root, rng, name) for _ in range(rng.randint(1, 3))]
+    if kind == 'integer':
+        return rng.randint(schema.get('minimum', 0), schema.get('maximum', 10))
+    if kind == 'number':
+        return round(rng.uniform(schema.get('minimum', 0), schema.get('maximum', 10)), 2)
+    if kind == 'boolean':
+        return rng.random() < 0.5
+    return f"{name.replace('_', ' ')}: {rng.choice(FAKE_RESPONSE_LINES)}"
+
+def create_llm_backend() -> LLMBackend:
+    if settings.AI_BACKEND == "fake":
+        logger.info("Using fake LLM backend; AI responses are synthetic")
+        return FakeLLMBackend(
+            latency_ms=settings.AI_FAKE_LATENCY_MS,
+            latency_sigma=settings.AI_FAKE_LATENCY_SIGMA,
+            error_rate=settings.AI_FAKE_ERROR_RATE,
+            tokens_per_second=settings.AI_FAKE_TOKENS_PER_SECOND,
+            seed=settings.AI_FAKE_SEED
+        )
+    if settings.AI_BACKEND != "openai":
+        logger.warning(f"Unknown AI_BACKEND '{settings.AI_BACKEND}', using openai")
+    return OpenAIBackend(api_key=settings.OPENAI_API_KEY)
+
+# Shared by every AIService instance in this process
+llm_backend = create_llm_backend()
@@ -0,0 +1,179 @@
+import re
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+
+from app.core.config import settings
+
+try:
+    import tiktoken
+except ImportError:  # optional; token counts fall back to a character estimate
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r'\s+')
+
+# Context keys rendered into the prompt, in output order
+CONTEXT_BLOCKS: List[Tuple[str, str]] = [
+    ('user_resume', "USER'S CURRENT RESUME"),
+    ('job_description', "TARGET JOB DESCRIPTION"),
+    ('relevant_experience', "RELEVANT EXPERIENCE"),
+    ('skills', "USER'S SKILLS"),
+    ('resume_text', "RESUME TEXT"),
+    ('experience_text', "CURRENT DESCRIPTION"),
+    ('current_content', "CURRENT CONTENT"),
+    ('user_profile', "PROFILE"),
+    ('career_goals', "CAREER GOALS"),
+    ('current_challenges', "CURRENT CHALLENGES")
+]
+
+TRIM_MARKER = "\n[... trimmed to fit the prompt budget]"
+
+# Shorter blocks are only dropped as exact duplicates; a skill list or a one-line goal
+# showing up somewhere inside a resume is not the same as repeating it
+MIN_CONTAINED_BLOCK_CHARS = 200
+
+class TokenCounter:
+    """Counts tokens with tiktoken when its encoding is available, otherwise estimates ~4 characters a token"""
+
+    chars_per_token = 4
+
+    def __init__(self, model: str):
+        self.encoding = None
+        if tiktoken is not None:
+            try:
+                self.encoding = tiktoken.encoding_for_model(model)
+            except Exception as error:
+                # Unknown model or the BPE file could not be fetched
+                logger.warning(f"tiktoken encoding unavailable for {model}, estimating tokens: {error}")
+
+    def count(self, text: str) -> int:
+        if self.encoding is not None:
+            return len(self.encoding.encode(text, disallowed_special=()))
+        return -(-len(text) // self.chars_per_token)
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Longest prefix of `text` within `max_tokens`"""
+        if self.encoding is not None:
+            tokens = self.encoding.encode(text, disallowed_special=())
+            return text if len(tokens) <= max_tokens else self.encoding.decode(tokens[:max_tokens])
+        return text[:max_tokens * self.chars_per_token]
+
+def _repeats(normalized: str, earlier: str) -> bool:
+    if normalized == earlier:
+        return True
+    return len(normalized) >= MIN_CONTAINED_BLOCK_CHARS and normalized in earlier
+
+def _render(title: str, text: str) -> str:
+    return f"\n\n{title}:\n{text}"
+
+def _normalize(text: str) -> str:
+    return _WHITESPACE.sub(' ', text).strip().lower()
+
+class PromptBuilder:
+    """Appends context blocks to a user prompt, dropping duplicates and trimming to a per-task token budget"""
+
+    def __init__(self, counter: TokenCounter, budgets: Dict[str, int], default_budget: int):
+        self.counter = counter
+        self.budgets = budgets
+        self.default_budget = default_budget
+        self.prompts_built = 0
+        self.blocks_deduplicated = 0
+        self.tokens_deduplicated = 0
+        self.prompts_trimmed = 0
+        self.tokens_trimmed = 0
+
+    def budget_for(self, task: str) -> int:
+        return self.budgets.get(task, self.default_budget)
+
+    def build(self, system_prompt: str, user_prompt: str, context: Optional[Dict[str, Any]] = None,
+              task: str = "general") -> str:
+        """Render the user message for `task`"""
+        self.prompts_built += 1
+        blocks = self._unique_blocks(user_prompt, context or {})
+        if not blocks:
+            return user_prompt
+
+        budget = self.budget_for(task)
+        fixed = self.counter.count(system_prompt) + self.counter.count(user_prompt)
+        sizes = [self.counter.count(_render(title, text)) for title, text in blocks]
+        if budget > 0 and fixed + sum(sizes) > budget:
+            blocks = self._trim(blocks, sizes, budget - fixed, task)
+
+        context_str = ''.join(_render(title, text) for title, text in blocks)
+        return f"{user_prompt}\n{context_str}"
+
+    def _unique_blocks(self, user_prompt: str, context: Dict[str, Any]) -> List[Tuple[str, str]]:
+        """Context blocks that do not repeat the prompt or an earlier block"""
+        seen = [_normalize(user_prompt)]
+        blocks = []
+        for key, title in CONTEXT_BLOCKS:
+            value = context.get(key)
+            if not value:
+                continue
+            text = str(value)
+            normalized = _normalize(text)
+            if any(_repeats(normalized, earlier) for earlier in seen):
+                self.blocks_deduplicated += 1
+                self.tokens_deduplicated += self.counter.count(text)
+                continue
+            seen.append(normalized)
+            blocks.append((title, text))
+        return blocks
+
+    def _trim(self, blocks: List[Tuple[str, str]], sizes: List[int], available: int,
+              task: str) -> List[Tuple[str, str]]:
+        """Shrink the largest blocks first so every block keeps an equal share of what is left"""
+        allocation = _fair_shares(sizes, max(0, available))
+        trimmed = []
+        for (title, text), size, allowed in zip(blocks, sizes, allocation):
+            if allowed >= size:
+                trimmed.append((title, text))
+                continue
+            self.tokens_trimmed += size - allowed
+            room = allowed - self.counter.count(_render(title, TRIM_MARKER))
+            if room <= 0:
+                continue
+            prefix = self.counter.truncate(text, room)
+            # Prefer ending on a whole line
+            cut = prefix.rfind('\n')
+            if cut > len(prefix) // 2:
+                prefix = prefix[:cut]
+            trimmed.append((title, prefix + TRIM_MARKER))
+        self.prompts_trimmed += 1
+        logger.info(f"Trimmed {task} prompt context to {available} tokens")
+        return trimmed
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'tokenizer': 'tiktoken' if self.counter.encoding is not None else 'estimate',
+            'prompts_built': self.prompts_built,
+            'blocks_deduplicated': self.blocks_deduplicated,
+            'tokens_deduplicated': self.tokens_deduplicated,
+            'prompts_trimmed': self.prompts_trimmed,
+            'tokens_trimmed': self.tokens_trimmed
+        }
+
+def _fair_shares(sizes: List[int], available: int) -> List[int]:
+    """Give small blocks everything they need and split the rest evenly among the larger ones"""
+    shares = [0] * len(sizes)
+    remaining = available
+    pending = sorted(range(len(sizes)), key=lambda index: sizes[index])
+    while pending:
+        share = remaining // len(pending)
+        index = pending[0]
+        if sizes[index] > share:
+            for index in pending:
+                shares[index] = share
+            break
+        shares[index] = sizes[index]
+        remaining -= sizes[index]
+        pending.pop(0)
+    return shares
+
+# Shared by every AIService instance in this process
+prompt_builder = PromptBuilder(
+    counter=TokenCounter(settings.OPENAI_MODEL),
+    budgets=settings.AI_PROMPT_TOKEN_BUDGETS,
+    default_budget=settings.AI_PROMPT_DEFAULT_TOKEN_BUDGET
+)
@@ -0,0 +1,173 @@
+import asyncio
+import math
+import os
+import sqlite3
+import threading
+import time
+import logging
+from dataclasses import dataclass
+from typing import Dict, Tuple
+
+from fastapi import Depends, HTTPException, status
+
+from app.core.config import settings
+from app.models.user import User
+from app.services.auth import get_current_user
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class RateLimitDecision:
+    allowed: bool
+    remaining: float
+    retry_after: float  # seconds until the request would be allowed
+
+class InMemoryRateLimitBackend:
+    """Token buckets kept in this process; fine for a single worker"""
+
+    max_buckets = 10000
+    blocking = False
+
+    def __init__(self):
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def take(self, key: str, capacity: float, refill_rate: float, cost: float) -> RateLimitDecision:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated_at) * refill_rate)
+            decision = _spend(tokens, capacity, refill_rate, cost)
+            self._buckets[key] = (decision.remaining if decision.allowed else tokens, now)
+            if len(self._buckets) > self.max_buckets:
+                self._prune(now, capacity, refill_rate)
+            return decision
+
+    def _prune(self, now: float, capacity: float, refill_rate: float) -> None:
+        """Forget buckets that have refilled completely"""
+        full = [
+            key for key, (tokens, updated_at) in self._buckets.items()
+            if tokens + (now - updated_at) * refill_rate >= capacity
+        ]
+        for key in full:
+            del self._buckets[key]
+
+class SQLiteRateLimitBackend:
+    """Token buckets in a SQLite file so every worker on the host shares one budget per user"""
+
+    # take() can wait on another worker's write lock, so it runs off the event loop
+    blocking = True
+
+    def __init__(self, db_path: str):
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.db_path = db_path
+        self._local = threading.local()
+        with self._connection() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS ai_rate_limit_buckets ("
+                "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.db_path, timeout=5, isolation_level=None)
+            self._local.db = db
+        return db
+
+    def take(self, key: str, capacity: float, refill_rate: float, cost: float) -> RateLimitDecision:
+        now = time.time()
+        db = self._connection()
+        # BEGIN IMMEDIATE takes the write lock up front so concurrent workers serialize per request
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            row = db.execute(
+                "SELECT tokens, updated_at FROM ai_rate_limit_buckets WHERE key = ?", (key,)
+            ).fetchone()
+            tokens, updated_at = row if row else (capacity, now)
+            tokens = min(capacity, tokens + max(0.0, now - updated_at) * refill_rate)
+            decision = _spend(tokens, capacity, refill_rate, cost)
+            db.execute(
+                "INSERT OR REPLACE INTO ai_rate_limit_buckets (key, tokens, updated_at) VALUES (?, ?, ?)",
+                (key, decision.remaining if decision.allowed else tokens, now)
+            )
+            db.execute("COMMIT")
+            return decision
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+
+def _spend(tokens: float, capacity: float, refill_rate: float, cost: float) -> RateLimitDecision:
+    if tokens >= cost:
+        return RateLimitDecision(allowed=True, remaining=tokens - cost, retry_after=0.0)
+    if cost > capacity:
+        # Can never fit in the bucket; report a full refill as the wait
+        return RateLimitDecision(allowed=False, remaining=tokens, retry_after=capacity / refill_rate)
+    return RateLimitDecision(allowed=False, remaining=tokens, retry_after=(cost - tokens) / refill_rate)
+
+class TokenBucketLimiter:
+    """Per-key token bucket: `capacity` burst, refilled continuously at `per_hour` tokens an hour"""
+
+    def __init__(self, backend, capacity: int, per_hour: int, enabled: bool = True):
+        self.backend = backend
+        self.capacity = float(max(1, capacity))
+        self.refill_rate = max(1, per_hour) / 3600.0
+        self.enabled = enabled
+        self.allowed = 0
+        self.rejected = 0
+
+    async def acquire(self, key: str, cost: float = 1) -> RateLimitDecision:
+        if not self.enabled or cost <= 0:
+            return RateLimitDecision(allowed=True, remaining=self.capacity, retry_after=0.0)
+        if self.backend.blocking:
+            decision = await asyncio.to_thread(self.backend.take, key, self.capacity, self.refill_rate, cost)
+        else:
+            decision = self.backend.take(key, self.capacity, self.refill_rate, cost)
+        if decision.allowed:
+            self.allowed += 1
+        else:
+            self.rejected += 1
+        return decision
+
+    def get_stats(self) -> Dict[str, float]:
+        return {
+            'enabled': self.enabled,
+            'backend': type(self.backend).__name__,
+            'capacity': self.capacity,
+            'per_hour': round(self.refill_rate * 3600),
+            'allowed': self.allowed,
+            'rejected': self.rejected
+        }
+
+def _create_backend():
+    if settings.AI_RATE_LIMIT_BACKEND == "sqlite":
+        return SQLiteRateLimitBackend(settings.AI_RATE_LIMIT_DB_PATH)
+    if settings.AI_RATE_LIMIT_BACKEND != "memory":
+        logger.warning(f"Unknown AI_RATE_LIMIT_BACKEND '{settings.AI_RATE_LIMIT_BACKEND}', using memory")
+    return InMemoryRateLimitBackend()
+
+ai_rate_limiter = TokenBucketLimiter(
+    backend=_create_backend(),
+    capacity=settings.AI_RATE_LIMIT_BURST,
+    per_hour=settings.AI_RATE_LIMIT,
+    enabled=settings.AI_RATE_LIMIT_ENABLED
+)
+
+async def check_ai_rate_limit(user_id: int, cost: float = 1) -> None:
+    """Spend `cost` AI requests from the user's budget or raise 429 with Retry-After"""
+    decision = await ai_rate_limiter.acquire(f"user:{user_id}", cost)
+    if not decision.allowed:
+        retry_after = max(1, math.ceil(decision.retry_after))
+        logger.warning(f"AI rate limit exceeded for user {user_id}, retry after {retry_after}s")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"AI request limit of {settings.AI_RATE_LIMIT} per hour exceeded. Try again in {retry_after} seconds.",
+            headers={"Retry-After": str(retry_after)}
+        )
+
+async def enforce_ai_rate_limit(current_user: User = Depends(get_current_user)) -> User:
+    """Dependency for AI routes: authenticates the user and charges one request to their budget"""
+    await check_ai_rate_limit(current_user.id)
+    return current_user
@@ -0,0 +1,391 @@
+import re
+import logging
+from typing import Dict, Any, List, NamedTuple, Optional, Tuple
+
+from app.core.config import settings
+from app.schemas.ai_output import ResumeParseOutput
+
+logger = logging.getLogger(__name__)
+
+# Header text (lowercased, '&' read as 'and', trailing colon dropped) for each section
+SECTION_ALIASES = {
+    'personal': ['contact', 'contact information', 'contact info', 'personal information', 'personal details'],
+    'summary': ['summary', 'professional summary', 'objective', 'career objective', 'profile',
+                'professional profile', 'about me'],
+    'education': ['education', 'academic background', 'academics', 'education and training',
+                  'education and certifications'],
+    'experience': ['experience', 'work experience', 'professional experience', 'relevant experience',
+                   'employment', 'employment history', 'work history', 'internships', 'internship experience',
+                   'career history', 'industry experience'],
+    'skills': ['skills', 'technical skills', 'core competencies', 'competencies', 'skills and interests',
+               'technologies', 'tools', 'key skills', 'skills summary', 'technical proficiencies',
+               'skills and abilities'],
+    'projects': ['projects', 'personal projects', 'academic projects', 'selected projects', 'portfolio',
+                 'relevant projects', 'technical projects'],
+    'activities': ['activities', 'leadership', 'leadership experience', 'extracurricular activities',
+                   'extracurriculars', 'volunteer experience', 'volunteering', 'leadership and activities',
+                   'involvement', 'campus involvement'],
+    'awards': ['awards', 'honors', 'honors and awards', 'awards and honors', 'achievements', 'certifications',
+               'certificates', 'awards and certifications'],
+    'other': ['interests', 'hobbies', 'references', 'languages', 'publications', 'additional information']
+}
+SECTION_HEADERS = {
+    section: re.compile(r'(?:' + '|'.join(re.escape(alias) for alias in aliases) + r')')
+    for section, aliases in SECTION_ALIASES.items()
+}
+MAX_HEADER_WORDS = 5
+
+PAGE_MARKER = re.compile(r'^--- Page \d+ ---$')
+BULLET = re.compile(r'^(?:[•●▪◦‣∙○■□➢►✓*]|[-–—](?=\s)|\d{1,2}[.)](?=\s))\s*')
+
+EMAIL = re.compile(r'[\w.+-]+@[\w-]+(?:\.[\w-]+)+')
+PHONE = re.compile(r'(?<!\d)(?:\+?\d{1,2}[\s.-]?)?\(?\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4}(?!\d)')
+LINKEDIN = re.compile(r'(?:https?://)?(?:www\.)?linkedin\.com/in/[\w-]+/?', re.IGNORECASE)
+GITHUB = re.compile(r'(?:https?://)?(?:www\.)?github\.com/[\w-]+/?', re.IGNORECASE)
+URL = re.compile(r'(?:https?://|www\.)\S+', re.IGNORECASE)
+# "City, ST" or "City, Country"; a bare capitalized word after the comma is too often a company or school
+LOCATION = re.compile(
+    r'\b(?:[A-Z][a-zA-Z.]+ ){0,2}[A-Z][a-zA-Z.]+, (?:[A-Z]{2}|USA|United States|United Kingdom|Canada|India|'
+    r'Germany|France|Australia|Singapore|Ireland|Netherlands)\b|\bRemote\b'
+)
+NAME = re.compile(r"^[A-Z][a-zA-Z.'-]*(?: [A-Z][a-zA-Z.'-]*){1,3}$")
+
+_MONTH = r'(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?'
+_SEASON = r'(?:spring|summer|fall|autumn|winter)'
+_YEAR = r'(?:19|20)\d{2}'
+_DATE = rf'(?:(?:{_MONTH}|{_SEASON})\s+{_YEAR}|\d{{1,2}}/{_YEAR}|{_YEAR})'
+DATE_RANGE = re.compile(rf'\(?\b({_DATE})\s*(?:-|–|—|to)\s*({_DATE}|present|current|now)\b\)?', re.IGNORECASE)
+SINGLE_DATE = re.compile(rf'\(?\b(?:expected\s+|graduat\w*\s+)?({_DATE})\b\)?', re.IGNORECASE)
+
+GPA = re.compile(r'\bgpa\b[:\s]*([0-4]\.\d{1,2})(?:\s*/\s*[45]\.0+)?', re.IGNORECASE)
+DEGREE = re.compile(
+    r"(?<![a-z])(?:b\.?s\.?|b\.?a\.?|m\.?s\.?|m\.?a\.?|mba|ph\.?d\.?|b\.?sc|m\.?sc|b\.?eng|m\.?eng|"
+    r"bachelor(?:'s)?|master(?:'s)?|associate(?:'s)?|doctor(?:ate)?|diploma)(?![a-z])",
+    re.IGNORECASE
+)
+SCHOOL = re.compile(r'\b(?:university|college|institute|school|academy|polytechnic)\b', re.IGNORECASE)
+COURSEWORK = re.compile(r'^(?:relevant\s+)?coursework\s*:\s*', re.IGNORECASE)
+JOB_TITLE = re.compile(
+    r'\b(?:engineer|developer|intern|analyst|manager|assistant|consultant|designer|scientist|researcher|'
+    r'specialist|coordinator|lead|director|associate|administrator|architect|technician|officer|'
+    r'representative|tutor|programmer|fellow|contractor)\b',
+    re.IGNORECASE
+)
+ROLE = re.compile(
+    r'\b(?:president|vice president|member|lead|leader|captain|volunteer|treasurer|secretary|founder|'
+    r'co-founder|officer|chair|organizer|mentor|representative|coordinator|director)\b',
+    re.IGNORECASE
+)
+TECHNOLOGIES = re.compile(r'^(?:technologies|tech stack|tools|built with|stack)\s*:\s*', re.IGNORECASE)
+SEGMENT_SEPARATOR = re.compile(r'\s+[|•·–—]\s+|\s+-\s+|\t|\s{2,}|,\s+')
+# "Software Engineer at Acme"; only split where the left side is a job title, so "University of Texas at Austin" survives
+TITLE_AT = re.compile(r'\s+at\s+', re.IGNORECASE)
+SKILL_SEPARATOR = re.compile(r'\s*[,;|•·]\s*')
+
+class _Entry:
+    """Header lines and bullets of one item in an entry-based section"""
+
+    def __init__(self, header: Optional[str] = None):
+        self.header: List[str] = [header] if header else []
+        self.bullets: List[str] = []
+
+class ParsedResume(NamedTuple):
+    data: Dict[str, Any]
+    confidence: float
+    signals: Dict[str, float]
+
+def _header_section(line: str) -> Optional[str]:
+    """Section a line introduces, if the whole line is a known section header"""
+    text = BULLET.sub('', line).strip(' :-=_*#').lower().replace('&', 'and')
+    if not text or len(text.split()) > MAX_HEADER_WORDS:
+        return None
+    text = ' '.join(text.split())
+    for section, pattern in SECTION_HEADERS.items():
+        if pattern.fullmatch(text):
+            return section
+    return None
+
+def _take(pattern: re.Pattern, text: str) -> Tuple[Optional[re.Match], str]:
+    """First match of `pattern` and `text` with it removed"""
+    match = pattern.search(text)
+    if match is None:
+        return None, text
+    return match, (text[:match.start()] + ' ' + text[match.end():]).strip()
+
+def _segments(text: str) -> List[str]:
+    return [segment.strip(' ,|') for segment in SEGMENT_SEPARATOR.split(text) if segment.strip(' ,|')]
+
+def _take_location(text: str) -> Tuple[Optional[str], str]:
+    """First "City, ST" or "Remote" in `text` that is not a job title followed by an initialism"""
+    for match in LOCATION.finditer(text):
+        if not JOB_TITLE.search(match.group(0)):
+            return match.group(0), (text[:match.start()] + ' ' + text[match.end():]).strip()
+    return None, text
+
+def _duration(match: Optional[re.Match]) -> str:
+    if match is None:
+        return ''
+    end = match.group(2)
+    return f"{match.group(1)} - {end.capitalize() if end.isalpha() else end}"
+
+class ResumeParser:
+    """Rule-based resume parser that scores how much of the document it understood.
+
+    One pass splits the text into sections on standalone header lines, groups
+    each entry-based section into header lines plus bullets, and fills the
+    same structure the LLM parse returns. The confidence reflects contact
+    details found, core sections found, dated entries and the share of lines
+    that landed in a recognized section.
+    """
+
+    def __init__(self, confidence_threshold: float):
+        self.confidence_threshold = confidence_threshold
+        self.documents = 0
+        self.confident = 0
+        self.total_confidence = 0.0
+
+    def parse(self, text: str) -> ParsedResume:
+        lines = [line.strip() for line in text.splitlines()]
+        lines = [line for line in lines if line and not PAGE_MARKER.match(line)]
+
+        preamble: List[str] = []
+        sections: Dict[str, List[str]] = {}
+        current = None
+        headers = 0
+        for line in lines:
+            section = _header_section(line)
+            if section is not None:
+                headers += 1
+                current = section
+                sections.setdefault(section, [])
+            elif current is None:
+                preamble.append(line)
+            else:
+                sections[current].append(line)
+
+        personal, preamble_used = self._personal(preamble + sections.get('personal', []), text)
+        data = {
+            'personal': personal,
+            'education': [self._education(entry) for entry in self._entries(sections.get('education', []))],
+            'experience': [self._experience(entry) for entry in self._entries(sections.get('experience', []))],
+            'skills': self._skills(sections.get('skills', [])),
+            'projects': [self._project(entry) for entry in self._entries(sections.get('projects', []))],
+            'activities': [self._activity(entry) for entry in self._entries(sections.get('activities', []))],
+            'awards': self._awards(sections.get('awards', []))
+        }
+        data = ResumeParseOutput.model_validate(data).model_dump(exclude_none=True)
+
+        # Contact lines count only when something was taken from them, like the preamble
+        sectioned = sum(len(section_lines) for section, section_lines in sections.items() if section != 'personal')
+        dated = [entry for entry in data['experience'] if entry['duration']]
+        dated += [entry for entry in data['education'] if entry['graduation_date']]
+        dateable = len(data['experience']) + len(data['education'])
+        signals = {
+            'name': 1.0 if personal.get('name') else 0.0,
+            'email': 1.0 if personal.get('email') else 0.0,
+            'phone': 1.0 if personal.get('phone') else 0.0,
+            'experience': 1.0 if data['experience'] or data['projects'] else 0.0,
+            'education': 1.0 if data['education'] else 0.0,
+            'skills': 1.0 if data['skills'] else 0.0,
+            'dated_entries': len(dated) / dateable if dateable else 0.0,
+            'coverage': (headers + sectioned + preamble_used) / len(lines) if lines else 0.0
+        }
+        confidence = round(
+            0.15 * signals['name'] + 0.15 * signals['email'] + 0.05 * signals['phone']
+            + 0.15 * signals['experience'] + 0.1 * signals['education'] + 0.1 * signals['skills']
+            + 0.1 * signals['dated_entries'] + 0.2 * signals['coverage'],
+            3
+        )
+
+        self.documents += 1
+        self.total_confidence += confidence
+        if confidence >= self.confidence_threshold:
+            self.confident += 1
+        return ParsedResume(data, confidence, signals)
+
+    def is_confident(self, result: ParsedResume) -> bool:
+        return result.confidence >= self.confidence_threshold
+
+    def _personal(self, preamble: List[str], text: str) -> Tuple[Dict[str, str], int]:
+        """Contact details from the lines above the first section, and how many of those lines were used"""
+        personal: Dict[str, str] = {}
+        used = 0
+        for line in preamble:
+            rest = line
+            found = False
+            for field, pattern in (('email', EMAIL), ('linkedin', LINKEDIN), ('github', GITHUB), ('phone', PHONE)):
+                match, rest = _take(pattern, rest)
+                if match is not None:
+                    personal.setdefault(field, match.group(0))
+                    found = True
+            rest = URL.sub(' ', rest)
+            location, rest = _take_location(rest)
+            if location is not None and 'location' not in personal:
+                personal['location'] = location
+                found = True
+            rest = ' '.join(segment for segment in _segments(rest))
+            if 'name' not in personal and NAME.match(rest) and not found:
+                personal['name'] = rest
+                found = True
+            used += found
+
+        # Contact details are sometimes in a footer or sidebar rather than the top block
+        for field, pattern in (('email', EMAIL), ('phone', PHONE), ('linkedin', LINKEDIN), ('github', GITHUB)):
+            if field not in personal:
+                match = pattern.search(text)
+                if match is not None:
+                    personal[field] = match.group(0)
+        return personal, used
+
+    def _entries(self, lines: List[str]) -> List[_Entry]:
+        entries: List[_Entry] = []
+        for line in lines:
+            bullet = BULLET.match(line)
+            if bullet is not None:
+                if not entries:
+                    entries.append(_Entry())
+                entries[-1].bullets.append(line[bullet.end():].strip())
+            elif entries and entries[-1].bullets and line[0].islower():
+                # Wrapped continuation of the previous bullet
+                entries[-1].bullets[-1] += ' ' + line
+            elif not entries or entries[-1].bullets or len(entries[-1].header) >= 3:
+                entries.append(_Entry(line))
+            else:
+                entries[-1].header.append(line)
+        return [entry for entry in entries if entry.header or entry.bullets]
+
+    def _experience(self, entry: _Entry) -> Dict[str, str]:
+        dates, rest = _take(DATE_RANGE, ' | '.join(entry.header))
+        duration = _duration(dates)
+        if dates is None:
+            single, rest = _take(SINGLE_DATE, rest)
+            duration = single.group(1) if single is not None else ''
+        location, rest = _take_location(rest)
+        segments = []
+        for segment in _segments(rest):
+            at = TITLE_AT.search(segment)
+            if at is not None and JOB_TITLE.search(segment[:at.start()]):
+                segments.extend([segment[:at.start()], segment[at.end():]])
+            else:
+                segments.append(segment)
+        position = next((segment for segment in segments if JOB_TITLE.search(segment)), segments[0] if segments else '')
+        company = next((segment for segment in segments if segment != position), '')
+        return {
+            'position': position,
+            'company': company,
+            'duration': duration,
+            'location': location or '',
+            'description': '\n'.join(entry.bullets)
+        }
+
+    def _education(self, entry: _Entry) -> Dict[str, str]:
+        relevant = ''
+        lines = []
+        for line in entry.header + entry.bullets:
+            coursework = COURSEWORK.match(line)
+            if coursework is not None:
+                relevant = line[coursework.end():]
+            else:
+                lines.append(line)
+        text = ' | '.join(lines)
+        gpa, text = _take(GPA, text)
+        dates, text = _take(DATE_RANGE, text)
+        graduation = dates.group(2) if dates is not None else ''
+        if dates is None:
+            single, text = _take(SINGLE_DATE, text)
+            graduation = single.group(1) if single is not None else ''
+        _, text = _take_location(text)
+        segments = _segments(text)
+        school = next((segment for segment in segments if SCHOOL.search(segment)), '')
+        degree = next((segment for segment in segments if DEGREE.search(segment) and segment != school), '')
+        return {
+            'school': school or (segments[0] if segments else ''),
+            'degree': degree,
+            'gpa': gpa.group(1) if gpa is not None else '',
+            'graduation_date': graduation.title(),
+            'relevant': relevant
+        }
+
+    def _project(self, entry: _Entry) -> Dict[str, Any]:
+        technologies: List[str] = []
+        bullets = []
+        for line in entry.bullets:
+            listed = TECHNOLOGIES.match(line)
+            if listed is not None:
+                technologies.extend(SKILL_SEPARATOR.split(line[listed.end():]))
+            else:
+                bullets.append(line)
+        _, header = _take(DATE_RANGE, ' | '.join(entry.header))
+        name, _, stack = header.partition(' | ')
+        if stack and not technologies:
+            technologies = SKILL_SEPARATOR.split(stack)
+        return {
+            'name': name.strip() or (bullets[0] if bullets else ''),
+            'description': '\n'.join(bullets),
+            'technologies': [technology for technology in technologies if technology],
+            'outcomes': '\n'.join(bullet for bullet in bullets if any(char.isdigit() for char in bullet))
+        }
+
+    def _activity(self, entry: _Entry) -> Dict[str, str]:
+        _, header = _take(DATE_RANGE, ' | '.join(entry.header))
+        segments = _segments(header)
+        role = next((segment for segment in segments if ROLE.search(segment)), '')
+        organization = next((segment for segment in segments if segment != role), role)
+        return {
+            'organization': organization,
+            'role': role if role != organization else '',
+            'achievements': '\n'.join(entry.bullets)
+        }
+
+    def _skills(self, lines: List[str]) -> List[Dict[str, str]]:
+        skills: List[Dict[str, str]] = []
+        seen = set()
+        for line in lines:
+            line = BULLET.sub('', line)
+            label, colon, items = line.partition(':')
+            if not colon:
+                label, items = '', line
+            category = self._skill_category(label.lower())
+            for item in SKILL_SEPARATOR.split(items):
+                name = item.strip(' .')
+                if 1 <= len(name) <= 40 and name.lower() not in seen:
+                    seen.add(name.lower())
+                    skills.append({'name': name, 'level': 'Intermediate', 'category': category})
+        return skills
+
+    @staticmethod
+    def _skill_category(label: str) -> str:
+        if 'soft' in label or 'interpersonal' in label:
+            return 'Soft'
+        if any(word in label for word in ('tool', 'software', 'platform', 'framework')):
+            return 'Tool'
+        # "Languages:" in a skills section almost always lists programming languages
+        if any(word in label for word in ('spoken', 'foreign', 'human')):
+            return 'Language'
+        return 'Technical'
+
+    def _awards(self, lines: List[str]) -> List[Dict[str, str]]:
+        awards = []
+        for line in lines:
+            line = BULLET.sub('', line)
+            date, rest = _take(SINGLE_DATE, line)
+            segments = _segments(rest)
+            if segments:
+                awards.append({
+                    'title': segments[0],
+                    'issuer': segments[1] if len(segments) > 1 else '',
+                    'date': date.group(1).title() if date is not None else ''
+                })
+        return awards
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'threshold': self.confidence_threshold,
+            'documents': self.documents,
+            'confident': self.confident,
+            'confident_rate': round(self.confident / self.documents, 3) if self.documents else 0.0,
+            'avg_confidence': round(self.total_confidence / self.documents, 3) if self.documents else 0.0
+        }
+
+# Shared by every ResumeService instance in this process
+resume_parser = ResumeParser(confidence_threshold=settings.RESUME_PARSER_CONFIDENCE_THRESHOLD)
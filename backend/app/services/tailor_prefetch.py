@@ -0,0 +1,135 @@
+import time
+import logging
+from typing import Dict, Any, Optional
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import get_session_local
+from app.models.job import JobDescription
+from app.models.resume import Resume
+from app.services.ai_cache import ai_response_cache
+from app.services.ai_service import AIService
+from app.services.ai_tasks import ai_task_queue
+
+logger = logging.getLogger(__name__)
+
+PREFETCH_KIND = "tailor_prefetch"
+# Runs after every interactive background task already queued
+PREFETCH_PRIORITY = 10
+
+class TailorPrefetcher:
+    """Tailors the user's primary resume for a job they just analyzed, before they ask for it.
+
+    The result is not stored anywhere new: the completion lands in the AI
+    response cache, so the user's own /resume/{id}/tailor call for the same job
+    is a cache hit, or joins the prefetch through request coalescing if it is
+    still running.
+    """
+
+    def __init__(self, enabled: bool, user_daily_limit: int, hourly_limit: int):
+        self.enabled = enabled
+        self.user_daily_limit = user_daily_limit
+        self.hourly_limit = hourly_limit
+        self.ai_service = AIService()
+        self.scheduled = 0
+        self.skipped: Dict[str, int] = {}
+
+    @staticmethod
+    def task_key(job: JobDescription) -> str:
+        # Job ids are reused once the newest job is deleted; creation time tells the two jobs apart
+        created_at = job.created_at.isoformat() if job.created_at is not None else ""
+        return f"job-{job.id}-{created_at}"
+
+    async def schedule(self, db: Session, user_id: int, job: JobDescription) -> bool:
+        """Queue a prefetch for `job` if the feature, budget and queue allow it; never raises"""
+        try:
+            reason = await self._skip_reason(user_id)
+            resume = None
+            if reason is None:
+                resume = db.query(Resume).filter(Resume.user_id == user_id, Resume.is_primary.is_(True)).first()
+                if resume is None:
+                    reason = 'no_primary_resume'
+            if reason is None:
+                await ai_task_queue.submit(
+                    user_id, PREFETCH_KIND, {"job_id": job.id, "resume_id": resume.id}, self.task_key(job)
+                )
+        except HTTPException as error:
+            logger.warning(f"Could not queue tailoring prefetch for job {job.id}: {error.detail}")
+            reason = 'queue_unavailable'
+        except Exception as error:
+            # A prefetch is only an optimization; the analysis it follows already succeeded
+            logger.error(f"Tailoring prefetch for job {job.id} failed to schedule: {error}", exc_info=True)
+            reason = 'error'
+
+        if reason is not None:
+            self.skipped[reason] = self.skipped.get(reason, 0) + 1
+            logger.debug(f"Not prefetching tailoring for job {job.id}: {reason}")
+            return False
+        self.scheduled += 1
+        return True
+
+    async def _skip_reason(self, user_id: int) -> Optional[str]:
+        if not self.enabled:
+            return 'disabled'
+        if not ai_response_cache.enabled or ai_response_cache.ttl_for("tailor_resume") <= 0:
+            # Nothing would keep the result for the user's real request
+            return 'cache_disabled'
+        # Leave the queue's headroom to work users are waiting on
+        if ai_task_queue.pending() >= ai_task_queue.max_pending // 2:
+            return 'queue_busy'
+        now = time.time()
+        if await ai_task_queue.count_created_since(PREFETCH_KIND, now - 3600) >= self.hourly_limit:
+            return 'hourly_budget'
+        if await ai_task_queue.count_created_since(PREFETCH_KIND, now - 86400, user_id) >= self.user_daily_limit:
+            return 'user_daily_budget'
+        return None
+
+    async def cancel_for_job(self, user_id: int, job: JobDescription) -> bool:
+        """Drop a queued or running prefetch for a job that is about to be deleted.
+
+        A completion already in flight upstream still finishes and is cached,
+        since coalesced requests may be waiting on it too.
+        """
+        return await ai_task_queue.cancel(user_id, PREFETCH_KIND, self.task_key(job))
+
+    async def run(self, user_id: int, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Background task handler for prefetches"""
+        db = get_session_local()()
+        try:
+            job = db.query(JobDescription).filter(
+                JobDescription.id == payload["job_id"], JobDescription.user_id == user_id
+            ).first()
+            resume = db.query(Resume).filter(
+                Resume.id == payload["resume_id"], Resume.user_id == user_id
+            ).first()
+            if job is None or resume is None:
+                return {"prefetched": False, "reason": "job or resume no longer exists"}
+
+            # Same arguments /resume/{id}/tailor passes, so the prompt and cache key match
+            await self.ai_service.tailor_resume_for_job(
+                resume_data=resume.parsed_content,
+                job_description=job.description,
+                target_role=job.job_title,
+                company=job.company_name
+            )
+            return {"prefetched": True, "job_id": job.id, "resume_id": resume.id}
+        finally:
+            db.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'enabled': self.enabled,
+            'scheduled': self.scheduled,
+            'skipped': dict(self.skipped)
+        }
+
+# Shared by every route module in this process
+tailor_prefetcher = TailorPrefetcher(
+    enabled=settings.AI_PREFETCH_TAILORING,
+    user_daily_limit=settings.AI_PREFETCH_USER_DAILY_LIMIT,
+    hourly_limit=settings.AI_PREFETCH_HOURLY_LIMIT
+)
+
+ai_task_queue.register(PREFETCH_KIND, tailor_prefetcher.run, priority=PREFETCH_PRIORITY)
@@ -0,0 +1,228 @@
+import asyncio
+import hashlib
+import mmap
+import tempfile
+import logging
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, Optional
+
+from multipart.exceptions import MultipartParseError
+from multipart.multipart import MultipartParser, parse_options_header
+from starlette.datastructures import Headers
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+# Room for the multipart boundaries and small form fields around the file itself
+MULTIPART_OVERHEAD = 64 * 1024
+MAX_FIELD_BYTES = 64 * 1024  # per non-file form field
+SPOOL_BUFFER_BYTES = 256 * 1024  # file data held in memory between writes to disk
+
+class UploadTooLarge(Exception):
+    """The upload is bigger than the configured limit"""
+
+class MalformedUpload(Exception):
+    """The request is not a multipart form with the expected file field"""
+
+class UploadSpool:
+    """An uploaded file written to a temporary file on disk, read back through a memory map.
+
+    Data is buffered in memory as it arrives and refused once it passes
+    `max_bytes`. flush() hashes the buffer and writes it to disk in a worker
+    thread, so the event loop never waits on the disk. Extraction workers
+    reopen the file by `path` once the upload has been flushed.
+    """
+
+    def __init__(self, max_bytes: int, directory: Optional[str] = None, buffer_bytes: int = SPOOL_BUFFER_BYTES):
+        self.max_bytes = max_bytes
+        self.buffer_bytes = buffer_bytes
+        self._directory = directory
+        self._file = None
+        self._buffer = bytearray()
+        self.size = 0
+        self._sha256 = hashlib.sha256()
+
+    def write(self, chunk: bytes) -> None:
+        """Buffer `chunk`; call flush() once `full` to move it to disk"""
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            raise UploadTooLarge(f"File exceeds maximum allowed size of {self.max_bytes} bytes")
+        self._buffer += chunk
+
+    @property
+    def full(self) -> bool:
+        return len(self._buffer) >= self.buffer_bytes
+
+    async def flush(self) -> None:
+        data, self._buffer = bytes(self._buffer), bytearray()
+        await asyncio.to_thread(self._write, data)
+
+    def _write(self, data: bytes) -> None:
+        if self._file is None:
+            self._file = tempfile.NamedTemporaryFile(prefix="upload-", dir=self._directory)
+        self._sha256.update(data)
+        self._file.write(data)
+        self._file.flush()
+
+    @property
+    def path(self) -> str:
+        if self._file is None:
+            raise Exception("Upload has not been flushed to disk")
+        return self._file.name
+
+    @property
+    def content_hash(self) -> str:
+        """SHA-256 hex digest of the uploaded bytes"""
+        return self._sha256.hexdigest()
+
+    @contextmanager
+    def view(self) -> Iterator[mmap.mmap]:
+        """Read-only memory map of the spooled file"""
+        if self.size == 0:
+            raise Exception("Uploaded file is empty")
+        with mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+
+    def close(self) -> None:
+        # Closing a NamedTemporaryFile also deletes it
+        if self._file is not None:
+            self._file.close()
+
+    def __enter__(self) -> "UploadSpool":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+class MultipartUpload:
+    """A multipart form read straight off the request body, its one file field written into an UploadSpool.
+
+    FastAPI's File() parameters make Starlette receive and spool the whole body
+    before the route runs, after which the route would copy the file again.
+    Here each chunk goes to the spool as it arrives, so the file is written
+    once and reading stops as soon as it passes the limit. The parser callbacks
+    only buffer; the spool is flushed between body chunks. Other fields are
+    kept as short strings; file parts under other names are discarded.
+    """
+
+    def __init__(self, file_field: str, max_bytes: int, max_field_bytes: int = MAX_FIELD_BYTES):
+        self.file_field = file_field
+        self.max_bytes = max_bytes
+        self.max_field_bytes = max_field_bytes
+        self.spool: Optional[UploadSpool] = None
+        self.filename: Optional[str] = None
+        self.fields: Dict[str, str] = {}
+        self._header_name = b""
+        self._header_value = b""
+        self._disposition = b""
+        self._part: Optional[str] = None  # "file", "field" or "skip"
+        self._part_name = ""
+        self._field_value = bytearray()
+
+    @classmethod
+    async def from_request(cls, request: Request, file_field: str, max_bytes: int) -> "MultipartUpload":
+        content_type, params = parse_options_header(request.headers.get("content-type", ""))
+        boundary = params.get(b"boundary")
+        if content_type != b"multipart/form-data" or not boundary:
+            raise MalformedUpload("Expected a multipart/form-data request")
+
+        form = cls(file_field, max_bytes)
+        parser = MultipartParser(boundary, {
+            "on_part_begin": form._on_part_begin,
+            "on_header_field": form._on_header_field,
+            "on_header_value": form._on_header_value,
+            "on_header_end": form._on_header_end,
+            "on_headers_finished": form._on_headers_finished,
+            "on_part_data": form._on_part_data,
+            "on_part_end": form._on_part_end
+        })
+        try:
+            async for chunk in request.stream():
+                parser.write(chunk)
+                if form.spool is not None and form.spool.full:
+                    await form.spool.flush()
+            parser.finalize()
+            if form.spool is None:
+                raise MalformedUpload(f"Missing file field '{file_field}'")
+            await form.spool.flush()
+        except MultipartParseError as error:
+            form.close()
+            raise MalformedUpload(f"Malformed multipart body: {error}")
+        except BaseException:
+            form.close()
+            raise
+        return form
+
+    def _on_part_begin(self) -> None:
+        self._disposition = b""
+        self._field_value = bytearray()
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_name += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        if self._header_name.lower() == b"content-disposition":
+            self._disposition = self._header_value
+        self._header_name = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._disposition)
+        if b"name" not in options:
+            raise MalformedUpload('Form part is missing the Content-Disposition "name"')
+        self._part_name = options[b"name"].decode("utf-8", errors="replace")
+        if b"filename" not in options:
+            self._part = "field"
+        elif self._part_name == self.file_field and self.spool is None:
+            self._part = "file"
+            self.filename = options[b"filename"].decode("utf-8", errors="replace")
+            self.spool = UploadSpool(self.max_bytes)
+        else:
+            self._part = "skip"
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._part == "file":
+            self.spool.write(data[start:end])
+        elif self._part == "field":
+            self._field_value += data[start:end]
+            if len(self._field_value) > self.max_field_bytes:
+                raise UploadTooLarge(f"Form field '{self._part_name}' exceeds {self.max_field_bytes} bytes")
+
+    def _on_part_end(self) -> None:
+        if self._part == "field":
+            self.fields[self._part_name] = self._field_value.decode("utf-8", errors="replace")
+        self._part = None
+
+    def close(self) -> None:
+        if self.spool is not None:
+            self.spool.close()
+
+class UploadSizeLimitMiddleware:
+    """Answers 413 for upload requests whose declared size is over the limit, before the body is read.
+
+    Bodies sent without a Content-Length are still cut off by MultipartUpload
+    once the file itself passes the limit.
+    """
+
+    def __init__(self, app: ASGIApp, max_bytes: int, paths: Iterable[str]):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.paths = set(paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and scope["path"] in self.paths:
+            content_length = Headers(scope=scope).get("content-length", "")
+            if content_length.isdigit() and int(content_length) > self.max_bytes:
+                logger.warning(f"Rejected {content_length} byte upload to {scope['path']}")
+                response = JSONResponse(
+                    {"detail": f"Upload exceeds maximum allowed size of {self.max_bytes} bytes"},
+                    status_code=413
+                )
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
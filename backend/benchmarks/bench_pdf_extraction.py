@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Benchmark page-parallel PDF extraction against the serial extractor it replaced.
+
+The reference implementation below reproduces the old `_extract_pdf_text`:
+one pass over every page in the calling process, appending to a string.
+Fixtures are generated text PDFs, so no sample files are needed. Reported
+per fixture: serial time, DocumentExtractor time end to end, and how many
+times the pool parsed the PDF.
+
+Usage (from backend/):
+    python -m benchmarks.bench_pdf_extraction [--pages 1 10 50] [--lines 45] [--workers 4]
+        [--pages-per-task 4] [--repeat 5]
+"""
+import argparse
+import asyncio
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import PyPDF2
+
+from app.services.document_extraction import DocumentExtractor
+
+SAMPLE_LINES = [
+    "Senior Software Engineer, Acme Corp (Jan 2020 - Present)",
+    "- Built a FastAPI service handling 2M requests a day with PostgreSQL and Redis",
+    "- Cut p95 latency by 40% by moving PDF parsing into a worker pool",
+    "Education: B.S. Computer Science, State University, 2016 - 2020",
+    "Skills: Python, SQL, Docker, Kubernetes, AWS, React, TypeScript",
+    "Led a team of four engineers delivering the billing platform migration"
+]
+
+def _escape(text):
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+def build_pdf(pages, lines):
+    """Text-only PDF with `lines` lines of resume-like text on each page"""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None,
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page in range(pages):
+        body = " ".join(
+            f"({_escape(SAMPLE_LINES[(page + line) % len(SAMPLE_LINES)])}) '" for line in range(lines)
+        )
+        stream = f"BT /F1 10 Tf 40 800 Td 14 TL {body} ET".encode()
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects)
+        )
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % kid for kid in kids), pages)
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    out.write(b"".join(b"%010d 00000 n \n" % offset for offset in offsets))
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+def legacy_extract(path):
+    """Serial extraction equivalent to the removed `_extract_pdf_text`"""
+    with open(path, 'rb') as handle:
+        pdf_reader = PyPDF2.PdfReader(io.BytesIO(handle.read()))
+    text = ""
+    for page_num, page in enumerate(pdf_reader.pages):
+        page_text = page.extract_text()
+        if page_text:
+            text += f"\n--- Page {page_num + 1} ---\n{page_text}\n"
+    return text.strip()
+
+def parse_count(extractor, page_count):
+    """Workers that open the PDF: the first range plus one per later range"""
+    span = extractor.pages_per_task if extractor.workers > 1 else extractor.max_pages
+    return 1 + len(extractor._page_ranges(span, page_count))
+
+async def run(page_counts, lines, workers, pages_per_task, repeat):
+    extractor = DocumentExtractor(
+        workers=workers, timeout=300, max_pages=max(page_counts), max_bytes=1 << 30,
+        pages_per_task=pages_per_task
+    )
+    print(f"{workers} workers, {pages_per_task} pages per task, {lines} lines per page, best of {repeat}")
+    print(f"{'pages':>6}{'KB':>8}{'serial ms':>12}{'pool ms':>10}{'parses':>8}{'speedup':>10}")
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            # Spawning workers is a one-off cost per process; keep it out of the timings
+            warmup = os.path.join(directory, 'warmup.pdf')
+            with open(warmup, 'wb') as handle:
+                handle.write(build_pdf(1, 1))
+            await asyncio.gather(*[extractor.extract(warmup, os.path.getsize(warmup), '.pdf') for _ in range(workers)])
+
+            for page_count in page_counts:
+                path = os.path.join(directory, f'{page_count}.pdf')
+                with open(path, 'wb') as handle:
+                    handle.write(build_pdf(page_count, lines))
+                size = os.path.getsize(path)
+
+                expected = legacy_extract(path)
+                assert await extractor.extract(path, size, '.pdf') == expected, \
+                    f"pool output differs from serial extraction for {page_count} pages"
+
+                serial, pool = [], []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    legacy_extract(path)
+                    serial.append(time.perf_counter() - start)
+                    start = time.perf_counter()
+                    await extractor.extract(path, size, '.pdf')
+                    pool.append(time.perf_counter() - start)
+                print(f"{page_count:>6}{size // 1024:>8}{min(serial) * 1000:>12.1f}{min(pool) * 1000:>10.1f}"
+                      f"{parse_count(extractor, page_count):>8}{min(serial) / min(pool):>9.1f}x")
+    finally:
+        extractor.shutdown()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', type=int, nargs='+', default=[1, 10, 50])
+    parser.add_argument('--lines', type=int, default=45, help="lines of text per page")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2)
+    parser.add_argument('--pages-per-task', type=int, default=4)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args.pages, args.lines, args.workers, args.pages_per_task, args.repeat))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Benchmark the ResponseScanner against the per-field helpers it replaced.
+
+The reference implementation below reproduces the old `_extract_*` behaviour:
+every field re-splits the whole response and re-lowercases every line.
+
+Usage (from backend/):
+    python -m benchmarks.bench_response_extraction [--lines 200 2000 20000] [--hit-ratio 0.3 1.0] [--repeat 5]
+"""
+import argparse
+import random
+import re
+import sys
+import os
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.ai_extraction import LineMatches, FirstSection, BulletPoints, Vocabulary, ScoreEstimate
+from app.services.ai_service import (
+    TAILOR_SCANNER, EXPERIENCE_SCANNER, JOB_ANALYSIS_SCANNER, CAREER_GUIDANCE_SCANNER, ATS_SCANNER
+)
+
+SCANNERS = {
+    'tailor_resume': TAILOR_SCANNER,
+    'enhance_experience': EXPERIENCE_SCANNER,
+    'job_analysis': JOB_ANALYSIS_SCANNER,
+    'career_guidance': CAREER_GUIDANCE_SCANNER,
+    'ats_optimization': ATS_SCANNER
+}
+
+SAMPLE_LINES = [
+    "## Key Requirements and Qualifications",
+    "- Required: 3+ years of Python and SQL experience",
+    "- Must have experience with AWS and Docker in production",
+    "The company culture emphasizes ownership and a collaborative environment.",
+    "Salary range is competitive with strong benefits and equity.",
+    "* Growth opportunity: clear career path toward senior engineer",
+    "1. Improve the summary to include measurable outcomes (increase of 25% in users)",
+    "2. Add keywords such as react, git and node.js to the skills section",
+    "Consider a course or certification to learn Kubernetes.",
+    "Attend a conference to meet and connect with engineers in the network.",
+    "Build a side project to develop and create a portfolio piece.",
+    "Timeline: a 6 month plan with a clear goal for each quarter.",
+    "A practical solution to overcome this is to address the gap directly.",
+    "Use a simple format and structure; avoid complex layout or design.",
+    "This could improve your ATS score by 7 points.",
+    "Write a tailored cover letter that mentions the team mission."
+]
+
+FILLER_LINES = [
+    "Overall this candidate brings a well rounded background to the role.",
+    "The posting describes the day to day work in some detail.",
+    "Keep the tone confident but concise, and avoid jargon where possible.",
+    "",
+    "Recruiters typically spend only a few seconds on a first read."
+]
+
+def legacy_scan(scanner, text):
+    """Field-by-field extraction equivalent to the removed helpers"""
+    result = {}
+    for name, spec in scanner.fields.items():
+        if isinstance(spec, LineMatches):
+            values = [line.strip() for line in text.split('\n')
+                      if any(keyword in line.lower() for keyword in spec.keywords)]
+            result[name] = values[:spec.limit] if spec.limit else values
+        elif isinstance(spec, FirstSection):
+            lines = text.split('\n')
+            result[name] = spec.default
+            for i, line in enumerate(lines):
+                if any(keyword in line.lower() for keyword in spec.keywords):
+                    result[name] = '\n'.join(lines[i:i + spec.span])
+                    break
+        elif isinstance(spec, BulletPoints):
+            values = [line.strip() for line in text.split('\n') if line.strip().startswith(spec.prefixes)]
+            result[name] = values[:spec.limit] if spec.limit else values
+        elif isinstance(spec, Vocabulary):
+            result[name] = list({word.lower() for word in text.split() if word.lower() in spec.words})
+        elif isinstance(spec, ScoreEstimate):
+            match = re.search(spec.pattern, text.lower())
+            result[name] = min(spec.cap, int(match.group(1))) if match else spec.default
+    return result
+
+def build_response(line_count, hit_ratio, seed=7):
+    """Synthetic response where `hit_ratio` of the lines mention tracked terms"""
+    rng = random.Random(seed)
+    return '\n'.join(
+        rng.choice(SAMPLE_LINES) if rng.random() < hit_ratio else rng.choice(FILLER_LINES)
+        for _ in range(line_count)
+    )
+
+def same_fields(scanner, text):
+    fast, slow = scanner.scan(text), legacy_scan(scanner, text)
+    for name, spec in scanner.fields.items():
+        if isinstance(spec, Vocabulary):
+            if set(fast[name]) != set(slow[name]):
+                return False
+        elif fast[name] != slow[name]:
+            return False
+    return True
+
+def run(line_counts, hit_ratio, repeat):
+    print(f"{'task':<20}{'lines':>8}{'legacy ms':>12}{'scanner ms':>12}{'speedup':>10}")
+    for line_count in line_counts:
+        text = build_response(line_count, hit_ratio)
+        for task, scanner in SCANNERS.items():
+            assert same_fields(scanner, text), f"scanner output differs from legacy for {task}"
+            number = max(1, 20000 // line_count)
+            legacy = min(timeit.repeat(lambda: legacy_scan(scanner, text), number=number, repeat=repeat)) / number
+            fast = min(timeit.repeat(lambda: scanner.scan(text), number=number, repeat=repeat)) / number
+            print(f"{task:<20}{line_count:>8}{legacy * 1000:>12.3f}{fast * 1000:>12.3f}{legacy / fast:>9.1f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lines', type=int, nargs='+', default=[200, 2000, 20000])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--hit-ratio', type=float, nargs='+', default=[0.3, 1.0],
+                        help="fraction of lines containing tracked terms")
+    args = parser.parse_args()
+
+    for hit_ratio in args.hit_ratio:
+        print(f"\nhit ratio {hit_ratio:.0%}")
+        run(args.lines, hit_ratio, args.repeat)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Load test the /api/v1/ai routes in-process against the fake LLM backend.
+
+Each scenario runs a closed loop: `concurrency` clients each send their next
+request as soon as the previous one finishes, until `--requests` have
+completed. Requests go straight into the ASGI app, so no server or network is
+involved and streamed routes report real time to first byte. Reported per
+scenario: throughput, latency percentiles, event-loop lag and process memory.
+
+Usage (from backend/):
+    python -m benchmarks.load_ai_routes [--scenarios analyze-job tailor-resume] [--concurrency 1 10 50]
+        [--requests 200] [--latency-ms 800] [--tokens-per-second 50] [--error-rate 0]
+        [--cache] [--same-payload] [--output after.json] [--compare before.json]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Dict, Any, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+RESUME_DATA = {
+    'personal': {'name': 'Alex Kim', 'email': 'alex@example.com'},
+    'experience': [{'position': 'Software Engineer Intern', 'company': 'Acme',
+                    'description': 'Built Python services on AWS and cut API latency by 30%'}],
+    'skills': [{'name': 'Python'}, {'name': 'React'}, {'name': 'SQL'}]
+}
+
+JOB_DESCRIPTION = """We are hiring a backend engineer to build Python APIs on AWS.
+Required: 2+ years of Python, SQL and Docker. Experience with React is a plus.
+We value ownership, a collaborative culture and continuous learning."""
+
+def tailoring_payload(i: int) -> Dict[str, Any]:
+    return {'resume_data': RESUME_DATA, 'job_description': f"{JOB_DESCRIPTION}\nReq #{i}",
+            'target_role': 'Backend Engineer', 'company': f"Company {i}"}
+
+def cover_letter_payload(i: int) -> Dict[str, Any]:
+    return {'resume_data': RESUME_DATA, 'job_description': f"{JOB_DESCRIPTION}\nReq #{i}",
+            'company': f"Company {i}", 'role': 'Backend Engineer', 'user_name': 'Alex Kim'}
+
+def experience_payload(i: int) -> Dict[str, Any]:
+    return {'experience_text': f"Built internal tools in Python for team {i}",
+            'target_role': 'Backend Engineer', 'industry': 'Software'}
+
+def job_payload(i: int) -> Dict[str, Any]:
+    return {'job_description': f"{JOB_DESCRIPTION}\nReq #{i}", 'company': f"Company {i}", 'role': 'Backend Engineer'}
+
+def career_payload(i: int) -> Dict[str, Any]:
+    return {'user_profile': {'name': 'Alex Kim', 'skills': ['Python', 'SQL'], 'id': i},
+            'career_goals': 'Become a senior backend engineer', 'current_challenges': 'Limited system design experience'}
+
+def bulk_payload(i: int) -> List[Dict[str, Any]]:
+    return [tailoring_payload(i * 5 + offset) for offset in range(5)]
+
+# name -> (method, path, payload factory, streamed)
+SCENARIOS = {
+    'tailor-resume': ('POST', '/api/v1/ai/tailor-resume', tailoring_payload, False),
+    'generate-cover-letter': ('POST', '/api/v1/ai/generate-cover-letter', cover_letter_payload, False),
+    'generate-cover-letter-stream': ('POST', '/api/v1/ai/generate-cover-letter/stream', cover_letter_payload, True),
+    'enhance-experience': ('POST', '/api/v1/ai/enhance-experience', experience_payload, False),
+    'enhance-experience-stream': ('POST', '/api/v1/ai/enhance-experience/stream', experience_payload, True),
+    'analyze-job': ('POST', '/api/v1/ai/analyze-job', job_payload, False),
+    'career-guidance': ('POST', '/api/v1/ai/career-guidance', career_payload, False),
+    'career-guidance-stream': ('POST', '/api/v1/ai/career-guidance/stream', career_payload, True),
+    'bulk-resume-analysis': ('POST', '/api/v1/ai/bulk-resume-analysis', bulk_payload, False),
+    'ats-optimization': ('POST', '/api/v1/ai/ats-optimization', tailoring_payload, False),
+    'health': ('GET', '/api/v1/ai/health', None, False),
+    'stats': ('GET', '/api/v1/ai/stats', None, False)
+}
+
+def percentile(values: List[float], p: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not values:
+        return 0.0
+    rank = max(0, min(len(values) - 1, int(round(p / 100 * len(values) + 0.5)) - 1))
+    return values[rank]
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    values = sorted(values)
+    return {
+        'p50': round(percentile(values, 50), 2),
+        'p95': round(percentile(values, 95), 2),
+        'p99': round(percentile(values, 99), 2),
+        'max': round(values[-1], 2) if values else 0.0,
+        'mean': round(sum(values) / len(values), 2) if values else 0.0
+    }
+
+def rss_mb() -> float:
+    """Current resident set size, falling back to the peak where /proc is unavailable"""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 1024
+
+async def call_asgi(app, method: str, path: str, payload: Optional[Any]) -> Dict[str, Any]:
+    """Send one request straight into the ASGI app, timing the first and last body bytes"""
+    body = json.dumps(payload).encode('utf-8') if payload is not None else b''
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': method,
+        'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': b'', 'root_path': '',
+        'headers': [(b'host', b'bench'), (b'content-type', b'application/json'),
+                    (b'content-length', str(len(body)).encode())],
+        'client': ('127.0.0.1', 50000), 'server': ('bench', 80)
+    }
+    request_sent = False
+    disconnected = asyncio.Event()
+    result = {'status': 0, 'first_byte': None, 'bytes': 0}
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+        await disconnected.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            result['status'] = message['status']
+        elif message['type'] == 'http.response.body':
+            if result['first_byte'] is None and message.get('body'):
+                result['first_byte'] = time.perf_counter()
+            result['bytes'] += len(message.get('body', b''))
+            if not message.get('more_body', False):
+                disconnected.set()
+
+    started_at = time.perf_counter()
+    await app(scope, receive, send)
+    finished_at = time.perf_counter()
+    disconnected.set()
+    result['latency_ms'] = (finished_at - started_at) * 1000
+    result['ttfb_ms'] = ((result['first_byte'] or finished_at) - started_at) * 1000
+    return result
+
+async def monitor_loop_lag(samples: List[float], stop: asyncio.Event, interval: float = 0.01) -> None:
+    """Record how late the loop wakes a sleeper; lag means callbacks were blocked"""
+    while not stop.is_set():
+        started_at = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, (time.perf_counter() - started_at - interval) * 1000))
+
+async def run_scenario(app, name: str, concurrency: int, total: int, same_payload: bool) -> Dict[str, Any]:
+    method, path, make_payload, streamed = SCENARIOS[name]
+    latencies, first_bytes, lag = [], [], []
+    errors = 0
+    issued = 0
+
+    async def client() -> None:
+        nonlocal errors, issued
+        while issued < total:
+            index = 0 if same_payload else issued
+            issued += 1
+            response = await call_asgi(app, method, path, make_payload(index) if make_payload else None)
+            latencies.append(response['latency_ms'])
+            first_bytes.append(response['ttfb_ms'])
+            if response['status'] >= 400:
+                errors += 1
+
+    rss_before = rss_mb()
+    stop = asyncio.Event()
+    monitor = asyncio.create_task(monitor_loop_lag(lag, stop))
+    started_at = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started_at
+    stop.set()
+    await monitor
+
+    result = {
+        'scenario': name,
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'errors': errors,
+        'elapsed_s': round(elapsed, 3),
+        'throughput_rps': round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        'latency_ms': summarize(latencies),
+        'loop_lag_ms': summarize(lag),
+        'rss_mb': {'before': round(rss_before, 1), 'after': round(rss_mb(), 1)}
+    }
+    if streamed:
+        result['ttfb_ms'] = summarize(first_bytes)
+    return result
+
+def build_app():
+    """Import the app with benchmark settings and authentication stubbed out"""
+    from app.main import app
+    from app.services.auth import get_current_user
+
+    # The AI routes only read the user's id; a plain object keeps the database out of the measurement
+    bench_user = SimpleNamespace(id=1, email='bench@example.com', username='bench', is_active=True)
+    app.dependency_overrides[get_current_user] = lambda: bench_user
+    return app
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+def print_comparison(results: List[Dict[str, Any]], baseline_path: str) -> None:
+    with open(baseline_path) as baseline_file:
+        baseline = {(r['scenario'], r['concurrency']): r for r in json.load(baseline_file)['results']}
+    print(f"\ncompared with {baseline_path}")
+    print(f"{'scenario':<30}{'conc':>6}{'rps before':>12}{'rps after':>11}{'p95 before':>12}{'p95 after':>11}")
+    for result in results:
+        before = baseline.get((result['scenario'], result['concurrency']))
+        if before is None:
+            continue
+        print(f"{result['scenario']:<30}{result['concurrency']:>6}"
+              f"{before['throughput_rps']:>12.1f}{result['throughput_rps']:>11.1f}"
+              f"{before['latency_ms']['p95']:>12.1f}{result['latency_ms']['p95']:>11.1f}")
+
+async def run(args) -> List[Dict[str, Any]]:
+    app = build_app()
+    results = []
+    print(f"{'scenario':<30}{'conc':>6}{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          f"{'ttfb p95':>10}{'lag p99':>9}{'rss MB':>8}{'errors':>8}")
+    for name in args.scenarios:
+        for concurrency in args.concurrency:
+            result = await run_scenario(app, name, concurrency, args.requests, args.same_payload)
+            results.append(result)
+            latency, lag = result['latency_ms'], result['loop_lag_ms']
+            ttfb = f"{result['ttfb_ms']['p95']:.1f}" if 'ttfb_ms' in result else '-'
+            print(f"{name:<30}{concurrency:>6}{result['throughput_rps']:>9.1f}{latency['p50']:>9.1f}"
+                  f"{latency['p95']:>9.1f}{latency['p99']:>9.1f}{ttfb:>10}{lag['p99']:>9.1f}"
+                  f"{result['rss_mb']['after']:>8.1f}{result['errors']:>8}")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenarios', nargs='+', choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 10, 50])
+    parser.add_argument('--requests', type=int, default=200, help="requests per scenario and concurrency level")
+    parser.add_argument('--latency-ms', type=float, default=800, help="fake LLM median time to first token")
+    parser.add_argument('--latency-sigma', type=float, default=0.5)
+    parser.add_argument('--tokens-per-second', type=float, default=50)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--cache', action='store_true', help="keep the AI response cache enabled")
+    parser.add_argument('--same-payload', action='store_true',
+                        help="send identical requests to exercise caching and coalescing")
+    parser.add_argument('--output', help="write results as JSON to this path")
+    parser.add_argument('--compare', help="earlier --output file to compare against")
+    parser.add_argument('--log-level', default='ERROR', help="app log level; per-request logs distort timings")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=args.log_level)
+
+    # Settings are read once at import, so configure the environment before loading the app
+    os.environ.update({
+        'AI_BACKEND': 'fake',
+        'AI_FAKE_LATENCY_MS': str(args.latency_ms),
+        'AI_FAKE_LATENCY_SIGMA': str(args.latency_sigma),
+        'AI_FAKE_TOKENS_PER_SECOND': str(args.tokens_per_second),
+        'AI_FAKE_ERROR_RATE': str(args.error_rate),
+        'AI_FAKE_SEED': str(args.seed),
+        'AI_CACHE_ENABLED': 'true' if args.cache else 'false',
+        'AI_CACHE_DB_PATH': '',
+        'AI_RATE_LIMIT_ENABLED': 'false'
+    })
+
+    results = asyncio.run(run(args))
+
+    if args.output:
+        report = {
+            'meta': {
+                'timestamp': datetime.now(timezone.utc).isoformat(),
+                'git_revision': git_revision(),
+                'python': platform.python_version(),
+                'args': vars(args)
+            },
+            'results': results
+        }
+        with open(args.output, 'w') as output_file:
+            json.dump(report, output_file, indent=2)
+        print(f"\nwrote {args.output}")
+    if args.compare:
+        print_comparison(results, args.compare)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,31 @@
+from app.services.ai_model_router import ModelRouter
+
+
+def make_router():
+    return ModelRouter(
+        routes={"job_analysis": ["fast", "strong"]}, default_models=["strong", "fast"],
+        slos={"fast": 1.0}, window_seconds=60, min_samples=3
+    )
+
+
+def test_falls_back_while_primary_is_over_its_slo():
+    router = make_router()
+    assert router.select("job_analysis") == "fast"
+    for _ in range(3):
+        router.record("fast", 5.0)
+    assert router.select("job_analysis") == "strong"
+
+
+def test_only_sent_completions_count_as_fallbacks():
+    router = make_router()
+    for _ in range(3):
+        router.record("fast", 5.0)
+
+    # Selecting a model for a call that is then answered from a cache is not a fallback
+    router.select("job_analysis")
+    assert router.get_stats()["fallbacks"] == {}
+
+    router.record_sent("job_analysis", "strong")
+    router.record_sent("job_analysis", "fast")
+    router.record_sent("cover_letter", "strong")
+    assert router.get_stats()["fallbacks"] == {"job_analysis": 1}
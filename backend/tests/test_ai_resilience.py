@@ -0,0 +1,101 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services.ai_resilience import CircuitBreaker, CircuitOpenError, ResilientCaller
+
+
+def open_breaker(open_seconds=0.05):
+    breaker = CircuitBreaker(window=4, failure_rate=0.5, min_calls=2, open_seconds=open_seconds)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    return breaker
+
+
+def test_opens_after_failure_rate_and_fails_fast():
+    breaker = open_breaker(open_seconds=30)
+
+    with pytest.raises(CircuitOpenError) as raised:
+        breaker.before_call()
+    assert 29 < raised.value.retry_after <= 30
+    assert breaker.short_circuited == 1
+
+
+def test_half_open_lets_a_single_trial_through():
+    breaker = open_breaker()
+    time.sleep(0.06)
+
+    # Read without any traffic, as the health check does
+    assert breaker.state == "half_open"
+    assert breaker.before_call() is True
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.before_call() is False
+
+
+def test_failed_trial_reopens():
+    breaker = open_breaker()
+    time.sleep(0.06)
+
+    assert breaker.before_call() is True
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert breaker.times_opened == 2
+
+
+def test_probe_success_closes_only_a_half_open_circuit():
+    breaker = open_breaker()
+    breaker.record_probe_success()
+    assert breaker.state == "open"
+
+    time.sleep(0.06)
+    breaker.record_probe_success()
+    assert breaker.state == "closed"
+
+
+def test_cancelled_trial_releases_the_half_open_slot():
+    breaker = open_breaker()
+    caller = ResilientCaller(breaker, max_attempts=1, base_delay=0, max_delay=0)
+    time.sleep(0.06)
+
+    async def hang():
+        await asyncio.sleep(10)
+
+    async def ok():
+        return "ok"
+
+    async def scenario():
+        trial = asyncio.ensure_future(caller.call(hang))
+        await asyncio.sleep(0.01)
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+        # Without the release every later call would be short-circuited forever
+        return await caller.call(ok)
+
+    assert asyncio.run(scenario()) == "ok"
+    assert breaker.state == "closed"
+
+
+def test_transient_failures_are_retried_then_open_the_circuit():
+    breaker = CircuitBreaker(window=4, failure_rate=0.5, min_calls=2, open_seconds=30)
+    caller = ResilientCaller(breaker, max_attempts=3, base_delay=0, max_delay=0)
+    attempts = []
+
+    async def timeout():
+        attempts.append(1)
+        raise asyncio.TimeoutError()
+
+    async def scenario():
+        # The third attempt is refused by the breaker the first two opened
+        with pytest.raises(CircuitOpenError):
+            await caller.call(timeout)
+
+    asyncio.run(scenario())
+    assert len(attempts) == 2
+    assert caller.retries == 2
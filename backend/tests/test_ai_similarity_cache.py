@@ -0,0 +1,95 @@
+import random
+
+from app.services.ai_similarity_cache import FINGERPRINT_BITS, SimilarityCache, clean_description, simhash
+
+POSTING = """Senior Backend Engineer at Acme
+We are looking for an engineer with 5+ years of Python, PostgreSQL and AWS experience.
+You will design APIs, own services in production and mentor two junior engineers.
+Apply at https://jobs.acme.com/backend?utm_source=linkedin&ref=feed
+"""
+
+
+def flip_bits(value, count, rng):
+    for bit in rng.sample(range(FINGERPRINT_BITS), count):
+        value ^= 1 << bit
+    return value
+
+
+def make_cache(threshold=0.9, **options):
+    return SimilarityCache("job_analysis", threshold=threshold, max_entries=options.pop("max_entries", 100),
+                           ttl=options.pop("ttl", 3600), **options)
+
+
+def test_bands_partition_the_fingerprint():
+    cache = make_cache(threshold=0.9)
+
+    assert len(cache._bands) == cache.max_distance + 1
+    combined = 0
+    for mask in cache._bands:
+        assert combined & mask == 0
+        combined |= mask
+    assert combined == (1 << FINGERPRINT_BITS) - 1
+
+
+def test_every_fingerprint_within_the_threshold_shares_a_band():
+    rng = random.Random(7)
+    cache = make_cache(threshold=0.9)
+    stored = rng.getrandbits(FINGERPRINT_BITS)
+    cache.set("acme", stored, {"id": 1})
+
+    for _ in range(200):
+        # Banding must never hide a match the threshold allows
+        distance = rng.randint(0, cache.max_distance)
+        assert cache.get("acme", flip_bits(stored, distance, rng)) == {"id": 1}
+    for _ in range(50):
+        assert cache.get("acme", flip_bits(stored, cache.max_distance + 1, rng)) is None
+
+
+def test_near_duplicate_posting_reuses_the_analysis():
+    cache = make_cache(threshold=0.9)
+    variant = "  ".join(POSTING.replace("utm_source=linkedin&ref=feed", "utm_source=indeed").split(" "))
+    variant += "Share this job\n"
+
+    cache.set("acme\x1fengineer", cache.fingerprint(POSTING), {"keywords": ["python"]})
+
+    assert clean_description(variant) == clean_description(POSTING)
+    assert cache.get("acme\x1fengineer", cache.fingerprint(variant)) == {"keywords": ["python"]}
+    # A different company or role never matches, however similar the text
+    assert cache.get("acme\x1fmanager", cache.fingerprint(variant)) is None
+    assert cache.get_stats()["llm_calls_saved"] == 1
+
+
+def test_unrelated_posting_misses():
+    cache = make_cache(threshold=0.9)
+    cache.set("s", cache.fingerprint(POSTING), {"id": 1})
+    other = "Registered nurse for the night shift in our cardiology ward, BLS certification required."
+
+    assert cache.get("s", simhash(clean_description(other))) is None
+
+
+def test_expired_and_evicted_entries_are_not_returned():
+    expired = make_cache(ttl=-1)
+    expired.enabled = True
+    expired.set("s", 1, {"id": 1})
+    assert expired.get("s", 1) is None
+    assert expired.get_stats()["entries"] == 0
+
+    cache = make_cache(max_entries=2)
+    # Far apart, so none of them is a near match for another
+    oldest, middle, newest = 0, 0x5555555555555555, (1 << FINGERPRINT_BITS) - 1
+    for fingerprint in (oldest, middle, newest):
+        cache.set("s", fingerprint, {"id": fingerprint})
+    assert cache.get("s", oldest) is None
+    assert cache.get("s", newest) == {"id": newest}
+    assert cache.evictions == 1
+
+
+def test_results_are_copies():
+    cache = make_cache()
+    value = {"keywords": ["python"]}
+    cache.set("s", 5, value)
+    value["keywords"].append("go")
+
+    hit = cache.get("s", 5)
+    hit["keywords"].append("rust")
+    assert cache.get("s", 5) == {"keywords": ["python"]}
@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+from app.services.ai_singleflight import SingleFlight
+
+
+def test_concurrent_identical_calls_share_one_upstream_call():
+    flight = SingleFlight()
+    calls = []
+
+    async def upstream():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "answer"
+
+    async def scenario():
+        return await asyncio.gather(*[flight.do("key", upstream) for _ in range(5)])
+
+    assert asyncio.run(scenario()) == ["answer"] * 5
+    assert len(calls) == 1
+    assert flight.get_stats() == {'in_flight': 0, 'upstream_calls': 1, 'coalesced_calls': 4}
+
+
+def test_different_keys_and_later_calls_run_separately():
+    flight = SingleFlight()
+    calls = []
+
+    async def upstream():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return len(calls)
+
+    async def scenario():
+        await asyncio.gather(flight.do("a", upstream), flight.do("b", upstream))
+        # The first flight is over, so this one goes upstream again
+        await flight.do("a", upstream)
+
+    asyncio.run(scenario())
+    assert len(calls) == 3
+
+
+def test_failure_reaches_every_waiter_and_is_not_cached():
+    flight = SingleFlight()
+    attempts = []
+
+    async def failing():
+        attempts.append(1)
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    async def scenario():
+        results = await asyncio.gather(*[flight.do("key", failing) for _ in range(3)], return_exceptions=True)
+        assert all(isinstance(result, RuntimeError) for result in results)
+        with pytest.raises(RuntimeError):
+            await flight.do("key", failing)
+
+    asyncio.run(scenario())
+    assert len(attempts) == 2
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_call():
+    flight = SingleFlight()
+
+    async def upstream():
+        await asyncio.sleep(0.05)
+        return "answer"
+
+    async def scenario():
+        leader = asyncio.ensure_future(flight.do("key", upstream))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do("key", upstream))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(scenario()) == "answer"
+
+
+def test_key_ignores_whitespace_differences():
+    assert SingleFlight.make_key("gpt-4", 0.7, "sys", "tailor  this\nresume") == \
+        SingleFlight.make_key("gpt-4", 0.7, " sys ", "tailor this resume")
+    assert SingleFlight.make_key("gpt-4", 0.7, "sys", "a") != SingleFlight.make_key("gpt-4", 0.2, "sys", "a")
@@ -0,0 +1,109 @@
+import asyncio
+
+from app.services.ai_tasks import TaskQueue, TaskStore
+
+
+def make_queue(db_path, lease=0.3, sweep_interval=0.05, max_attempts=3):
+    queue = TaskQueue(
+        db_path=db_path, workers=1, max_pending=10, max_attempts=max_attempts,
+        retry_delay=0, timeout=5, retention=3600, lease=lease, sweep_interval=sweep_interval
+    )
+
+    async def echo(user_id, payload):
+        await asyncio.sleep(payload.get("seconds", 0))
+        return {"echo": payload["value"]}
+
+    queue.register("echo", echo)
+    return queue
+
+
+async def wait_for_status(queue, task_id, status, timeout=3.0):
+    for _ in range(int(timeout / 0.02)):
+        task = await queue.get(task_id)
+        if task["status"] == status:
+            return task
+        await asyncio.sleep(0.02)
+    raise AssertionError(f"task {task_id} is {task['status']}, not {status}")
+
+
+def test_task_of_a_dead_worker_is_requeued_once_its_lease_expires(tmp_path):
+    db_path = str(tmp_path / "tasks.db")
+    store = TaskStore(db_path)
+    task = store.create(7, "echo", {"value": 1})
+    # Another process claimed it, then died without renewing
+    store.claim(task["id"], "dead-host:1:abcd", 0.2)
+
+    queue = make_queue(db_path)
+
+    async def scenario():
+        await queue.start()
+        try:
+            assert (await queue.get(task["id"]))["status"] == "running"
+            done = await wait_for_status(queue, task["id"], "succeeded")
+        finally:
+            await queue.stop()
+        return done
+
+    done = asyncio.run(scenario())
+    assert done["result"] == {"echo": 1}
+    assert done["attempts"] == 2
+    assert queue.recovered == 1
+
+
+def test_running_task_keeps_its_lease_past_the_lease_length(tmp_path):
+    queue = make_queue(str(tmp_path / "tasks.db"), lease=0.2)
+
+    async def scenario():
+        await queue.start()
+        try:
+            task = await queue.submit(7, "echo", {"value": 2, "seconds": 0.6})
+            return await wait_for_status(queue, task["id"], "succeeded")
+        finally:
+            await queue.stop()
+
+    done = asyncio.run(scenario())
+    assert done["attempts"] == 1
+    assert (queue.recovered, queue.leases_lost) == (0, 0)
+
+
+def test_expired_task_out_of_attempts_is_failed(tmp_path):
+    db_path = str(tmp_path / "tasks.db")
+    store = TaskStore(db_path)
+    task = store.create(7, "echo", {"value": 3})
+    store.claim(task["id"], "dead-host:1:abcd", 0)
+
+    queue = make_queue(db_path, max_attempts=1)
+
+    async def scenario():
+        await queue.start()
+        try:
+            return await queue.get(task["id"])
+        finally:
+            await queue.stop()
+
+    failed = asyncio.run(scenario())
+    assert failed["status"] == "failed"
+    assert failed["error"] == "Interrupted too many times"
+
+
+def test_stop_releases_leases_for_the_next_start(tmp_path):
+    db_path = str(tmp_path / "tasks.db")
+    # Long lease and no periodic sweep: only the release on stop can hand the task back quickly
+    first = make_queue(db_path, lease=60, sweep_interval=60)
+    second = make_queue(db_path, lease=60, sweep_interval=60)
+
+    async def scenario():
+        await first.start()
+        task = await first.submit(7, "echo", {"value": 4, "seconds": 10})
+        await wait_for_status(first, task["id"], "running")
+        await first.stop()
+
+        await second.start()
+        try:
+            return await second.get(task["id"])
+        finally:
+            await second.stop()
+
+    task = asyncio.run(scenario())
+    assert task["status"] in ("queued", "running")
+    assert second.recovered == 1
@@ -0,0 +1,42 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services.document_extraction import DocumentExtractor
+
+
+def test_timed_out_worker_is_terminated():
+    extractor = DocumentExtractor(workers=1, timeout=1.0, max_pages=10, max_bytes=1024)
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        stuck = asyncio.ensure_future(extractor._run(loop.time() + 1.0, time.sleep, 30))
+        await asyncio.sleep(0.3)
+        processes = list(extractor._pool._processes.values())
+        assert processes and all(process.is_alive() for process in processes)
+
+        with pytest.raises(asyncio.TimeoutError):
+            await stuck
+        for _ in range(100):
+            if not any(process.is_alive() for process in processes):
+                break
+            await asyncio.sleep(0.05)
+
+        assert not any(process.is_alive() for process in processes)
+        assert extractor.terminated == len(processes)
+        # The next document gets a fresh pool
+        assert await extractor._run(loop.time() + 10.0, abs, -3) == 3
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        extractor.shutdown()
+
+
+def test_long_pdf_is_split_into_one_range_per_worker():
+    extractor = DocumentExtractor(workers=3, timeout=10.0, max_pages=100, max_bytes=1024, pages_per_task=4)
+
+    assert extractor._page_ranges(4, 4) == []
+    assert extractor._page_ranges(4, 10) == [(4, 7), (7, 10)]
+    assert extractor._page_ranges(4, 50) == [(4, 20), (20, 36), (36, 50)]
@@ -0,0 +1,65 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services.rate_limiter import InMemoryRateLimitBackend, SQLiteRateLimitBackend, TokenBucketLimiter
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_backend(request, tmp_path):
+    if request.param == "memory":
+        return InMemoryRateLimitBackend
+    return lambda: SQLiteRateLimitBackend(str(tmp_path / "limits" / "rate.db"))
+
+
+def take(limiter, key, cost=1):
+    return asyncio.run(limiter.acquire(key, cost))
+
+
+def test_burst_up_to_capacity_then_reject(make_backend):
+    limiter = TokenBucketLimiter(make_backend(), capacity=3, per_hour=36)
+
+    assert [take(limiter, "user:1").allowed for _ in range(4)] == [True, True, True, False]
+    rejected = take(limiter, "user:1")
+    assert not rejected.allowed
+    # 36 an hour refills one token every 100 seconds
+    assert rejected.retry_after == pytest.approx(100, rel=0.01)
+    # Other keys have their own bucket
+    assert take(limiter, "user:2").allowed
+    assert (limiter.allowed, limiter.rejected) == (4, 2)
+
+
+def test_bucket_refills_over_time(make_backend):
+    limiter = TokenBucketLimiter(make_backend(), capacity=2, per_hour=360000)
+
+    assert take(limiter, "user:1", cost=2).allowed
+    assert not take(limiter, "user:1").allowed
+    time.sleep(0.05)
+    assert take(limiter, "user:1").allowed
+
+
+def test_cost_over_capacity_is_never_allowed(make_backend):
+    limiter = TokenBucketLimiter(make_backend(), capacity=2, per_hour=36)
+
+    decision = take(limiter, "user:1", cost=3)
+    assert not decision.allowed
+    assert decision.retry_after == pytest.approx(200)
+    # A rejected batch spends nothing
+    assert take(limiter, "user:1", cost=2).allowed
+
+
+def test_sqlite_buckets_are_shared_between_workers(tmp_path):
+    path = str(tmp_path / "rate.db")
+    first = TokenBucketLimiter(SQLiteRateLimitBackend(path), capacity=2, per_hour=36)
+    second = TokenBucketLimiter(SQLiteRateLimitBackend(path), capacity=2, per_hour=36)
+
+    assert take(first, "user:1").allowed
+    assert take(second, "user:1").allowed
+    assert not take(first, "user:1").allowed
+
+
+def test_disabled_limiter_allows_everything():
+    limiter = TokenBucketLimiter(InMemoryRateLimitBackend(), capacity=1, per_hour=1, enabled=False)
+
+    assert all(take(limiter, "user:1").allowed for _ in range(5))
@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+from starlette.requests import Request
+
+from app.services.upload_spool import MultipartUpload, UploadTooLarge
+
+BOUNDARY = "spool-test-boundary"
+
+
+def multipart_body(content: bytes, filename: str = "resume.txt") -> bytes:
+    return (
+        f"--{BOUNDARY}\r\n"
+        f'Content-Disposition: form-data; name="template_id"\r\n\r\n'
+        f"3\r\n"
+        f"--{BOUNDARY}\r\n"
+        f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        f"Content-Type: text/plain\r\n\r\n"
+    ).encode() + content + f"\r\n--{BOUNDARY}--\r\n".encode()
+
+
+def make_request(body: bytes, chunk_size: int = 1024) -> Request:
+    chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)]
+    received = []
+
+    async def receive():
+        if not chunks:
+            return {"type": "http.request", "body": b"", "more_body": False}
+        chunk = chunks.pop(0)
+        received.append(chunk)
+        return {"type": "http.request", "body": chunk, "more_body": bool(chunks)}
+
+    request = Request({
+        "type": "http",
+        "method": "POST",
+        "path": "/upload",
+        "headers": [(b"content-type", f"multipart/form-data; boundary={BOUNDARY}".encode())]
+    }, receive)
+    request.received = received
+    return request
+
+
+def test_file_is_spooled_to_disk():
+    content = b"experience\n" * 50000
+
+    async def scenario():
+        form = await MultipartUpload.from_request(make_request(multipart_body(content)), "file", 1 << 20)
+        with form.spool as spool:
+            assert form.filename == "resume.txt"
+            assert form.fields == {"template_id": "3"}
+            assert spool.size == len(content)
+            with spool.view() as mapped:
+                assert mapped[:] == content
+            with open(spool.path, "rb") as handle:
+                assert handle.read() == content
+
+    asyncio.run(scenario())
+
+
+def test_oversized_file_stops_reading_the_body():
+    body = multipart_body(b"x" * 100000)
+    request = make_request(body)
+
+    with pytest.raises(UploadTooLarge):
+        asyncio.run(MultipartUpload.from_request(request, "file", 10000))
+    assert sum(len(chunk) for chunk in request.received) < len(body) // 2
+
+
+def test_oversized_upload_answers_413():
+    from fastapi.testclient import TestClient
+
+    from app.core.config import settings
+    from app.services.auth import get_current_user
+    from app.main import app
+    from app.models.user import User
+
+    app.dependency_overrides[get_current_user] = lambda: User(id=7, username="u", email="u@x")
+    try:
+        body = multipart_body(b"x" * (settings.MAX_FILE_SIZE + 1))
+        headers = {"content-type": f"multipart/form-data; boundary={BOUNDARY}"}
+        client = TestClient(app)
+        # Declared too large: refused before the body is read
+        assert client.post("/api/v1/resume/upload", content=body, headers=headers).status_code == 413
+
+        def chunked():
+            yield body
+
+        # No Content-Length: cut off once the file passes the limit
+        response = client.post("/api/v1/resume/upload", content=chunked(), headers=headers)
+        assert response.status_code == 413
+    finally:
+        app.dependency_overrides.clear()